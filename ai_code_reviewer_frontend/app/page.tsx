@@ -17,15 +17,47 @@ export default function Home() {
     try {
       console.log("📤 Uploading file:", file.name);
 
-      const res = await fetch('http://localhost:8000/analyze/file', {
+      // ✅ Stream results: static issues arrive first, fixes fill in as they complete
+      const res = await fetch('http://localhost:8000/analyze/file/stream', {
         method: 'POST',
         body: formData,
       });
 
-      const data = await res.json();
-      console.log("✅ Analysis result:", data);
+      if (!res.ok || !res.body) {
+        throw new Error(`Request failed with status ${res.status}`);
+      }
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      const handleEvent = (event: any) => {
+        if (event.event === 'issues') {
+          console.log("✅ Static analysis result:", event);
+          setResult(event.issues || []);
+          setLoading(false);
+        } else if (event.event === 'fix') {
+          setResult((prev) =>
+            prev.map((item, idx) => (idx === event.index ? { ...item, fix: event.fix } : item))
+          );
+        } else if (event.event === 'error') {
+          console.error("🚨 Fix generation error:", event.detail);
+        }
+      };
 
-      setResult(data.issues || []);
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop() || '';
+
+        for (const line of lines) {
+          if (line.trim()) handleEvent(JSON.parse(line));
+        }
+      }
+      if (buffer.trim()) handleEvent(JSON.parse(buffer));
     } catch (err) {
       alert('❌ Error analyzing file');
       console.error("🚨 Upload error:", err);
@@ -83,10 +115,12 @@ export default function Home() {
                 <span className="ml-2 text-sm text-gray-400">[{item.issue_type}]</span>
               )}
             </p>
-            {item.fix && (
+            {item.fix ? (
               <pre className="mt-2 bg-black text-green-400 p-2 rounded overflow-x-auto">
                 {item.fix}
               </pre>
+            ) : (
+              <p className="mt-2 text-sm text-gray-400">⏳ Generating fix...</p>
             )}
           </div>
         ))}
@@ -0,0 +1,115 @@
+"""Latency and memory comparison of the inference backends.
+
+Each backend is loaded in a fresh subprocess so its resident size is
+measured on its own, the way a server worker would see it. Requires the
+fine-tuned model (save_codet5.py) and, for ``onnx``, an export made by
+export_codet5.py.
+
+Usage:
+    python benchmarks/bench_backends.py [--backends fp32 int8 onnx] [--batch-size 8] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from synthetic import generate_module
+
+
+def rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure_backend(backend: str, batch_size: int, repeat: int) -> dict:
+    """Runs inside the child process: load one backend and time generations."""
+    from src.llm import llm_fixer
+    from src.llm.backends import load_backend
+    from src.llm.prompt_engine import token_counter
+
+    baseline = rss_mb()
+    start = time.perf_counter()
+    llm = load_backend(backend, llm_fixer.MODEL_PATH)
+    load_s = time.perf_counter() - start
+
+    code = generate_module(functions=batch_size, depth=2)
+    prompts = [llm_fixer.build_prompt(llm_fixer.prompt_context(code, 1 + i * 8),
+                                      f"⚠️ Function 'func_{i}' has high cyclomatic complexity (12). Consider refactoring.")
+               for i in range(batch_size)]
+
+    def generate(batch):
+        # Fresh kwargs per call: the stopping criteria are stateful
+        kwargs = llm_fixer.generation_kwargs_for(llm, batch, count_tokens)
+        return llm(batch, batch_size=len(batch), **kwargs)
+
+    count_tokens = token_counter(llm.tokenizer)
+    generate(prompts[:1])  # warm-up
+    single, batched = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generate(prompts[:1])
+        single.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        outputs = generate(prompts)
+        batched.append(time.perf_counter() - start)
+    tokens = sum(count_tokens(output[0]["generated_text"]) for output in outputs)
+
+    return {
+        "load_s": load_s,
+        "single_median_s": statistics.median(single),
+        "batch_median_s": statistics.median(batched),
+        "prompts_per_s": batch_size / statistics.median(batched),
+        "tokens_per_batch": tokens,
+        "rss_mb": rss_mb(),
+        "model_rss_mb": rss_mb() - baseline,
+    }
+
+
+def run_child(backend: str, args) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", backend,
+           "--batch-size", str(args.batch_size), "--repeat", str(args.repeat)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["fp32", "int8", "onnx"])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="Also write the results as JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_backend(args.child, args.batch_size, args.repeat)))
+        return
+
+    results = {backend: run_child(backend, args) for backend in args.backends}
+
+    print(f"{'backend':>8} {'load s':>8} {'1 prompt s':>11} {'batch s':>9} {'prompts/s':>10} {'RSS MB':>8}")
+    for backend, r in results.items():
+        if "error" in r:
+            print(f"{backend:>8}  ❌ {r['error']}")
+            continue
+        print(f"{backend:>8} {r['load_s']:>8.2f} {r['single_median_s']:>11.3f} {r['batch_median_s']:>9.3f} "
+              f"{r['prompts_per_s']:>10.2f} {r['rss_mb']:>8.0f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compares two benchmarks/run.py result files and flags regressions.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.15]
+
+Exits with status 1 if any benchmark's median got slower by more than the
+threshold (a fraction: 0.15 = 15%).
+"""
+import argparse
+import json
+import sys
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """Maps 'size/group/name' to the median time of every benchmark."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict) and "median_s" in value:
+            flat[path] = value["median_s"]
+        elif isinstance(value, dict):
+            flat.update(flatten(value, path))
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    before = flatten(baseline["results"])
+    after = flatten(candidate["results"])
+
+    print(f"{baseline['revision'][:10]} → {candidate['revision'][:10]}")
+    print(f"{'benchmark':<50} {'before s':>10} {'after s':>10} {'change':>8}")
+
+    regressions = 0
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = " ⚠️"
+            regressions += 1
+        print(f"{name:<50} {old:>10.4f} {new:>10.4f} {change:>+8.1%}{flag}")
+
+    for name in sorted(before.keys() ^ after.keys()):
+        print(f"{name:<50} (only in {'baseline' if name in before else 'candidate'})")
+
+    if regressions:
+        print(f"\n❌ {regressions} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Benchmark suite for the analyzers, the fix pipeline and the API.
+
+Runs each benchmark on synthetic modules and writes a JSON file that
+benchmarks/compare.py can diff against a run from another commit. The model
+is replaced by a stub, so no weights are needed and the fix benchmarks
+measure prompt building and post-processing only.
+
+Usage:
+    python benchmarks/run.py --out bench_output.json [--sizes 50 200] [--quick]
+"""
+import argparse
+import ast
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Keep the analysis/fix caches out of the user's cache dir so every
+# iteration does real work.
+os.environ["AI_REVIEWER_CACHE_DIR"] = tempfile.mkdtemp(prefix="ai_reviewer_bench_")
+os.environ.setdefault("AI_REVIEWER_WARMUP", "0")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.analysis.ast_analyzer import CodeAnalyzer
+from src.analysis.complexity import analyze_cyclomatic_complexity
+from src.analysis.dead_code import detect_dead_code
+from src.analysis.loop_optimizer import analyze_loops
+from src.llm import llm_fixer
+from synthetic import generate_module
+
+
+class StubLLM:
+    """Stands in for the text-generation pipeline with a canned fenced answer."""
+
+    def __call__(self, prompts, batch_size=None, **kwargs):
+        def answer(prompt):
+            return [{"generated_text": "```python\ndef fixed():\n    return None\n```\nExtra chatter"}]
+        if isinstance(prompts, str):
+            return answer(prompts)
+        return [answer(prompt) for prompt in prompts]
+
+
+class NullFixCache:
+    """Fix cache that never hits, so every fix goes through the full path."""
+
+    def get(self, key):
+        return None
+
+    def put(self, key, fix):
+        pass
+
+
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "runs": repeat,
+    }
+
+
+def analyzer_benchmarks(code: str, repeat: int) -> dict:
+    tree = ast.parse(code)
+    return {
+        "parse": measure(lambda: ast.parse(code), repeat),
+        "analyze_code": measure(lambda: CodeAnalyzer().analyze_code(code), repeat),
+        "complexity": measure(lambda: analyze_cyclomatic_complexity(tree), repeat),
+        "dead_code": measure(lambda: detect_dead_code(tree), repeat),
+        "loops": measure(lambda: analyze_loops(tree), repeat),
+    }
+
+
+def fix_benchmarks(code: str, repeat: int) -> dict:
+    issues = CodeAnalyzer().analyze_code(code)
+    # Complexity warnings are the issues that actually reach the model
+    llm_issues = [(line, f"⚠️ Function 'func_{i}' has high cyclomatic complexity (12). Consider refactoring.")
+                  for i, (line, *_) in enumerate(issues)]
+
+    def single():
+        for line, desc, *rest in llm_issues:
+            llm_fixer.get_ai_fix_local(code, desc, issue_line=line)
+
+    return {
+        "rule_based": measure(lambda: llm_fixer.get_ai_fixes_local(code, issues), repeat),
+        "get_ai_fix_local": measure(single, repeat),
+        "get_ai_fixes_local": measure(lambda: llm_fixer.get_ai_fixes_local(code, llm_issues), repeat),
+        "issues": len(llm_issues),
+    }
+
+
+def api_benchmarks(code: str, repeat: int) -> dict:
+    from fastapi.testclient import TestClient
+    from src.api.main import app
+
+    client = TestClient(app)
+    files = {"file": ("bench.py", code, "text/x-python")}
+
+    def upload():
+        response = client.post("/analyze/file", files=files)
+        assert response.status_code == 200, response.text
+
+    return {"analyze_file": measure(upload, repeat)}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 800], help="Functions per module")
+    parser.add_argument("--depth", type=int, default=4, help="Nesting depth of each function")
+    parser.add_argument("--loop-density", type=float, default=0.5, help="Fraction of nesting levels that are loops")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Small sizes and fewer runs, for smoke testing")
+    parser.add_argument("--skip-api", action="store_true", help="Skip the TestClient benchmarks")
+    parser.add_argument("--out", default="bench_output.json")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.sizes, args.repeat = [20, 80], 2
+
+    llm_fixer.set_local_llm(StubLLM(), model_id="bench-stub")
+    llm_fixer.set_fix_cache(NullFixCache())
+
+    results = {}
+    for size in args.sizes:
+        code = generate_module(size, args.depth, args.loop_density)
+        key = f"functions={size}"
+        print(f"⏱️ {key} ({len(code.splitlines())} lines)")
+
+        # The fix path and endpoint still print progress; keep it off the console
+        with contextlib.redirect_stdout(io.StringIO()):
+            entry = {
+                "lines": len(code.splitlines()),
+                "analyzers": analyzer_benchmarks(code, args.repeat),
+                "fixes": fix_benchmarks(code, args.repeat),
+            }
+            if not args.skip_api:
+                entry["api"] = api_benchmarks(code, args.repeat)
+        results[key] = entry
+
+    output = {
+        "revision": git_revision(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": {"depth": args.depth, "loop_density": args.loop_density, "repeat": args.repeat},
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"✅ Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,283 @@
+import os
+import sys
+import time
 import typer
+from typing import List
 from src.analysis.ast_analyzer import CodeAnalyzer
-from src.llm.llm_fixer import get_ai_fix_local
-from src.analysis.report_generator import save_report
+from src.analysis.autofix import apply_edits, comment_edits, edits_for_issues, resolve_overlaps
+from src.analysis.batch import DEFAULT_CHUNK_SIZE, analyze_paths, discover_python_files
+from src.analysis.cache import analyze_code_cached
+from src.analysis.clones import MIN_CLONE_NODES, CloneIndex
+from src.analysis.diff import git_diff, git_toplevel, issues_in_diff, parse_unified_diff
+from src.api import daemon
+from src.analysis.watcher import DEFAULT_DEBOUNCE_SECONDS, make_watcher, wait_for_changes
+from src.llm.llm_fixer import get_ai_fixes_local, issue_context_keys, warm_up
+from src.analysis.report_generator import REPORT_FORMATS, ReportWriter, write_report
 
 app = typer.Typer()
 
+def report_formats_option():
+    return typer.Option(list(REPORT_FORMATS), "--format", help="Report format: md, json or sarif (repeatable)")
+
+def issue_results(issues, fixes):
+    """Pairs analyzer tuples with their fixes as report dicts."""
+    return [
+        {"line": line, "issue": issue, "fix": fix, "issue_type": rest[0] if rest else None}
+        for (line, issue, *rest), fix in zip(issues, fixes)
+    ]
+
 @app.command()
-def analyze(file_path: str):
+def analyze(
+    file_path: str,
+    no_cache: bool = typer.Option(False, "--no-cache", help="Re-analyze even if the file is unchanged"),
+    formats: List[str] = report_formats_option(),
+):
     """Analyze a Python file for code issues and show AI suggestions."""
     with open(file_path, 'r') as f:
         code = f.read()
 
-    analyzer = CodeAnalyzer()
-    issues = analyzer.analyze_code(code)
-
-    for line, issue, *_ in issues:
-        fix = get_ai_fix_local(code, issue)
+    # ✅ Served by the daemon when it's running, so the model isn't reloaded
+    issues, fixes = daemon.review_via_daemon(code, use_cache=not no_cache)
+    for (line, issue, *_), fix in zip(issues, fixes):
         typer.echo(f"\n[Line {line}] {issue}")
         typer.echo(f"  🔧 Suggested Fix:\n{fix}\n")
 
-    save_report(file_path, issues)
-    typer.echo("✅ Report saved as Markdown.")
+    paths = write_report(file_path, issue_results(issues, fixes), formats=formats)
+    typer.echo(f"✅ Report saved: {', '.join(paths.values())}")
 
 @app.command()
-def fix(file_path: str, out: str = typer.Option(None, help="Path to save fixed code with inline comments")):
+def fix(
+    file_path: str,
+    out: str = typer.Option(None, help="Path to save fixed code with inline comments"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Re-analyze even if the file is unchanged"),
+):
     """Suggest AI fixes and optionally write fixed code to a new file."""
     with open(file_path, 'r') as f:
         code = f.read()
 
-    analyzer = CodeAnalyzer()
-    issues = analyzer.analyze_code(code)
-    lines = code.splitlines()
+    issues, fixes = daemon.review_via_daemon(code, use_cache=not no_cache)
 
-    for line, issue, *_ in issues:
-        fix = get_ai_fix_local(code, issue)
+    # Unused imports/variables and dead code are fixed by source edits; the
+    # other issues get their suggestion as a comment above the line. All
+    # edits refer to the original offsets and are applied in one pass.
+    edits = edits_for_issues(code, issues, filename=file_path)
+    auto_fixed = {edit[3] for edit in edits}
+    for index, ((line, issue, *_), fix) in enumerate(zip(issues, fixes)):
         typer.echo(f"\n[Line {line}] {issue}")
-        typer.echo(f"  🔧 Suggested Fix:\n{fix}\n")
-
-        # Add AI suggestion as inline comment above the issue
-        if out and 0 <= line - 1 < len(lines):
-            comment = f"# AI Suggestion for Line {line}: {issue}"
-            lines.insert(line - 1, comment)
+        if out and index in auto_fixed:
+            typer.echo("  ✅ Fixed automatically")
+        else:
+            typer.echo(f"  🔧 Suggested Fix:\n{fix}\n")
 
     if out:
+        edits += comment_edits(code, [(line, f"AI Suggestion for Line {line}: {issue}", index)
+                                      for index, (line, issue, *_) in enumerate(issues) if index not in auto_fixed])
+        accepted, rejected = resolve_overlaps(edits)
         with open(out, 'w') as fout:
-            fout.write('\n'.join(lines))
-        typer.echo(f"💾 Fixed version (with suggestions) saved to: {out}")
+            fout.write(apply_edits(code, accepted))
+        typer.echo(f"💾 Fixed version ({len(auto_fixed)} fixes applied, suggestions as comments) saved to: {out}")
+        if rejected:
+            typer.echo(f"⚠️ {len(rejected)} overlapping edits were skipped; run fix again on the output to apply them.")
+
+@app.command("analyze-dir")
+def analyze_dir(
+    root: str,
+    ignore: List[str] = typer.Option([], "--ignore", help="Glob of paths to skip (repeatable)"),
+    jobs: int = typer.Option(None, "--jobs", "-j", help="Worker processes (default: CPU count)"),
+    chunk_size: int = typer.Option(DEFAULT_CHUNK_SIZE, help="Files per work unit"),
+    no_ai: bool = typer.Option(False, "--no-ai", help="Static analysis only, skip AI fixes"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Re-analyze even unchanged files"),
+    formats: List[str] = report_formats_option(),
+):
+    """Analyze every Python file under a directory in parallel."""
+    paths = discover_python_files(root, ignore)
+    typer.echo(f"🔍 Analyzing {len(paths)} Python files...")
+
+    results = analyze_paths(paths, jobs=jobs, chunk_size=chunk_size, use_cache=not no_cache)
+
+    total = 0
+    report = ReportWriter(formats=formats)
+    for path, issues in results.items():
+        if not issues:
+            continue
+        total += len(issues)
+
+        code = None
+        if not no_ai:
+            with open(path, 'r', encoding='utf-8') as f:
+                code = f.read()
+
+        fixes = get_ai_fixes_local(code, issues) if code is not None else [None] * len(issues)
+
+        typer.echo(f"\n📄 {path}")
+        for (line, issue, *_), fix in zip(issues, fixes):
+            typer.echo(f"  [Line {line}] {issue}")
+            if fix:
+                typer.echo(f"    🔧 Suggested Fix:\n{fix}\n")
+
+        report.write_file(path, issue_results(issues, fixes))
+
+    report.close()
+    typer.echo(f"\n✅ {total} issues in {len(results)} files. Report saved to {report.run_dir}")
+
+@app.command("analyze-diff")
+def analyze_diff(
+    rev_range: str = typer.Argument(None, help="Git revision range to review, e.g. main...HEAD"),
+    diff_file: str = typer.Option(None, "--diff-file", help="Unified diff to review instead ('-' for stdin)"),
+    no_ai: bool = typer.Option(False, "--no-ai", help="Static analysis only, skip AI fixes"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Re-analyze even unchanged files"),
+    formats: List[str] = report_formats_option(),
+):
+    """Review only the functions and classes touched by a diff."""
+    if diff_file == "-":
+        diff_text = sys.stdin.read()
+        root = "."
+    elif diff_file:
+        with open(diff_file, 'r', encoding='utf-8') as f:
+            diff_text = f.read()
+        root = "."
+    elif rev_range:
+        diff_text = git_diff(rev_range)
+        root = git_toplevel()
+    else:
+        raise typer.BadParameter("Pass a revision range or --diff-file.")
+
+    changed = parse_unified_diff(diff_text)
+    total = 0
+    report = ReportWriter(formats=formats)
+    for rel_path, changed_lines in changed.items():
+        path = os.path.join(root, rel_path)
+        if not rel_path.endswith(".py") or not os.path.exists(path):
+            continue
+
+        with open(path, 'r', encoding='utf-8') as f:
+            code = f.read()
+
+        issues = CodeAnalyzer().analyze_code(code) if no_cache else analyze_code_cached(code)
+        issues = issues_in_diff(code, issues, changed_lines)
+        if not issues:
+            continue
+        total += len(issues)
+
+        fixes = [None] * len(issues) if no_ai else get_ai_fixes_local(code, issues)
+
+        typer.echo(f"\n📄 {rel_path}")
+        for (line, issue, *_), fix in zip(issues, fixes):
+            typer.echo(f"  [Line {line}] {issue}")
+            if fix:
+                typer.echo(f"    🔧 Suggested Fix:\n{fix}\n")
+
+        report.write_file(rel_path, issue_results(issues, fixes))
+
+    report.close()
+    typer.echo(f"\n✅ {total} issues in changed code across {len(changed)} files. Report saved to {report.run_dir}")
+
+@app.command()
+def clones(
+    root: str,
+    ignore: List[str] = typer.Option([], "--ignore", help="Glob of paths to skip (repeatable)"),
+    index_path: str = typer.Option(None, "--index", help="JSON index to reuse and update (e.g. cached by CI)"),
+    min_nodes: int = typer.Option(MIN_CLONE_NODES, help="Smallest function (in AST nodes) worth reporting"),
+):
+    """Find structurally duplicated functions across a directory."""
+    paths = discover_python_files(root, ignore)
+    index = CloneIndex.load(index_path, min_nodes) if index_path else CloneIndex(min_nodes)
+    index.update_paths(paths)
+    if index_path:
+        index.save(index_path)
+
+    groups = index.clone_groups()
+    for members in groups:
+        typer.echo(f"\n🔁 {len(members)} copies:")
+        for path, name, line, end_line in members:
+            typer.echo(f"  {path}:{line}-{end_line} {name}")
+    typer.echo(f"\n✅ {len(groups)} clone groups in {len(paths)} files ({index.parsed} re-indexed).")
+
+def review_changed_file(path, display, known_fixes, no_ai):
+    """Re-analyzes one file for watch mode and returns its ``{context key: fix}`` map.
+
+    Static results are printed as soon as they're ready. Fixes are reused for
+    issues whose kind and surrounding context are unchanged since the last
+    save; only the rest go to the model.
+    """
+    start = time.perf_counter()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            code = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        typer.echo(f"\n📄 {display}: ❌ {e}")
+        return {}
+
+    issues = analyze_code_cached(code)
+    typer.echo(f"\n📄 {display}: {len(issues)} issues ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    for line, issue, *_ in issues:
+        typer.echo(f"  [Line {line}] {issue}")
+    if no_ai or not issues:
+        return {}
+
+    keys = issue_context_keys(code, issues)
+    fixes = {key: known_fixes[key] for key in keys if key in known_fixes}
+    stale = [i for i, key in enumerate(keys) if key not in fixes]
+    for i, fix in zip(stale, get_ai_fixes_local(code, [issues[i] for i in stale])):
+        fixes[keys[i]] = fix
+        typer.echo(f"  🔧 [Line {issues[i][0]}] Suggested Fix:\n{fix}\n")
+    if len(stale) < len(issues):
+        typer.echo(f"  ♻️ {len(issues) - len(stale)} fixes unchanged")
+    return fixes
+
+@app.command("daemon")
+def run_daemon(
+    socket_path: str = typer.Option(daemon.DEFAULT_SOCKET_PATH, "--socket", help="Unix socket to listen on"),
+    stop: bool = typer.Option(False, "--stop", help="Stop the running daemon"),
+    status: bool = typer.Option(False, "--status", help="Check whether a daemon is running"),
+):
+    """Keep the model loaded in a background server that analyze/fix use automatically."""
+    if stop:
+        typer.echo("✅ Daemon stopped." if daemon.stop(socket_path) else "No daemon is running.")
+        return
+    if status:
+        running = daemon.ping(socket_path)
+        typer.echo(f"✅ Daemon running on {socket_path}" if running else "No daemon is running.")
+        raise typer.Exit(0 if running else 1)
+
+    typer.echo(f"🔄 Loading model; serving on {socket_path} (stop with Ctrl+C or --stop)")
+    daemon.serve(socket_path)
+
+@app.command()
+def watch(
+    path: str,
+    ignore: List[str] = typer.Option([], "--ignore", help="Glob of paths to skip (repeatable)"),
+    no_ai: bool = typer.Option(False, "--no-ai", help="Static analysis only, skip AI fixes"),
+    debounce_ms: int = typer.Option(int(DEFAULT_DEBOUNCE_SECONDS * 1000), help="Quiet time that ends a burst of saves"),
+    poll: bool = typer.Option(False, "--poll", help="Poll for changes instead of using inotify"),
+):
+    """Re-review files as they are saved, keeping the model loaded between runs."""
+    if not no_ai:
+        typer.echo("🔄 Loading model...")
+        warm_up()
+
+    watcher = make_watcher(path, ignore, polling=poll)
+    base = path if os.path.isdir(path) else os.path.dirname(path) or "."
+    fixes_by_file = {}
+    for file_path in discover_python_files(path, ignore):
+        key = os.path.abspath(file_path)
+        fixes_by_file[key] = review_changed_file(key, os.path.relpath(key, base), {}, no_ai)
+    typer.echo(f"\n👀 Watching {path} ({type(watcher).__name__}). Press Ctrl+C to stop.")
+
+    try:
+        while True:
+            for changed in sorted(wait_for_changes(watcher, debounce_ms / 1000)):
+                key = os.path.abspath(changed)
+                display = os.path.relpath(key, base)
+                if not os.path.exists(key):
+                    fixes_by_file.pop(key, None)
+                    typer.echo(f"\n🗑️ {display} removed")
+                    continue
+                fixes_by_file[key] = review_changed_file(key, display, fixes_by_file.get(key, {}), no_ai)
+    except KeyboardInterrupt:
+        typer.echo("\n✅ Stopped watching.")
+    finally:
+        watcher.close()
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,17 @@
+import pytest
+from src.analysis.cache import AnalysisCache, set_default_cache
+from src.llm.fix_cache import DiskFixStore, FixCache
+from src.llm.llm_fixer import set_fix_cache
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Keeps the analysis and fix caches of every test in its tmp_path, not ~/.cache."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("AI_REVIEWER_CACHE_DIR", str(cache_dir))  # For subprocesses
+    analysis_cache = AnalysisCache(str(cache_dir / "analysis.sqlite3"))
+    set_default_cache(analysis_cache)
+    set_fix_cache(FixCache(disk=DiskFixStore(str(cache_dir / "fixes.sqlite3"))))
+    yield
+    set_default_cache(None)
+    set_fix_cache(None)
+    analysis_cache.close()
@@ -1,7 +1,22 @@
-import pickle
+"""Converts pickled datasets (DataFrames or lists of records) to compact JSONL.
+
+Records are serialized and written a chunk at a time, so only the unpickled
+object and one chunk of JSON are in memory. The output can be read lazily
+with ``src.data.records.iter_records`` (process_data.py, data_exploration.py).
+
+Usage:
+    python convert_pickle_to_json.py src/data/buggy_dataset/bugfixes_train.pickle [--compress gzip]
+    python convert_pickle_to_json.py data.pickle -o data.jsonl --chunk-size 5000
+"""
+import argparse
+import gzip
 import json
+import math
 import os
-import pandas as pd  # Add this import
+import pickle
+
+DEFAULT_CHUNK_SIZE = 10000
+COMPRESSIONS = ("none", "gzip")
 
 def load_pickle(file_path):
     """Loads the pickle file."""
@@ -9,37 +24,75 @@ def load_pickle(file_path):
         data = pickle.load(f)
     return data
 
-def save_json(data, output_path):
-    """Saves the data as a JSON file."""
-    # Ensure that the directory exists before creating the file
-    output_dir = os.path.dirname(output_path)
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)  # Create the directory if it doesn't exist
-    
-    # Convert DataFrame to JSON-serializable format
-    if isinstance(data, pd.DataFrame):
-        data = data.to_dict(orient="records")  # Convert DataFrame to list of records
-    
-    with open(output_path, "w") as f:
-        json.dump(data, f, indent=4)
-
-def process_pickle_to_json(pickle_file_path, json_file_path):
-    """Loads pickle file, processes, and saves as JSON."""
-    print(f"🔄 Loading pickle file: {pickle_file_path}")
-    data = load_pickle(pickle_file_path)
+def iter_record_chunks(data, chunk_size):
+    """Yields lists of record dicts, converting a DataFrame one slice at a time."""
+    if hasattr(data, "iloc") and hasattr(data, "to_dict"):  # pandas DataFrame
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size].to_dict(orient="records")
+    else:
+        data = list(data) if not isinstance(data, list) else data
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+def json_default(value):
+    # numpy scalars and pandas timestamps
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+def clean_value(value):
+    # NaN (pandas' missing value) isn't valid JSON
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def output_path_for(input_path, compress):
+    stem = os.path.splitext(input_path)[0]
+    return stem + (".jsonl.gz" if compress == "gzip" else ".jsonl")
+
+def convert(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, compress="none"):
+    """Writes the records in ``input_path`` to ``output_path`` as JSONL. Returns the record count."""
+    print(f"🔄 Loading pickle file: {input_path}")
+    data = load_pickle(input_path)
     print(f"✅ Pickle file loaded! Entries: {len(data)}")
-    
-    print(f"💾 Saving data to JSON: {json_file_path}")
-    save_json(data, json_file_path)
-    print("✅ Data saved as JSON!")
 
-# Paths to the pickle files and output JSON files
-pickle_file_path_train = "/Users/sakshamtyagi/ai_code_reviewer/src/data/buggy_dataset/bugfixes_train.pickle"
-pickle_file_path_valid = "/Users/sakshamtyagi/ai_code_reviewer/src/data/buggy_dataset/bugfixes_valid.pickle"
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    tmp_path = output_path + ".tmp"
+    opener = gzip.open if compress == "gzip" else open
+    count = 0
+    with opener(tmp_path, "wt", encoding="utf-8") as f:
+        for chunk in iter_record_chunks(data, chunk_size):
+            lines = [
+                json.dumps({key: clean_value(value) for key, value in record.items()},
+                           ensure_ascii=False, separators=(",", ":"), default=json_default)
+                for record in chunk
+            ]
+            f.write("\n".join(lines) + "\n")
+            count += len(lines)
+    os.replace(tmp_path, output_path)
+
+    print(f"💾 Saved {count} records to: {output_path}")
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="Pickle files to convert")
+    parser.add_argument("-o", "--out", help="Output path (only with a single input; default: next to the input)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records serialized per write")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default="none")
+    args = parser.parse_args()
+
+    if args.out and len(args.inputs) > 1:
+        parser.error("--out can only be used with a single input")
+    compress = "gzip" if args.out and args.out.endswith(".gz") else args.compress
 
-json_file_path_train = "/Users/sakshamtyagi/ai_code_reviewer/src/data/buggy_dataset/bugfixes_train.json"
-json_file_path_valid = "/Users/sakshamtyagi/ai_code_reviewer/src/data/buggy_dataset/bugfixes_valid.json"
+    for input_path in args.inputs:
+        convert(input_path, args.out or output_path_for(input_path, compress), args.chunk_size, compress)
 
-# Process the pickle files to JSON
-process_pickle_to_json(pickle_file_path_train, json_file_path_train)
-process_pickle_to_json(pickle_file_path_valid, json_file_path_valid)
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,89 @@
 import json
-import pandas as pd
+import sys
+from collections import Counter
+from itertools import islice
+from src.data.records import find_dataset, iter_records
 
-# Load the dataset
-file_path = "src/data/buggy_dataset/train_finetune.json"
+# Stream the dataset instead of loading it into memory (.jsonl[.gz] or .json)
+file_path = sys.argv[1] if len(sys.argv) > 1 else find_dataset("src/data/buggy_dataset/train_finetune")
 
-with open(file_path, "r", encoding="utf-8") as f:
-    data = json.load(f)
+def line_count_stats(counts: Counter):
+    """``describe()``-style statistics computed from a histogram of line counts."""
+    total = sum(counts.values())
+    if not total:
+        return {}
+    mean = sum(lines * n for lines, n in counts.items()) / total
+    variance = sum(n * (lines - mean) ** 2 for lines, n in counts.items()) / (total - 1) if total > 1 else 0.0
+    ordered = sorted(counts.items())
 
-# Convert JSON to DataFrame
-df = pd.DataFrame(data)
+    def value_at(rank):
+        seen = 0
+        for lines, n in ordered:
+            seen += n
+            if rank < seen:
+                return lines
+        return ordered[-1][0]
+
+    def percentile(q):
+        # Linear interpolation between closest ranks, like pandas
+        position = q * (total - 1)
+        low = int(position)
+        return value_at(low) + (value_at(min(low + 1, total - 1)) - value_at(low)) * (position - low)
+
+    return {"count": total, "mean": round(mean, 2), "std": round(variance ** 0.5, 2), "min": ordered[0][0],
+            "25%": percentile(0.25), "50%": percentile(0.5), "75%": percentile(0.75), "max": ordered[-1][0]}
+
+def print_stats(stats: dict):
+    for name, value in stats.items():
+        print(f"{name:<8} {value}")
+
+columns = Counter()
+missing_values = Counter()
+instructions = Counter()
+buggy_code_lines = Counter()
+response_lines = Counter()
+sample = []
+
+for record in iter_records(file_path):
+    if len(sample) < 5:
+        sample.append(record)
+    columns.update(record.keys())
+    for key, value in record.items():
+        if value is None:
+            missing_values[key] += 1
+    # Count occurrences of different instruction types
+    if record.get("instruction") is not None:
+        instructions[record["instruction"]] += 1
+    # Lengths of code snippets (if applicable)
+    if isinstance(record.get("buggy_code"), str):
+        buggy_code_lines[len(record["buggy_code"].split("\n"))] += 1
+    if isinstance(record.get("response"), str):
+        response_lines[len(record["response"].split("\n"))] += 1
 
 # Display basic info
 print("Dataset Structure:")
-print(df.info())
+for column, count in columns.items():
+    print(f"{column:<20} {count - missing_values[column]} non-missing")
 
 # Display first few rows
 print("\nSample Data:")
-print(df.head())
+for record in sample:
+    print(json.dumps({key: str(value)[:60] for key, value in islice(record.items(), 5)}, ensure_ascii=False))
 
 # Check for missing values
-missing_values = df.isnull().sum()
 print("\nMissing Values:")
-print(missing_values[missing_values > 0])
+for column, missing in missing_values.items():
+    print(f"{column:<20} {missing}")
 
-# Count occurrences of different instruction types
-if "instruction" in df.columns:
+if instructions:
     print("\nInstruction Type Distribution:")
-    print(df["instruction"].value_counts())
+    for instruction, count in instructions.most_common():
+        print(f"{str(instruction)[:60]:<60} {count}")
 
-# Check lengths of code snippets (if applicable)
-if "buggy_code" in df.columns:
-    df["buggy_code_length"] = df["buggy_code"].apply(lambda x: len(x.split("\n")))
+if buggy_code_lines:
     print("\nBuggy Code Length Statistics:")
-    print(df["buggy_code_length"].describe())
+    print_stats(line_count_stats(buggy_code_lines))
 
-if "response" in df.columns:
-    df["response_length"] = df["response"].apply(lambda x: len(x.split("\n")))
+if response_lines:
     print("\nResponse Code Length Statistics:")
-    print(df["response_length"].describe())
+    print_stats(line_count_stats(response_lines))
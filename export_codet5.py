@@ -0,0 +1,61 @@
+"""Exports the fine-tuned CodeT5 to ONNX Runtime, optionally int8-quantized.
+
+Reads the model that save_codet5.py prepared and writes an ONNX export that
+the ``onnx`` backend loads (AI_REVIEWER_BACKEND=onnx, AI_REVIEWER_ONNX_PATH).
+With --quantize the encoder and decoders are dynamically quantized to int8
+in place. Needs ``pip install optimum[onnxruntime]``.
+
+Usage:
+    python export_codet5.py [--model codet5_finetuned_final] [--out codet5_onnx] [--quantize]
+"""
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+from transformers import AutoTokenizer
+
+def export(model_path, out_dir):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_path, export=True)
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_path).save_pretrained(out_dir)
+    print(f"✅ Exported ONNX model to: {out_dir}")
+
+def quantize(onnx_dir, avx512=False):
+    """Replaces every ONNX graph in ``onnx_dir`` with an int8 version."""
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    config = (AutoQuantizationConfig.avx512_vnni if avx512 else AutoQuantizationConfig.avx2)(
+        is_static=False, per_channel=False
+    )
+    for onnx_file in sorted(glob.glob(os.path.join(onnx_dir, "*.onnx"))):
+        file_name = os.path.basename(onnx_file)
+        with tempfile.TemporaryDirectory() as tmp:
+            quantizer = ORTQuantizer.from_pretrained(onnx_dir, file_name=file_name)
+            quantizer.quantize(save_dir=tmp, quantization_config=config)
+            quantized = glob.glob(os.path.join(tmp, "*.onnx"))[0]
+            shutil.move(quantized, onnx_file)
+        print(f"✅ Quantized {file_name} to int8")
+
+def size_mb(path):
+    return sum(os.path.getsize(f) for f in glob.glob(os.path.join(path, "*.onnx"))) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="codet5_finetuned_final", help="Output of save_codet5.py")
+    parser.add_argument("--out", default="codet5_onnx")
+    parser.add_argument("--quantize", action="store_true", help="Dynamically quantize the export to int8")
+    parser.add_argument("--avx512", action="store_true", help="Quantize for AVX-512 VNNI CPUs instead of AVX2")
+    args = parser.parse_args()
+
+    export(args.model, args.out)
+    if args.quantize:
+        quantize(args.out, args.avx512)
+    print(f"📦 ONNX weights: {size_mb(args.out):.1f} MB")
+    print("Compare backends with: python benchmarks/bench_backends.py")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,25 @@
+import argparse
+import logging
 import os
 import torch
-from transformers import RobertaTokenizer, T5ForConditionalGeneration, Trainer, TrainingArguments, DataCollatorForSeq2Seq
-from datasets import load_dataset
+from transformers import RobertaTokenizer, T5ForConditionalGeneration, Trainer, TrainingArguments
+from src.llm.fine_tune import (DEFAULT_TOKENIZED_CACHE_DIR, PADDING_MODES, PaddingStatsCollator, ThroughputCallback,
+                               find_shards, load_tokenized_dataset)
+
+parser = argparse.ArgumentParser(description="Fine-tunes CodeT5 on the preprocessed bug-fix data.")
+parser.add_argument("--padding", choices=PADDING_MODES, default="dynamic",
+                    help="dynamic: pad per batch and group batches by length; max_length: pad everything to --max-length")
+parser.add_argument("--max-length", type=int, default=512)
+parser.add_argument("--batch-size", type=int, help="Per-device batch size (default: 16 dynamic, 1 max_length)")
+parser.add_argument("--grad-accum", type=int, help="Gradient accumulation steps (default: 1 dynamic, 8 max_length)")
+parser.add_argument("--epochs", type=float, default=3)
+parser.add_argument("--sample-fraction", type=float, default=0.2, help="Fraction of each split to train/evaluate on")
+parser.add_argument("--cache-dir", default=DEFAULT_TOKENIZED_CACHE_DIR, help="Where tokenized datasets are stored")
+parser.add_argument("--rebuild", action="store_true", help="Re-tokenize even if a cached dataset matches")
+parser.add_argument("--num-proc", type=int, help="Processes used to tokenize")
+args = parser.parse_args()
+dynamic = args.padding == "dynamic"
+logging.basicConfig(level=logging.INFO)
 
 # Set environment variables to prevent memory crashes
 os.environ["PYTORCH_MPS_HIGH_WATERMARK_RATIO"] = "0.0"  # Prevent system crashes
@@ -9,8 +27,9 @@ os.environ["CUDA_VISIBLE_DEVICES"] = ""  # Disable GPU if necessary
 
 # Define model name and dataset paths
 model_name = "Salesforce/codet5-small"
-train_data_path = "src/data/buggy_dataset/preprocessed_train_finetune.csv"
-valid_data_path = "src/data/buggy_dataset/preprocessed_valid_finetune.csv"
+# Parquet or Arrow shards written by process_data.py
+train_data_path = find_shards("src/data/buggy_dataset/preprocessed/train")
+valid_data_path = find_shards("src/data/buggy_dataset/preprocessed/valid")
 
 # Load tokenizer
 tokenizer = RobertaTokenizer.from_pretrained(model_name)
@@ -20,43 +39,33 @@ model = T5ForConditionalGeneration.from_pretrained(model_name)
 device = torch.device("cuda" if torch.cuda.is_available() else "mps" if torch.backends.mps.is_available() else "cpu")
 model.to(device)
 
-# Load dataset
-dataset = load_dataset("csv", data_files={"train": train_data_path, "validation": valid_data_path})
-
-
-train_size = int(0.2 * len(dataset["train"]))
-valid_size = int(0.2 * len(dataset["validation"]))
-dataset["train"] = dataset["train"].shuffle(seed=42).select(range(train_size))
-dataset["validation"] = dataset["validation"].shuffle(seed=42).select(range(valid_size))
-
-# Tokenize function
-def tokenize_function(examples):
-    inputs = ["Fix the following code:\n" + code for code in examples["clean_instruction"]]
-    targets = [fix for fix in examples["response"]]
-    
-    model_inputs = tokenizer(inputs, max_length=512, truncation=True, padding="max_length")
-    labels = tokenizer(targets, max_length=512, truncation=True, padding="max_length")
-
-    model_inputs["labels"] = labels["input_ids"]
-    return model_inputs
-
-# Tokenize dataset
-tokenized_datasets = dataset.map(tokenize_function, batched=True, remove_columns=["instruction", "response", "clean_instruction", "error_type", "response_length"])
+# Load the sampled, tokenized dataset (memory-mapped; only tokenized on a cache
+# miss). Dynamic mode leaves padding to the collator.
+tokenized_datasets = load_tokenized_dataset(
+    {"train": train_data_path, "validation": valid_data_path}, tokenizer,
+    max_length=args.max_length, padding=args.padding, sample_fraction=args.sample_fraction,
+    seed=42, cache_dir=args.cache_dir, num_proc=args.num_proc, rebuild=args.rebuild,
+)
 
-# Data collator
-data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
+# Data collator: pads each batch to its longest sample, labels with -100
+data_collator = PaddingStatsCollator(tokenizer, model=model, pad_to_multiple_of=8 if dynamic else None)
 
-# Training arguments with smaller batch size and gradient accumulation
+# With dynamic padding, similar-length samples share batches, so the batch
+# size can go up without paying for pad tokens
+batch_size = args.batch_size or (16 if dynamic else 1)
 training_args = TrainingArguments(
     output_dir="./codet5_finetuned",
     evaluation_strategy="epoch",
     save_strategy="epoch",
     logging_dir="./logs",
-    per_device_train_batch_size=1,  # Reduce batch size to avoid memory issues
-    per_device_eval_batch_size=1,
-    gradient_accumulation_steps=8,  # Accumulate gradients to mimic a larger batch
+    logging_steps=50,
+    per_device_train_batch_size=batch_size,
+    per_device_eval_batch_size=batch_size,
+    gradient_accumulation_steps=args.grad_accum or (1 if dynamic else 8),
+    group_by_length=dynamic,
+    length_column_name="length",
     save_total_limit=3,
-    num_train_epochs=3,
+    num_train_epochs=args.epochs,
     fp16=True if torch.cuda.is_available() else False,  # Enable mixed precision for GPU
     load_best_model_at_end=True,
     report_to="none",
@@ -70,6 +79,7 @@ trainer = Trainer(
     eval_dataset=tokenized_datasets["validation"],
     tokenizer=tokenizer,
     data_collator=data_collator,
+    callbacks=[ThroughputCallback(data_collator)],
 )
 
 # Train
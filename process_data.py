@@ -1,55 +1,63 @@
-import pandas as pd
-import re
-
-# File paths
-train_finetune_path = "src/data/buggy_dataset/train_finetune.json"
-valid_finetune_path = "src/data/buggy_dataset/valid_finetune.json"
-
-# Load data
-train_df = pd.read_json(train_finetune_path)
-valid_df = pd.read_json(valid_finetune_path)
-
-# Function to clean "instruction" column
-def clean_instruction(text):
-    """Removes headers and extracts relevant traceback/error messages."""
-    text = re.sub(r"### Buggy Code:\n?", "", text)  # Remove "### Buggy Code:"
-    text = re.sub(r"### Traceback:\n?", "", text)   # Remove "### Traceback:"
-    text = re.sub(r"### Bug Description:\n?", "", text)  # Remove "### Bug Description:"
-    text = re.sub(r"### Fix:\n?", "", text)  # Remove "### Fix:"
-    return text.strip()
-
-# Function to extract Python error types (e.g., TypeError, KeyError, etc.)
-def extract_error_type(text):
-    match = re.search(r"(\w+Error):", text)
-    return match.group(1) if match else "UnknownError"
-
-# Apply transformations
-for df in [train_df, valid_df]:
-    df["clean_instruction"] = df["instruction"].apply(clean_instruction)
-    df["error_type"] = df["instruction"].apply(extract_error_type)
-    df["response_length"] = df["response"].apply(lambda x: len(str(x)))  # Measure response length
-
-# Save preprocessed data
-train_output_file = "src/data/buggy_dataset/preprocessed_train_finetune.csv"
-valid_output_file = "src/data/buggy_dataset/preprocessed_valid_finetune.csv"
-
-train_df.to_csv(train_output_file, index=False)
-valid_df.to_csv(valid_output_file, index=False)
-
-print(f"Preprocessing complete! Train data saved to {train_output_file}")
-print(f"Preprocessing complete! Validation data saved to {valid_output_file}")
-
-# --- Basic Analysis ---
-print("\n🔹 Missing Values:")
-print(train_df.isnull().sum())
-
-print("\n🔹 Most Common Error Types in Training Data:")
-print(train_df["error_type"].value_counts().head(10))
-
-print("\n🔹 Response Length Statistics:")
-print(train_df["response_length"].describe())
-
-# Check for duplicate responses
-duplicate_responses = train_df.duplicated(subset=["response"]).sum()
-print(f"\n🔹 Duplicate Responses: {duplicate_responses} (out of {len(train_df)})")
-
+"""Cleans the fine-tuning data into Parquet shards for fine_tune_codet5.py.
+
+Records are streamed from the JSON (or JSONL) exports and cleaned on a pool
+of worker processes; each split becomes a directory of columnar shards plus
+a stats.json with the summary printed below.
+
+Usage:
+    python process_data.py [--jobs 8] [--chunk-size 5000] [--format parquet|arrow]
+"""
+import argparse
+import json
+import os
+from src.data.preprocess import DEFAULT_CHUNK_SIZE, preprocess_file
+from src.data.records import SHARD_FORMATS, find_dataset
+
+# File paths (.jsonl[.gz] or .json, whichever exists)
+DATA_DIR = "src/data/buggy_dataset"
+SPLITS = {
+    "train": find_dataset(os.path.join(DATA_DIR, "train_finetune")),
+    "valid": find_dataset(os.path.join(DATA_DIR, "valid_finetune")),
+}
+OUTPUT_DIR = os.path.join(DATA_DIR, "preprocessed")
+
+def print_summary(summary):
+    print("\n🔹 Missing Values:")
+    for column, missing in summary["missing"].items():
+        print(f"{column:<20} {missing}")
+
+    print("\n🔹 Most Common Error Types in Training Data:")
+    for error_type, count in summary["error_types"].items():
+        print(f"{error_type:<20} {count}")
+
+    print("\n🔹 Response Length Statistics:")
+    print(f"{'count':<8} {summary['count']}")
+    for name, value in summary["response_length"].items():
+        print(f"{name:<8} {value:.2f}")
+
+    print(f"\n🔹 Duplicate Responses: {summary['duplicate_responses']} (out of {summary['count']})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per task and shard")
+    parser.add_argument("--format", choices=SHARD_FORMATS, default="parquet")
+    parser.add_argument("--train", default=SPLITS["train"], help="Training records (.json, .jsonl, .jsonl.gz)")
+    parser.add_argument("--valid", default=SPLITS["valid"], help="Validation records")
+    parser.add_argument("--out", default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    summaries = {}
+    for split, input_path in (("train", args.train), ("valid", args.valid)):
+        out_dir = os.path.join(args.out, split)
+        stats = preprocess_file(input_path, out_dir, args.jobs, args.chunk_size, args.format)
+        summaries[split] = stats.summary()
+        with open(os.path.join(out_dir, "stats.json"), "w") as f:
+            json.dump(summaries[split], f, indent=2)
+        print(f"Preprocessing complete! {split} data saved to {out_dir} ({len(stats.shards)} shards)")
+
+    # --- Basic Analysis ---
+    print_summary(summaries["train"])
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 import ast
-from src.analysis.complexity import analyze_cyclomatic_complexity
-from src.analysis.dead_code import detect_dead_code
-from src.analysis.loop_optimizer import analyze_loops
+from src.analysis.clones import CloneRule
+from src.analysis.complexity import ComplexityRule
+from src.analysis.dead_code import DeadCodeRule
+from src.analysis.engine import AnalysisEngine
+from src.analysis.loop_optimizer import LoopRule
+from src.metrics import PROFILE_ANALYZERS, observe_span, span
 
 class CodeAnalyzer(ast.NodeVisitor):
+    name = "unused_names"
+
     def __init__(self):
         self.issues = []
 
@@ -15,34 +20,44 @@ class CodeAnalyzer(ast.NodeVisitor):
         self.used_imports = set()
         self.import_lines = {}  # import → line number
 
-    def visit_Import(self, node):
+    # enter_* handlers are dispatched by the fused engine; the visit_*
+    # wrappers keep CodeAnalyzer usable as a plain ast.NodeVisitor.
+    def enter_Import(self, node):
         for alias in node.names:
             name = alias.asname or alias.name
             self.imported_modules.add(name)
             self.import_lines[name] = node.lineno
-        self.generic_visit(node)
 
-    def visit_ImportFrom(self, node):
-        for alias in node.names:
-            name = alias.asname or alias.name
-            self.imported_modules.add(name)
-            self.import_lines[name] = node.lineno
-        self.generic_visit(node)
+    enter_ImportFrom = enter_Import
 
-    def visit_Name(self, node):
+    def enter_Name(self, node):
         if isinstance(node.ctx, ast.Store):
             self.defined_variables.add(node.id)
         elif isinstance(node.ctx, ast.Load):
             self.used_variables.add(node.id)
             if node.id in self.imported_modules:
                 self.used_imports.add(node.id)
-        self.generic_visit(node)
 
-    def visit_Assign(self, node):
+    def enter_Assign(self, node):
         for target in node.targets:
             if isinstance(target, ast.Name):
                 self.defined_variables.add(target.id)
                 self.variable_lines[target.id] = node.lineno
+
+    def visit_Import(self, node):
+        self.enter_Import(node)
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node):
+        self.enter_ImportFrom(node)
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        self.enter_Name(node)
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        self.enter_Assign(node)
         self.generic_visit(node)
 
     def report_unused_imports(self):
@@ -60,13 +75,19 @@ class CodeAnalyzer(ast.NodeVisitor):
     def analyze_code(self, code: str):
         """Parses and analyzes Python code."""
         try:
-            tree = ast.parse(code)
-            self.visit(tree)
+            with span("parse"):
+                tree = ast.parse(code)
 
-            # Modular analyzers
-            self.issues.extend(analyze_cyclomatic_complexity(tree))
-            self.issues.extend(detect_dead_code(tree))
-            self.issues.extend(analyze_loops(tree))
+            # One traversal feeds this analyzer and every modular rule
+            rules = [ComplexityRule(), DeadCodeRule(), LoopRule(), CloneRule()]
+            engine = AnalysisEngine([self, *rules], profile=PROFILE_ANALYZERS)
+            with span("analyze"):
+                engine.run(tree)
+            if PROFILE_ANALYZERS:
+                for name, seconds in engine.rule_seconds.items():
+                    observe_span(f"analyzer.{name}", seconds)
+            for rule in rules:
+                self.issues.extend(rule.finish())
 
             self.report_unused_imports()
             self.report_unused_variables()
@@ -0,0 +1,391 @@
+import ast
+import io
+import os
+import tokenize
+
+# Edits are (start, end, text, issue_index) tuples over character offsets of
+# the source: replace code[start:end] with text. Insertions have start == end.
+
+# Expressions whose evaluation has no side effects, so an unused
+# assignment of them can be deleted outright
+PURE_NODES = (ast.Constant, ast.Name, ast.Tuple, ast.List, ast.Set, ast.Dict, ast.UnaryOp, ast.BinOp, ast.BoolOp,
+              ast.Compare, ast.JoinedStr, ast.FormattedValue, ast.Lambda, ast.arguments, ast.arg,
+              ast.expr_context, ast.operator, ast.unaryop, ast.boolop, ast.cmpop)
+
+SCOPES = (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+
+class SourceMap:
+    """Offsets, tokens and parent links for one source file, built once per fix run.
+
+    ``protected`` collects names whose definitions must never be deleted even
+    if the analyzer calls them unused: names listed in ``__all__``, deleted
+    with ``del``, declared ``global``/``nonlocal``, or rebound by augmented
+    assignment or a for/with/except target (the analyzer sees those only as
+    stores, so the earlier value may still be read).
+    """
+
+    def __init__(self, code: str, tree=None, filename: str = None):
+        self.code = code
+        self.is_package_init = bool(filename) and os.path.basename(filename) == "__init__.py"
+        self.lines = code.splitlines(keepends=True)
+        self.line_starts = [0]
+        for line in self.lines:
+            self.line_starts.append(self.line_starts[-1] + len(line))
+        self.tree = tree or ast.parse(code)
+        self.parents = {}
+        self.statements = {}  # line -> statements starting on it, outermost first
+        self.protected = set()
+        for parent in ast.walk(self.tree):
+            if isinstance(parent, ast.stmt):
+                self.statements.setdefault(parent.lineno, []).append(parent)
+                if isinstance(parent, (ast.Global, ast.Nonlocal)):
+                    self.protected.update(parent.names)
+                elif isinstance(parent, (ast.AugAssign, ast.For, ast.AsyncFor)):
+                    self.protected.update(stored_names(parent.target))
+                elif isinstance(parent, (ast.With, ast.AsyncWith)):
+                    for item in parent.items:
+                        if item.optional_vars is not None:
+                            self.protected.update(stored_names(item.optional_vars))
+                elif isinstance(parent, (ast.Assign, ast.AugAssign, ast.AnnAssign)):
+                    targets = getattr(parent, "targets", None) or [parent.target]
+                    if any(isinstance(t, ast.Name) and t.id == "__all__" for t in targets) and parent.value:
+                        self.protected.update(node.value for node in ast.walk(parent.value)
+                                              if isinstance(node, ast.Constant) and isinstance(node.value, str))
+            elif isinstance(parent, ast.Name) and isinstance(parent.ctx, ast.Del):
+                self.protected.add(parent.id)
+            elif isinstance(parent, ast.ExceptHandler) and parent.name:
+                self.protected.add(parent.name)
+            elif isinstance(parent, ast.comprehension):
+                self.protected.update(stored_names(parent.target))
+            for child in ast.iter_child_nodes(parent):
+                self.parents[child] = parent
+        self._tokens = None
+
+    def offset(self, lineno: int, col: int, byte_col: bool = True) -> int:
+        """Character offset of a position; AST columns count UTF-8 bytes."""
+        if lineno > len(self.lines):
+            return len(self.code)
+        line = self.lines[lineno - 1]
+        if byte_col:
+            col = len(line.encode("utf-8")[:col].decode("utf-8", "ignore"))
+        return self.line_starts[lineno - 1] + col
+
+    def node_range(self, node):
+        return (self.offset(node.lineno, node.col_offset),
+                self.offset(node.end_lineno, node.end_col_offset))
+
+    @property
+    def tokens(self):
+        """Significant tokens as (start offset, end offset, string)."""
+        if self._tokens is None:
+            skip = (tokenize.NL, tokenize.NEWLINE, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT,
+                    tokenize.ENDMARKER)
+            self._tokens = [
+                (self.offset(*token.start, byte_col=False), self.offset(*token.end, byte_col=False), token.string)
+                for token in tokenize.generate_tokens(io.StringIO(self.code).readline)
+                if token.type not in skip
+            ]
+        return self._tokens
+
+    def token_after(self, offset: int):
+        tokens = self.tokens
+        low, high = 0, len(tokens)
+        while low < high:
+            mid = (low + high) // 2
+            if tokens[mid][0] < offset:
+                low = mid + 1
+            else:
+                high = mid
+        return tokens[low] if low < len(tokens) else None
+
+    def token_before(self, offset: int):
+        tokens = self.tokens
+        low, high = 0, len(tokens)
+        while low < high:
+            mid = (low + high) // 2
+            if tokens[mid][1] <= offset:
+                low = mid + 1
+            else:
+                high = mid
+        return tokens[low - 1] if low else None
+
+    def body_of(self, stmt):
+        """The statement list that contains ``stmt``."""
+        parent = self.parents.get(stmt)
+        for field in ("body", "orelse", "finalbody", "handlers"):
+            body = getattr(parent, field, None)
+            if isinstance(body, list) and stmt in body:
+                return body
+        return None
+
+    def scope_of(self, node):
+        """The module, class, function or lambda whose namespace ``node`` binds in."""
+        node = self.parents.get(node)
+        while node is not None and not isinstance(node, SCOPES):
+            node = self.parents.get(node)
+        return node
+
+    def in_class_body(self, stmt) -> bool:
+        """Whether ``stmt`` runs in a class body, where names become attributes."""
+        return isinstance(self.scope_of(stmt), ast.ClassDef)
+
+    def statement_at(self, line: int, types=ast.stmt):
+        """Outermost statement of ``types`` starting on ``line``."""
+        for stmt in self.statements.get(line, ()):
+            if isinstance(stmt, types):
+                return stmt
+        return None
+
+def stored_names(target):
+    """Names bound by an assignment target such as ``a``, ``(a, b)`` or ``[a, *b]``."""
+    return {node.id for node in ast.walk(target) if isinstance(node, ast.Name)}
+
+def bindings(scope, name: str) -> int:
+    """How many places in ``scope`` (nested scopes included) bind or delete ``name``."""
+    count = 0
+    for node in ast.walk(scope):
+        if isinstance(node, ast.Name):
+            count += node.id == name and not isinstance(node.ctx, ast.Load)
+        elif isinstance(node, ast.arg):
+            count += node.arg == name
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            count += node.name == name
+        elif isinstance(node, ast.alias):
+            count += (node.asname or node.name.partition(".")[0]) == name
+        elif isinstance(node, ast.ExceptHandler):
+            count += node.name == name
+    return count
+
+def statement_removal(source: SourceMap, stmt, issue: int):
+    """Deletes a statement: its whole lines when it has them to itself, else just its text and ';'."""
+    start, end = source.node_range(stmt)
+    line_start = source.line_starts[stmt.lineno - 1]
+    line_end = source.line_starts[stmt.end_lineno]
+    before = source.code[line_start:start]
+    after = source.code[end:line_end].strip()
+    if not before.strip() and (not after or after.startswith("#")):
+        return (line_start, line_end, "", issue)
+
+    following = source.token_after(end)
+    if following and following[2] == ";":
+        next_token = source.token_after(following[1])
+        same_line = next_token and "\n" not in source.code[following[1]:next_token[0]]
+        return (start, next_token[0] if same_line else following[1], "", issue)
+    previous = source.token_before(start)
+    if previous and previous[2] == ";":
+        return (previous[0], end, "", issue)
+    return (start, end, "", issue)
+
+def import_fix(source: SourceMap, line: int, name: str, issue: int):
+    """Removes one imported name, or the whole statement if it was the only one.
+
+    Returns ``(edit, removed statement or None)``, or None if nothing matched
+    or removal isn't provably safe: dotted imports (``import os.path`` binds
+    ``os``, which the analyzer doesn't track), relative imports and package
+    ``__init__`` imports (re-exports), imports in class bodies and protected names.
+    """
+    stmt = source.statement_at(line, (ast.Import, ast.ImportFrom))
+    if stmt is None or "." in name or name in source.protected or source.is_package_init:
+        return None
+    if isinstance(stmt, ast.ImportFrom) and stmt.level or source.in_class_body(stmt):
+        return None
+    matches = [alias for alias in stmt.names if (alias.asname or alias.name) == name]
+    if not matches:
+        return None
+    if len(stmt.names) == 1:
+        return statement_removal(source, stmt, issue), stmt
+
+    start, end = source.node_range(matches[0])
+    following = source.token_after(end)
+    if following and following[2] == ",":
+        # Take the comma, and the space before the next name when it's on the same line
+        next_token = source.token_after(following[1])
+        same_line = next_token and next_token[2] != ")" and "\n" not in source.code[following[1]:next_token[0]]
+        return (start, next_token[0] if same_line else following[1], "", issue), None
+    previous = source.token_before(start)
+    if previous and previous[2] == ",":
+        return (previous[0], end, "", issue), None
+    return None
+
+def is_pure(expr) -> bool:
+    return all(isinstance(node, PURE_NODES) for node in ast.walk(expr))
+
+def assignment_fix(source: SourceMap, line: int, name: str, issue: int):
+    """Drops an unused assignment target.
+
+    ``a = b = f()`` loses just ``a = ``; a lone target is removed with its
+    statement when the value has no side effects and becomes ``_`` otherwise.
+    Only function locals bound nowhere else in their function are touched:
+    module globals may be imported elsewhere and class attributes read
+    through instances, and protected names and dunders are left alone.
+    """
+    if name in source.protected or name.startswith("__") and name.endswith("__"):
+        return None
+    for stmt in source.statements.get(line, ()):
+        targets = [t for t in getattr(stmt, "targets", ()) if isinstance(t, ast.Name) and t.id == name]
+        if isinstance(stmt, ast.Assign) and targets:
+            break
+    else:
+        return None
+    scope = source.scope_of(stmt)
+    if not isinstance(scope, (ast.FunctionDef, ast.AsyncFunctionDef)) or bindings(scope, name) != 1:
+        return None
+    target = targets[0]
+    start, end = source.node_range(target)
+    if len(stmt.targets) > 1:
+        index = stmt.targets.index(target)
+        following = stmt.targets[index + 1] if index + 1 < len(stmt.targets) else stmt.value
+        return (start, source.node_range(following)[0], "", issue), None
+    if is_pure(stmt.value):
+        return statement_removal(source, stmt, issue), stmt
+    return (start, end, "_", issue), None
+
+def unreachable_fix(source: SourceMap, line: int, issue: int):
+    stmt = source.statement_at(line)
+    if stmt is None:
+        return None
+    return statement_removal(source, stmt, issue), stmt
+
+def quoted_name(description: str):
+    """The first '...'-quoted name in an issue description."""
+    start = description.find("'")
+    end = description.find("'", start + 1)
+    return description[start + 1:end] if start != -1 and end != -1 else None
+
+def fill_emptied_blocks(source: SourceMap, edits, removed):
+    """Turns a deletion into ``pass`` where a block would otherwise be left empty.
+
+    ``removed`` maps the index of a statement-deleting edit to its statement.
+    """
+    by_body = {}
+    for edit_index, stmt in removed.items():
+        body = source.body_of(stmt)
+        if body is not None and source.parents.get(stmt) is not source.tree:
+            by_body.setdefault(id(body), (body, {}))[1][id(stmt)] = edit_index
+
+    for body, deleted in by_body.values():
+        if len(deleted) < len(body) or not all(id(stmt) in deleted for stmt in body):
+            continue
+        edit_index = deleted[id(body[0])]
+        start, end, _, issue = edits[edit_index]
+        if start == source.line_starts[body[0].lineno - 1]:
+            indent = source.lines[body[0].lineno - 1][:len(source.lines[body[0].lineno - 1]) -
+                                                     len(source.lines[body[0].lineno - 1].lstrip())]
+            edits[edit_index] = (start, end, f"{indent}pass\n", issue)
+        else:
+            edits[edit_index] = (start, end, "pass", issue)
+    return edits
+
+def edits_for_issues(code: str, issues, tree=None, filename: str = None):
+    """Computes a source edit for every issue that can be fixed without the model.
+
+    Unused imports lose just the unused name, unused assignments are dropped
+    (or their target becomes ``_`` when the value has side effects) and
+    unreachable statements are deleted. Issues of other kinds, and those
+    where deleting code might break something still in use, get no edit.
+    """
+    try:
+        source = SourceMap(code, tree, filename)
+    except (SyntaxError, ValueError):
+        return []
+
+    edits = []
+    removed = {}  # edit index -> statement it deletes
+    for index, issue in enumerate(issues):
+        line, desc = issue[0], issue[1]
+        tag = (issue[2] if len(issue) >= 3 else None) or ""
+        name = quoted_name(desc)
+        if tag == "unused_import" and name:
+            result = import_fix(source, line, name, index)
+        elif tag == "unused_variable" and name:
+            result = assignment_fix(source, line, name, index)
+        elif tag == "unreachable_code" or "unreachable code" in desc.lower():
+            result = unreachable_fix(source, line, index)
+        else:
+            result = None
+        if result is None:
+            continue
+        edit, stmt = result
+        if stmt is not None:
+            removed[len(edits)] = stmt
+        edits.append(edit)
+
+    return fill_emptied_blocks(source, edits, removed)
+
+def comment_edits(code: str, comments):
+    """Insertions that put ``# text`` above lines, indented like them.
+
+    ``comments`` are ``(line, text, issue_index)``; lines outside the file
+    are skipped. Only line starts are needed, so the code doesn't have to parse.
+    """
+    lines = code.splitlines(keepends=True)
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+
+    edits = []
+    for line, text, issue in comments:
+        if not 0 <= line - 1 < len(lines):
+            continue
+        content = lines[line - 1]
+        indent = content[:len(content) - len(content.lstrip())]
+        edits.append((starts[line - 1], starts[line - 1], f"{indent}# {text}\n", issue))
+    return edits
+
+def _edit_order(edit):
+    # Insertions go before a replacement starting at the same offset
+    return edit[0], edit[1] != edit[0], edit[1]
+
+def resolve_overlaps(edits):
+    """Orders edits and drops any that overlap an edit already accepted.
+
+    Identical edits (two issues asking for the same change) are both accepted
+    and applied once; an insertion may sit at either end of a replaced range.
+    Returns ``(accepted, rejected)``.
+    """
+    accepted, rejected = [], []
+    last = None
+    for edit in sorted(edits, key=_edit_order):
+        start, end, text, _ = edit
+        if last is not None and (start, end, text) == last[:3]:
+            accepted.append(edit)
+        elif last is not None and start < last[1]:
+            rejected.append(edit)
+        else:
+            accepted.append(edit)
+            last = edit
+    return accepted, rejected
+
+def apply_edits(code: str, edits):
+    """Applies non-overlapping edits in one left-to-right pass."""
+    parts = []
+    position = 0
+    for start, end, text, _ in sorted(set(edit[:3] + (None,) for edit in edits), key=_edit_order):
+        parts.append(code[position:start])
+        parts.append(text)
+        position = end
+    parts.append(code[position:])
+    return "".join(parts)
+
+def autofix(code: str, issues, tree=None, filename: str = None):
+    """Fixes what can be fixed deterministically. Returns ``(new_code, fixed issue indices)``."""
+    accepted, _ = resolve_overlaps(edits_for_issues(code, issues, tree, filename))
+    return apply_edits(code, accepted), {edit[3] for edit in accepted}
+
+def fix_snippets(code: str, issues):
+    """Fenced previews of edits that change a line rather than delete it.
+
+    Maps issue index to the edited line(s) as they would read after the
+    fix, e.g. ``import sys`` for an ``import os, sys`` whose ``os`` is unused.
+    """
+    snippets = {}
+    for start, end, text, issue in edits_for_issues(code, issues):
+        if (start == 0 or code[start - 1] == "\n") and (end == len(code) or code[end - 1] == "\n"):
+            continue  # Whole lines replaced: the canned description says more
+        line_start = code.rfind("\n", 0, start) + 1
+        line_end = code.find("\n", end)
+        line_end = len(code) if line_end == -1 else line_end
+        edited = (code[line_start:start] + text + code[end:line_end]).strip("\n")
+        if edited.strip() and edited.strip() != "pass":
+            snippets[issue] = f"```python\n{edited}\n```"
+    return snippets
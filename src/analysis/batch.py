@@ -0,0 +1,132 @@
+import fnmatch
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from src.analysis.ast_analyzer import CodeAnalyzer
+from src.analysis.cache import analyze_code_cached
+
+# Directories that never contain code worth reviewing
+DEFAULT_IGNORE = (".git", "__pycache__", ".venv", "venv", "node_modules", "*.egg-info", ".tox", ".nox")
+DEFAULT_CHUNK_SIZE = 16
+
+def is_ignored(rel_path: str, patterns) -> bool:
+    """Checks a path (relative to the scan root) against ignore globs.
+
+    A pattern matches either the whole relative path or any single component,
+    so ``tests/*`` ignores one directory while ``build`` ignores every
+    ``build`` directory in the tree.
+    """
+    rel_path = rel_path.replace(os.sep, "/")
+    parts = rel_path.split("/")
+    for pattern in patterns:
+        if fnmatch.fnmatch(rel_path, pattern):
+            return True
+        if any(fnmatch.fnmatch(part, pattern) for part in parts):
+            return True
+    return False
+
+def discover_python_files(root: str, ignore=()):
+    """Recursively lists .py files under ``root``, skipping ignored paths."""
+    patterns = tuple(DEFAULT_IGNORE) + tuple(ignore)
+    if os.path.isfile(root):
+        return [root] if root.endswith(".py") else []
+
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        # Prune ignored directories so we never descend into them
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if not is_ignored(os.path.normpath(os.path.join(rel_dir, d)), patterns)
+        )
+        for name in sorted(filenames):
+            if not name.endswith(".py"):
+                continue
+            rel_path = os.path.normpath(os.path.join(rel_dir, name))
+            if not is_ignored(rel_path, patterns):
+                found.append(os.path.join(dirpath, name))
+    return found
+
+def analyze_source_file(path: str, use_cache: bool = True):
+    """Reads and analyzes one file. Returns (path, issues)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            code = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return path, [(0, f"❌ Error reading file: {e}", None)]
+    if use_cache:
+        return path, analyze_code_cached(code)
+    return path, CodeAnalyzer().analyze_code(code)
+
+def analyze_source(name: str, code: str, use_cache: bool = True):
+    """Analyzes in-memory source. Returns (name, issues)."""
+    if use_cache:
+        return name, analyze_code_cached(code)
+    return name, CodeAnalyzer().analyze_code(code)
+
+def _analyze_source_chunk(sources, use_cache=True):
+    return [analyze_source(name, code, use_cache) for name, code in sources]
+
+def _analyze_chunk(paths, use_cache=True):
+    """Worker entry point: analyzes a chunk of files in one task."""
+    return [analyze_source_file(path, use_cache) for path in paths]
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def analyze_paths(paths, jobs: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, use_cache: bool = True):
+    """Runs CodeAnalyzer over many files, fanning out across processes.
+
+    Files are submitted in chunks so per-task pickling and scheduling overhead
+    is paid once per chunk rather than once per file. Returns a dict mapping
+    each path to its issue list, in the order of ``paths``. With ``use_cache``
+    unchanged files are served from the on-disk analysis cache.
+    """
+    paths = list(paths)
+    jobs = jobs or os.cpu_count() or 1
+
+    if jobs == 1 or len(paths) <= chunk_size:
+        results = _analyze_chunk(paths, use_cache)
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for chunk_results in pool.map(partial(_analyze_chunk, use_cache=use_cache), chunked(paths, chunk_size)):
+                results.extend(chunk_results)
+
+    return dict(results)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_analysis_pool(jobs: int = None):
+    """Long-lived process pool for servers, so requests don't pay for worker start-up."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1)
+        return _pool
+
+def shutdown_analysis_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def analyze_sources(sources, chunk_size: int = DEFAULT_CHUNK_SIZE, use_cache: bool = True, pool=None):
+    """Like analyze_paths, for ``(name, code)`` pairs that are already in memory.
+
+    Runs inline for a single chunk; otherwise chunks go to ``pool`` (the
+    shared analysis pool by default). Returns ``{name: issues}`` in input order.
+    """
+    sources = list(sources)
+    if len(sources) <= chunk_size:
+        return dict(_analyze_source_chunk(sources, use_cache))
+
+    pool = pool or get_analysis_pool()
+    results = []
+    for chunk_results in pool.map(partial(_analyze_source_chunk, use_cache=use_cache), chunked(sources, chunk_size)):
+        results.extend(chunk_results)
+    return dict(results)
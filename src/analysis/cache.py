@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from src.analysis.ast_analyzer import CodeAnalyzer
+from src.analysis.complexity import DEFAULT_COMPLEXITY_THRESHOLD
+from src.metrics import ANALYSIS_CACHE_TOTAL
+
+# Bump when analyzer output changes in a way the source fingerprint can't see
+ANALYZER_VERSION = "1"
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "AI_REVIEWER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai_code_reviewer")
+)
+DEFAULT_MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Modules whose source determines what analyze_code returns
+_ANALYZER_MODULES = ("ast_analyzer.py", "clones.py", "complexity.py", "dead_code.py", "engine.py", "loop_optimizer.py")
+
+_fingerprint = None
+
+def analyzer_fingerprint() -> str:
+    """Hash of the analyzer version, thresholds and analyzer source code.
+
+    Any edit to the analyzers or their thresholds changes the fingerprint, so
+    stale cache entries are simply never looked up again.
+    """
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "version": ANALYZER_VERSION,
+            "complexity_threshold": DEFAULT_COMPLEXITY_THRESHOLD,
+        }, sort_keys=True).encode())
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in _ANALYZER_MODULES:
+            with open(os.path.join(base_dir, name), "rb") as f:
+                digest.update(f.read())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+def content_key(code: str) -> str:
+    """Cache key for a source file: content hash + analyzer fingerprint."""
+    digest = hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+    return f"{digest}:{analyzer_fingerprint()}"
+
+class AnalysisCache:
+    """On-disk SQLite cache of deduplicated CodeAnalyzer issue lists.
+
+    Entries are evicted least-recently-used first once the stored payloads
+    exceed ``max_bytes``. Safe to share between threads and processes.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "analysis.sqlite3")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            " key TEXT PRIMARY KEY, issues TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analysis_last_used ON analysis (last_used)")
+        self._conn.commit()
+
+    def get(self, code: str):
+        """Returns the cached issue list for ``code``, or None on a miss."""
+        key = content_key(code)
+        with self._lock:
+            row = self._conn.execute("SELECT issues FROM analysis WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                ANALYSIS_CACHE_TOTAL.inc(result="miss")
+                return None
+            self.hits += 1
+            ANALYSIS_CACHE_TOTAL.inc(result="hit")
+            self._conn.execute("UPDATE analysis SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return [tuple(issue) for issue in json.loads(row[0])]
+
+    def put(self, code: str, issues):
+        payload = json.dumps([list(issue) for issue in issues], ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis (key, issues, size, last_used) VALUES (?, ?, ?, ?)",
+                (content_key(code), payload, len(payload), time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drops least-recently-used entries until the cache fits in max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM analysis").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        for key, size in self._conn.execute("SELECT key, size FROM analysis ORDER BY last_used").fetchall():
+            if excess <= 0:
+                break
+            self._conn.execute("DELETE FROM analysis WHERE key = ?", (key,))
+            excess -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis")
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+_default_cache = None
+_default_cache_pid = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache() -> AnalysisCache:
+    """Process-wide cache under DEFAULT_CACHE_DIR, opened on first use."""
+    global _default_cache, _default_cache_pid
+    with _default_cache_lock:
+        # SQLite connections must not cross a fork, so worker processes reopen
+        if _default_cache is None or _default_cache_pid != os.getpid():
+            _default_cache = AnalysisCache()
+            _default_cache_pid = os.getpid()
+        return _default_cache
+
+def set_default_cache(cache: AnalysisCache):
+    """Replaces the process-wide cache (e.g. with one in a temporary directory)."""
+    global _default_cache, _default_cache_pid
+    with _default_cache_lock:
+        _default_cache = cache
+        _default_cache_pid = os.getpid() if cache is not None else None
+
+def analyze_code_cached(code: str, cache: AnalysisCache = None):
+    """CodeAnalyzer.analyze_code, memoized on the content hash of ``code``."""
+    cache = cache or get_default_cache()
+    issues = cache.get(code)
+    if issues is None:
+        issues = CodeAnalyzer().analyze_code(code)
+        cache.put(code, issues)
+    return issues
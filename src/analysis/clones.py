@@ -0,0 +1,236 @@
+import ast
+import hashlib
+import json
+import os
+from collections import defaultdict
+from src.analysis.engine import Rule, run_rules
+
+# Functions smaller than this (in normalized AST nodes) are too generic to
+# be worth reporting: every ``return x`` would be a clone of every other
+MIN_CLONE_NODES = 20
+# Bump when the normalization changes, so persisted indexes are rebuilt
+CLONE_INDEX_VERSION = 2
+
+# Fields that don't affect what a function does
+IGNORED_FIELDS = ("ctx", "type_comment")
+# Deprecated aliases in the ast module; looking them up only raises warnings
+_DEPRECATED_NODES = {"Num", "Str", "Bytes", "NameConstant", "Ellipsis", "Index", "ExtSlice", "Suite", "Param",
+                     "AugLoad", "AugStore"}
+
+_FIELDS = {}  # node type -> fields that are tokenized
+
+class _Frame:
+    """Token stream of one function that is still being traversed."""
+
+    __slots__ = ("tokens", "names", "size")
+
+    def __init__(self, body_length):
+        self.tokens = [f"body[{body_length}"]
+        self.names = {}
+        self.size = 0
+
+class CloneRule(Rule):
+    """Fingerprints every function and reports structural duplicates within a file.
+
+    Each function's normalized token stream is collected during the engine's
+    single traversal: identifiers (names, arguments) become positional
+    placeholders in order of first use, so consistently renamed copies match
+    while ``a + b`` and ``a + a`` don't, and constants are reduced to their
+    type. The function's name, decorators, return annotation and docstring
+    are left out. A nested function contributes its finished hash to the
+    enclosing one, so every node is tokenized exactly once.
+
+    Functions are bucketed by hash, so finding duplicates is linear in the
+    number of functions. ``fingerprints`` holds ``(name, line, end_line,
+    hash, size)`` for each function large enough to count, which is what
+    ``CloneIndex`` stores across files.
+    """
+
+    name = "clones"
+
+    def __init__(self, min_nodes=MIN_CLONE_NODES):
+        super().__init__()
+        self.min_nodes = min_nodes
+        self.fingerprints = []
+        self._frames = []
+        self._skip = set()  # ids of nodes outside the hashed part of their function
+
+    def enter_FunctionDef(self, node):
+        body = node.body
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            self._skip.update((id(body[0]), id(body[0].value)))
+            body = body[1:]
+        for field in ("decorator_list", "returns", "type_params"):
+            value = getattr(node, field, None)
+            for root in value if isinstance(value, list) else [value] if value is not None else []:
+                self._skip.update(id(child) for child in ast.walk(root))
+        self._frames.append(_Frame(len(body)))
+
+    enter_AsyncFunctionDef = enter_FunctionDef
+
+    def leave_FunctionDef(self, node):
+        frame = self._frames.pop()
+        digest = hashlib.blake2b("\x1f".join(frame.tokens).encode(), digest_size=16).hexdigest()
+        if frame.size >= self.min_nodes:
+            self.fingerprints.append((node.name, node.lineno, node.end_lineno, digest, frame.size))
+        if self._frames:
+            parent = self._frames[-1]
+            parent.tokens.append(f"def:{digest}")
+            parent.size += frame.size
+
+    leave_AsyncFunctionDef = leave_FunctionDef
+
+    def tokenize_node(self, node):
+        """Appends one node (type and scalar fields; children follow) to the open function's stream."""
+        if not self._frames:
+            return
+        if self._skip and id(node) in self._skip:
+            self._skip.discard(id(node))
+            return
+        frame = self._frames[-1]
+        tokens = frame.tokens
+        node_type = type(node)
+        tokens.append(node_type.__name__)
+        frame.size += 1
+        fields = _FIELDS.get(node_type)
+        if fields is None:
+            fields = _FIELDS[node_type] = tuple(f for f in node_type._fields if f not in IGNORED_FIELDS)
+        for field in fields:
+            value = getattr(node, field, None)
+            if value is None:
+                tokens.append("None")
+            elif isinstance(value, list):
+                tokens.append(f"{field}[{len(value)}")
+                scalars = [item for item in value if not isinstance(item, ast.AST)]
+                if scalars:
+                    tokens.append(repr(scalars))
+            elif isinstance(value, ast.AST):
+                tokens.append(field)
+            elif field in ("id", "arg") and isinstance(value, str):
+                if value not in frame.names:
+                    frame.names[value] = f"v{len(frame.names)}"
+                tokens.append(frame.names[value])
+            elif isinstance(node, ast.Constant):
+                if field == "value":
+                    tokens.append(type(value).__name__)
+            else:
+                tokens.append(repr(value))
+
+    def finish(self):
+        # Inner functions finish first; report copies in source order
+        self.fingerprints.sort(key=lambda fingerprint: fingerprint[1])
+        first_seen = {}
+        for name, line, _, digest, _ in self.fingerprints:
+            if digest not in first_seen:
+                first_seen[digest] = (name, line)
+                continue
+            original, original_line = first_seen[digest]
+            self.issues.append(
+                (line, f"⚠️ Function '{name}' duplicates '{original}' (line {original_line}). "
+                       f"Consider reusing it.", "repeated_function")
+            )
+        return self.issues
+
+# Every other concrete node type goes through the same handler
+for _type_name in dir(ast):
+    if _type_name in _DEPRECATED_NODES or _type_name in ("FunctionDef", "AsyncFunctionDef"):
+        continue
+    _node_type = getattr(ast, _type_name)
+    if isinstance(_node_type, type) and issubclass(_node_type, ast.AST) and not issubclass(_node_type, ast.expr_context):
+        setattr(CloneRule, f"enter_{_type_name}", CloneRule.tokenize_node)
+
+def structural_hash(node: ast.FunctionDef):
+    """Returns (hash, size) of a function's normalized body."""
+    rule = CloneRule(min_nodes=0)
+    run_rules(node, [rule])
+    _, _, _, digest, size = rule.fingerprints[-1]  # The outermost function finishes last
+    return digest, size
+
+def function_fingerprints(tree, min_nodes=MIN_CLONE_NODES):
+    """Fingerprints of all functions in ``tree``, in source order."""
+    rule = CloneRule(min_nodes)
+    run_rules(tree, [rule])
+    rule.finish()
+    return rule.fingerprints
+
+class CloneIndex:
+    """Project-wide index of function fingerprints, persistable as JSON.
+
+    Each file's fingerprints are stored with the hash of its content, so
+    ``update`` only re-parses files that changed since the index was saved.
+    A CI job can keep the index between runs and pay only for the diff.
+    """
+
+    def __init__(self, min_nodes=MIN_CLONE_NODES):
+        self.min_nodes = min_nodes
+        self.files = {}  # path -> {"digest": ..., "functions": [[name, line, end_line, hash, size], ...]}
+        self.parsed = 0  # Files (re-)parsed since the index was created or loaded
+
+    def update(self, path: str, code: str) -> bool:
+        """Indexes ``code`` as the content of ``path``. Returns False if it was unchanged."""
+        digest = hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+        entry = self.files.get(path)
+        if entry is not None and entry["digest"] == digest:
+            return False
+        try:
+            functions = function_fingerprints(ast.parse(code), self.min_nodes)
+        except (SyntaxError, ValueError):
+            functions = []
+        self.files[path] = {"digest": digest, "functions": [list(f) for f in functions]}
+        self.parsed += 1
+        return True
+
+    def update_paths(self, paths):
+        """Indexes files from disk and drops those no longer in ``paths``."""
+        paths = list(paths)
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    code = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+            self.update(path, code)
+        self.retain(paths)
+
+    def retain(self, paths):
+        """Forgets every file not in ``paths`` (deleted or now ignored)."""
+        keep = set(paths)
+        for path in [path for path in self.files if path not in keep]:
+            del self.files[path]
+
+    def clone_groups(self):
+        """Lists of ``(path, name, line, end_line)`` sharing one structure, largest first."""
+        buckets = defaultdict(list)
+        sizes = {}
+        for path in sorted(self.files):
+            for name, line, end_line, digest, size in self.files[path]["functions"]:
+                buckets[digest].append((path, name, line, end_line))
+                sizes[digest] = size
+        groups = [(digest, members) for digest, members in buckets.items() if len(members) > 1]
+        groups.sort(key=lambda group: (-sizes[group[0]] * len(group[1]), group[1][0]))
+        return [members for _, members in groups]
+
+    def to_dict(self) -> dict:
+        return {"version": CLONE_INDEX_VERSION, "min_nodes": self.min_nodes, "files": self.files}
+
+    def save(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, min_nodes=MIN_CLONE_NODES) -> "CloneIndex":
+        """Opens a saved index; a missing, stale or unreadable one starts empty."""
+        index = cls(min_nodes)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if data.get("version") == CLONE_INDEX_VERSION and data.get("min_nodes") == min_nodes:
+            index.files = data.get("files", {})
+        return index
@@ -1,4 +1,5 @@
 import ast
+from src.analysis.engine import Rule, run_rules
 
 DEFAULT_COMPLEXITY_THRESHOLD = 10  # Allow configurable threshold
 
@@ -37,7 +38,53 @@ class CyclomaticComplexityAnalyzer(ast.NodeVisitor):
         self.visit(tree)
         return self.issues
 
+class ComplexityRule(Rule):
+    """Single-pass version of CyclomaticComplexityAnalyzer for the fused engine.
+
+    Like the visitor, only functions that are not nested inside another
+    function are reported, and decision points of nested functions count
+    towards their enclosing function.
+    """
+
+    name = "complexity"
+
+    def __init__(self, threshold=DEFAULT_COMPLEXITY_THRESHOLD):
+        super().__init__()
+        self.complexities = {}
+        self.threshold = threshold
+        self._function = None
+        self._complexity = 0
+
+    def enter_FunctionDef(self, node):
+        if self._function is None:
+            self._function = node
+            self._complexity = 1  # Base complexity
+
+    enter_AsyncFunctionDef = enter_FunctionDef
+
+    def leave_FunctionDef(self, node):
+        if node is not self._function:
+            return
+
+        complexity = self._complexity
+        self.complexities[node.name] = (node.lineno, complexity)
+        if complexity > self.threshold:
+            self.issues.append(
+                (node.lineno, f"⚠️ Function '{node.name}' has high cyclomatic complexity ({complexity}). Consider refactoring.")
+            )
+        self._function = None
+
+    leave_AsyncFunctionDef = leave_FunctionDef
+
+    def count_decision_point(self, node):
+        if self._function is not None:
+            self._complexity += 1
+
+    enter_If = enter_For = enter_While = enter_And = enter_Or = count_decision_point
+    enter_ExceptHandler = enter_With = enter_Assert = enter_Try = count_decision_point
+
 def analyze_cyclomatic_complexity(tree, threshold=DEFAULT_COMPLEXITY_THRESHOLD):
     """Runs cyclomatic complexity analysis with a configurable threshold."""
-    analyzer = CyclomaticComplexityAnalyzer(threshold)
-    return analyzer.analyze(tree)
+    rule = ComplexityRule(threshold)
+    run_rules(tree, [rule])
+    return rule.finish()
@@ -1,4 +1,5 @@
 import ast
+from src.analysis.engine import Rule, run_rules
 
 class DeadCodeAnalyzer(ast.NodeVisitor):
     def __init__(self):
@@ -25,7 +26,19 @@ class DeadCodeAnalyzer(ast.NodeVisitor):
         self.visit(tree)
         return self.issues
 
+class DeadCodeRule(Rule):
+    """Single-pass version of DeadCodeAnalyzer for the fused engine."""
+
+    name = "dead_code"
+
+    detect_unreachable_code = DeadCodeAnalyzer.detect_unreachable_code
+
+    def enter_FunctionDef(self, node):
+        """Detects dead code inside functions."""
+        self.detect_unreachable_code(node)
+
 def detect_dead_code(tree):
     """Runs dead code analysis on the AST."""
-    analyzer = DeadCodeAnalyzer()
-    return analyzer.analyze(tree)
+    rule = DeadCodeRule()
+    run_rules(tree, [rule])
+    return rule.finish()
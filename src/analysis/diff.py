@@ -0,0 +1,129 @@
+import ast
+import bisect
+import os
+import re
+import subprocess
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+def _diff_path(header: str):
+    """Extracts the file path from a '+++ b/path' header line."""
+    path = header[4:].split("\t")[0].strip()
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+def parse_unified_diff(diff_text: str) -> dict:
+    """Maps each file in a unified diff to its changed line numbers (new side).
+
+    Added lines are reported as-is. A pure deletion is reported as the line
+    that now sits where the removed lines were, so the code around a removal
+    still counts as changed. Deleted files are skipped.
+    """
+    changed = {}
+    current = None
+    new_line = 0
+
+    for raw in diff_text.splitlines():
+        if raw.startswith("+++ "):
+            path = _diff_path(raw)
+            current = changed.setdefault(path, set()) if path else None
+            continue
+        if raw.startswith("--- ") or current is None:
+            continue
+
+        match = _HUNK_HEADER.match(raw)
+        if match:
+            new_line = int(match.group(1))
+            continue
+
+        if raw.startswith("+"):
+            current.add(new_line)
+            new_line += 1
+        elif raw.startswith("-"):
+            current.add(max(new_line, 1))
+        elif raw.startswith("\\"):
+            continue  # "\ No newline at end of file"
+        else:
+            new_line += 1
+
+    return changed
+
+def git_diff(rev_range: str, cwd: str = None) -> str:
+    """Returns ``git diff`` output for a revision range, e.g. 'main...HEAD'."""
+    result = subprocess.run(
+        ["git", "diff", "--unified=0", "--no-color", rev_range, "--", "*.py"],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    return result.stdout
+
+def git_toplevel(cwd: str = None) -> str:
+    result = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel"], cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    return result.stdout.strip()
+
+def changed_lines_for(changed: dict, path: str):
+    """Looks up a file's changed lines, matching on the path suffix.
+
+    Diff paths are relative to the repository root while callers may pass
+    absolute paths or bare upload names. Returns None if the file isn't in
+    the diff.
+    """
+    path = path.replace(os.sep, "/")
+    best = None
+    for diff_path, lines in changed.items():
+        if path == diff_path or path.endswith("/" + diff_path) or diff_path.endswith("/" + path):
+            if best is None or len(diff_path) > len(best[0]):
+                best = (diff_path, lines)
+    return best[1] if best else None
+
+def changed_regions(code: str, changed_lines) -> list:
+    """Widens changed lines to the top-level statements that contain them.
+
+    A change inside a function or class selects the whole definition
+    (decorators included), since that is the unit the analyzers and the model
+    reason about. Returns sorted, merged (start, end) line ranges.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return [(line, line) for line in sorted(changed_lines)]
+
+    spans = []
+    for node in tree.body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        spans.append((start, node.end_lineno))
+
+    starts = [start for start, _ in spans]
+    regions = []
+    for line in sorted(changed_lines):
+        i = bisect.bisect_right(starts, line) - 1
+        if i >= 0 and spans[i][1] >= line:
+            regions.append(spans[i])
+        else:
+            regions.append((line, line))
+
+    merged = []
+    for start, end in sorted(regions):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def filter_issues(issues, regions):
+    """Keeps the (line, desc[, tag]) issues that fall inside the changed regions.
+
+    Line-0 issues (e.g. parse errors) are always kept.
+    """
+    return [
+        issue for issue in issues
+        if issue[0] == 0 or any(start <= issue[0] <= end for start, end in regions)
+    ]
+
+def issues_in_diff(code: str, issues, changed_lines):
+    """Shortcut for filter_issues(issues, changed_regions(code, changed_lines))."""
+    return filter_issues(issues, changed_regions(code, changed_lines))
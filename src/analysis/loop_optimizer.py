@@ -1,4 +1,5 @@
 import ast
+from src.analysis.engine import Rule, run_rules
 
 class LoopOptimizer(ast.NodeVisitor):
     """Detects inefficient loop structures in Python code."""
@@ -45,8 +46,63 @@ class LoopOptimizer(ast.NodeVisitor):
                     (child.lineno, "⚠️ Nested loop detected: Consider optimizing.")
                 )
 
+class LoopRule(Rule):
+    """Single-pass version of LoopOptimizer for the fused engine.
+
+    Instead of walking every for-loop body again to look for list mutations,
+    the rule counts mutating calls as the engine passes them and compares the
+    count when the loop is left. A slot is reserved for the warning when the
+    loop is entered so issues come out in the same order as the visitor's.
+    """
+
+    name = "loops"
+
+    MUTATING_METHODS = ("append", "remove", "pop")
+
+    check_unnecessary_range = LoopOptimizer.check_unnecessary_range
+    check_nested_loops = LoopOptimizer.check_nested_loops
+
+    def __init__(self):
+        super().__init__()
+        self._mutating_calls = 0
+        self._open_loops = []  # (loop node, reserved slot, calls seen on entry)
+
+    def enter_For(self, node):
+        self.check_unnecessary_range(node)
+        if isinstance(node.iter, ast.Name):
+            slot = []
+            self.issues.append(slot)
+            self._open_loops.append((node, slot, self._mutating_calls))
+        self.check_nested_loops(node)
+
+    def leave_For(self, node):
+        if self._open_loops and self._open_loops[-1][0] is node:
+            _, slot, calls_on_entry = self._open_loops.pop()
+            # The visitor reports once per mutating call in the loop
+            slot.extend(
+                [(node.lineno, "⚠️ Modifying list while iterating. Consider using a copy or list comprehension.")]
+                * (self._mutating_calls - calls_on_entry)
+            )
+
+    def enter_While(self, node):
+        self.check_nested_loops(node)
+
+    def enter_Call(self, node):
+        if isinstance(node.func, ast.Attribute) and node.func.attr in self.MUTATING_METHODS:
+            self._mutating_calls += 1
+
+    def finish(self):
+        flat = []
+        for issue in self.issues:
+            if isinstance(issue, list):
+                flat.extend(issue)
+            else:
+                flat.append(issue)
+        self.issues = flat
+        return flat
+
 def analyze_loops(tree):
     """Runs loop optimization analysis on the AST."""
-    analyzer = LoopOptimizer()
-    analyzer.visit(tree)
-    return analyzer.issues
+    rule = LoopRule()
+    run_rules(tree, [rule])
+    return rule.finish()
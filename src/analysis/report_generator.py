@@ -1,6 +1,15 @@
+import io
+import json
 import os
 import re
-from typing import List, Dict
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Union
+from src.metrics import span
+
+REPORT_FORMATS = ("md", "json", "sarif")
+WRITE_BUFFER_SIZE = 1024 * 1024
+TOOL_NAME = "ai-code-reviewer"
 
 # 🧼 Normalize issue descriptions by removing trailing [tags]
 def normalize_description(desc: str) -> str:
@@ -13,48 +22,225 @@ def format_fix(fix: str) -> str:
         return f"```python\n{fix}\n```"
     return fix
 
+# 🔁 Accept analyzer tuples as well as result dicts
+def issue_to_dict(issue: Union[Dict, tuple]) -> Dict:
+    """Normalizes a (line, desc[, tag]) tuple or a result dict to a result dict."""
+    if isinstance(issue, dict):
+        return issue
+    return {
+        "line": issue[0],
+        "issue": issue[1],
+        "issue_type": issue[2] if len(issue) >= 3 else None,
+    }
+
+def markdown_issue(issue: Union[Dict, tuple]) -> str:
+    """Markdown for one issue and its suggested fix."""
+    issue = issue_to_dict(issue)
+    line = issue.get("line", "?")
+    raw_desc = issue.get("issue", "No issue description.")
+    description = normalize_description(raw_desc)
+    fix = format_fix(issue.get("fix") or "No fix available.")
+    issue_type = issue.get("issue_type", None)
+
+    text = f"- **Line {line}:** {description}\n"
+    if issue_type:
+        text += f"  _(Type: {issue_type})_\n"
+    return text + f"\n  **Suggested Fix:**\n\n{fix}\n\n"
+
+def markdown_section(file_name: str, issues: Iterable) -> str:
+    """Markdown for one file's section of the report."""
+    header = f"\n---\n\n### 📝 Code Review for `{file_name}`\n\n"
+    body = "".join(markdown_issue(issue) for issue in issues)
+    return header + (body or "✅ No issues found.\n")
+
 def save_report(file_name: str, issues: List[Dict], report_dir: str = "reports"):
-    """Save full Markdown report for a file with all issues."""
+    """Append a Markdown section for one file to the shared report.
+
+    Kept for compatibility; ReportWriter produces per-run files instead.
+    """
     os.makedirs(report_dir, exist_ok=True)
     report_path = os.path.join(report_dir, "code_review_report.md")
 
-    with open(report_path, "a") as report:
-        report.write(f"\n---\n\n### 📝 Code Review for `{file_name}`\n\n")
-
-        if issues:
-            for issue in issues:
-                line = issue.get("line", "?")
-                raw_desc = issue.get("issue", "No issue description.")
-                description = normalize_description(raw_desc)
-                fix = format_fix(issue.get("fix", "No fix available."))
-                issue_type = issue.get("issue_type", None)
-
-                report.write(f"- **Line {line}:** {description}\n")
-                if issue_type:
-                    report.write(f"  _(Type: {issue_type})_\n")
-                report.write(f"\n  **Suggested Fix:**\n\n{fix}\n\n")
-        else:
-            report.write("✅ No issues found.\n")
-
-def save_individual_issues(file_name: str, issues: List[Dict], report_dir: str = "reports/issues"):
-    """Create a separate Markdown file for each issue."""
-    os.makedirs(report_dir, exist_ok=True)
+    # One write per call keeps sections from interleaving
+    section = markdown_section(file_name, issues)
+    with open(report_path, "a", encoding="utf-8") as report:
+        report.write(section)
+
+def rule_id(issue: Dict) -> str:
+    """Stable rule identifier for SARIF, derived from the tag or description."""
+    if issue.get("issue_type"):
+        return issue["issue_type"]
+    desc = (issue.get("issue") or "").lower()
+    for needle, rule in (
+        ("cyclomatic complexity", "high_complexity"),
+        ("unreachable code", "unreachable_code"),
+        ("range(len", "inefficient_loop"),
+        ("nested loop", "nested_loop"),
+        ("modifying list", "modifying_list_while_iterating"),
+        ("error parsing", "parse_error"),
+    ):
+        if needle in desc:
+            return rule
+    return "code_review"
+
+def new_run_id() -> str:
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+class _MarkdownSink:
+    def __init__(self, f, run_id):
+        self.f = f
+        self.f.write(f"# 🧠 AI Code Review Report\n\n_Run `{run_id}`_\n")
+
+    def begin_file(self, file_name):
+        self.f.write(f"\n---\n\n### 📝 Code Review for `{file_name}`\n\n")
+        self.count = 0
+
+    def add_issue(self, issue):
+        self.f.write(markdown_issue(issue))
+        self.count += 1
+
+    def end_file(self):
+        if not self.count:
+            self.f.write("✅ No issues found.\n")
+
+    def close(self):
+        pass
+
+class _JsonSink:
+    """Writes {"run_id", "files": [{"file", "issues": [...]}]} incrementally."""
+
+    def __init__(self, f, run_id):
+        self.f = f
+        self.f.write(f'{{"run_id": {json.dumps(run_id)}, "tool": {json.dumps(TOOL_NAME)}, "files": [')
+        self.files = 0
+
+    def begin_file(self, file_name):
+        self.f.write(("," if self.files else "") + f'\n{{"file": {json.dumps(file_name)}, "issues": [')
+        self.files += 1
+        self.count = 0
+
+    def add_issue(self, issue):
+        self.f.write(("," if self.count else "") + "\n" + json.dumps(issue, ensure_ascii=False))
+        self.count += 1
+
+    def end_file(self):
+        self.f.write("]}")
+
+    def close(self):
+        self.f.write("\n]}\n")
+
+class _SarifSink:
+    """Streams a SARIF 2.1.0 log; the tool's rule list is written last."""
+
+    def __init__(self, f, run_id):
+        self.f = f
+        self.f.write(
+            '{"$schema": "https://json.schemastore.org/sarif-2.1.0.json", "version": "2.1.0", "runs": [{'
+            f'"automationDetails": {{"id": {json.dumps(run_id)}}}, "results": ['
+        )
+        self.results = 0
+        self.rules = set()
+
+    def begin_file(self, file_name):
+        self.uri = file_name.replace(os.sep, "/")
+
+    def add_issue(self, issue):
+        rule = rule_id(issue)
+        self.rules.add(rule)
+        line = issue.get("line")
+        result = {
+            "ruleId": rule,
+            "level": "error" if rule == "parse_error" else "warning",
+            "message": {"text": normalize_description(issue.get("issue", ""))},
+            "locations": [{"physicalLocation": {
+                "artifactLocation": {"uri": self.uri},
+                "region": {"startLine": line if isinstance(line, int) and line > 0 else 1},
+            }}],
+        }
+        if issue.get("fix"):
+            result["properties"] = {"suggestedFix": issue["fix"]}
+        self.f.write(("," if self.results else "") + "\n" + json.dumps(result, ensure_ascii=False))
+        self.results += 1
+
+    def end_file(self):
+        pass
+
+    def close(self):
+        driver = {"name": TOOL_NAME, "rules": [{"id": rule} for rule in sorted(self.rules)]}
+        self.f.write(f'\n], "tool": {{"driver": {json.dumps(driver)}}}}}]}}\n')
+
+_SINKS = {"md": ("code_review_report.md", _MarkdownSink),
+          "json": ("code_review_report.json", _JsonSink),
+          "sarif": ("code_review_report.sarif", _SarifSink)}
+
+class ReportWriter:
+    """Writes one run's report to its own directory in several formats.
+
+    Each run (CLI invocation or API request) gets ``<report_dir>/<run_id>/``,
+    so concurrent runs never share a file. Output is streamed through large
+    write buffers: issues are written as they are added and never held in
+    memory, which keeps multi-thousand-file runs flat in memory.
+
+        with ReportWriter(formats=("md", "sarif")) as report:
+            report.write_file("a.py", issues)
+
+    With ``report_dir=None`` nothing touches the disk: the rendered reports
+    are available as ``contents`` (format -> text) once the writer is closed.
+    """
+
+    def __init__(self, report_dir: Optional[str] = "reports", formats=REPORT_FORMATS, run_id: str = None):
+        unknown = set(formats) - set(_SINKS)
+        if unknown:
+            raise ValueError(f"Unknown report format(s): {', '.join(sorted(unknown))}")
+
+        self.run_id = run_id or new_run_id()
+        self.run_dir = os.path.join(report_dir, self.run_id) if report_dir is not None else None
+        if self.run_dir:
+            os.makedirs(self.run_dir, exist_ok=True)
+
+        self.paths = {}
+        self.contents = {}
+        self._files = {}
+        self._sinks = []
+        for fmt in formats:
+            file_name, sink_cls = _SINKS[fmt]
+            if self.run_dir:
+                self.paths[fmt] = os.path.join(self.run_dir, file_name)
+                f = open(self.paths[fmt], "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+            else:
+                f = io.StringIO()
+            self._files[fmt] = f
+            self._sinks.append(sink_cls(f, self.run_id))
+
+    def write_file(self, file_name: str, issues: Iterable):
+        """Adds one reviewed file; ``issues`` may be any iterable of tuples or dicts."""
+        for sink in self._sinks:
+            sink.begin_file(file_name)
+        for issue in issues:
+            issue = issue_to_dict(issue)
+            for sink in self._sinks:
+                sink.add_issue(issue)
+        for sink in self._sinks:
+            sink.end_file()
+
+    def close(self):
+        for sink in self._sinks:
+            sink.close()
+        for fmt, f in self._files.items():
+            if isinstance(f, io.StringIO):
+                self.contents[fmt] = f.getvalue()
+            f.close()
+        self._sinks = []
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
-    for idx, issue in enumerate(issues):
-        line = issue.get("line", "?")
-        raw_desc = issue.get("issue", "No issue description.")
-        description = normalize_description(raw_desc)
-        fix = format_fix(issue.get("fix", "No fix available."))
-        issue_type = issue.get("issue_type", None)
-
-        base_name = os.path.splitext(os.path.basename(file_name))[0]
-        out_path = os.path.join(report_dir, f"{base_name}_issue_{idx + 1}.md")
-
-        with open(out_path, "w") as f:
-            f.write(f"# 🧠 AI Code Review Suggestion\n\n")
-            f.write(f"- **Filename:** `{file_name}`\n")
-            f.write(f"- **Line:** {line}\n")
-            f.write(f"- **Issue:** {description}\n")
-            if issue_type:
-                f.write(f"- **Type:** `{issue_type}`\n")
-            f.write(f"\n## 🔧 Suggested Fix\n\n{fix}\n")
+def write_report(file_name: str, issues: Iterable, report_dir: str = "reports", formats=REPORT_FORMATS) -> Dict:
+    """Writes a single-file run and returns the paths of the generated reports."""
+    with span("report_write"), ReportWriter(report_dir, formats) as report:
+        report.write_file(file_name, issues)
+    return report.paths
@@ -0,0 +1,189 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from src.analysis.batch import DEFAULT_IGNORE, discover_python_files, is_ignored
+
+DEFAULT_DEBOUNCE_SECONDS = 0.2
+DEFAULT_POLL_INTERVAL = 0.5
+
+# inotify(7) constants
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+class PollingWatcher:
+    """Finds changed .py files by comparing (mtime, size) snapshots.
+
+    Works everywhere, at the cost of walking the tree every ``interval``
+    seconds; used when inotify isn't available.
+    """
+
+    def __init__(self, root: str, ignore=(), interval: float = DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.ignore = tuple(ignore)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for path in discover_python_files(self.root, self.ignore):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: float = None):
+        """Returns the paths created, modified or deleted since the last call."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {path for path in current.keys() | self._snapshot.keys()
+                       if current.get(path) != self._snapshot.get(path)}
+            self._snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval if deadline is None else min(self.interval, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Linux inotify watcher: the kernel reports changes, so idle trees cost nothing.
+
+    Every non-ignored directory under ``root`` is watched, and directories
+    created later are added as they appear. Editors that save by writing a
+    temporary file and renaming it are seen through ``IN_MOVED_TO``.
+    """
+
+    def __init__(self, root: str, ignore=()):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.patterns = tuple(DEFAULT_IGNORE) + tuple(ignore)
+        self.single_file = os.path.abspath(root) if os.path.isfile(root) else None
+        self.root = os.path.dirname(self.single_file) if self.single_file else os.path.abspath(root)
+        self._dirs = {}  # watch descriptor -> directory
+        try:
+            self._watch_tree(self.root)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _add_watch(self, directory: str):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def _watch_tree(self, top: str):
+        self._add_watch(top)
+        if self.single_file:
+            return
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not self._ignored(os.path.join(dirpath, d))]
+            for d in dirnames:
+                self._add_watch(os.path.join(dirpath, d))
+
+    def _ignored(self, path: str) -> bool:
+        return is_ignored(os.path.relpath(path, self.root), self.patterns)
+
+    def _wanted(self, path: str) -> bool:
+        if self.single_file:
+            return path == self.single_file
+        return path.endswith(".py") and not self._ignored(path)
+
+    def _read_events(self):
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.single_file and not self._ignored(path):
+                    try:
+                        self._watch_tree(path)
+                    except OSError:
+                        continue
+                    # Files may have been written before the watch existed
+                    changed.update(p for p in discover_python_files(path, self.patterns) if self._wanted(p))
+                continue
+            if self._wanted(path):
+                changed.add(path)
+        return changed
+
+    def poll(self, timeout: float = None):
+        """Returns the paths created, modified or deleted since the last call."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+def make_watcher(root: str, ignore=(), polling: bool = False):
+    """inotify where available, otherwise (or with ``polling``) a polling watcher."""
+    if not polling:
+        try:
+            return InotifyWatcher(root, ignore)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, ignore)
+
+def wait_for_changes(watcher, debounce: float = DEFAULT_DEBOUNCE_SECONDS, timeout: float = None):
+    """Blocks until files change, then keeps collecting until ``debounce`` seconds pass quietly.
+
+    A burst of saves (format-on-save, "save all", a git checkout) becomes a
+    single batch. Returns the set of changed paths (empty on ``timeout``).
+    """
+    changed = watcher.poll(timeout)
+    while changed:
+        more = watcher.poll(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from src.analysis.ast_analyzer import CodeAnalyzer
+from src.analysis.cache import DEFAULT_CACHE_DIR, analyze_code_cached
+from src.llm.llm_fixer import get_ai_fixes_local, warm_up
+
+DEFAULT_SOCKET_PATH = os.environ.get("AI_REVIEWER_SOCKET", os.path.join(DEFAULT_CACHE_DIR, "daemon.sock"))
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+CONNECT_TIMEOUT = 0.5
+
+# Frames are a 4-byte big-endian length followed by that many bytes of UTF-8 JSON
+FRAME_HEADER = struct.Struct(">I")
+
+class ProtocolError(Exception):
+    """A peer sent a malformed or oversized frame."""
+
+class DaemonError(RuntimeError):
+    """The daemon answered a request with an error."""
+
+def _recv_exact(sock, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            if data:
+                raise ProtocolError("Connection closed mid-frame")
+            return None
+        data += chunk
+    return bytes(data)
+
+def send_frame(sock, message: dict):
+    payload = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+def recv_frame(sock):
+    """Reads one message, or returns None if the peer closed the connection."""
+    header = _recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    (size,) = FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {size} bytes exceeds {MAX_FRAME_BYTES}")
+    payload = _recv_exact(sock, size)
+    if payload is None:
+        raise ProtocolError("Connection closed mid-frame")
+    try:
+        return json.loads(payload.decode("utf-8"))
+    except ValueError as e:
+        raise ProtocolError(f"Invalid frame: {e}")
+
+def review(code: str, fixes: bool = True, use_cache: bool = True):
+    """The work behind an ``analyze`` request: issues and, optionally, their fixes."""
+    issues = analyze_code_cached(code) if use_cache else CodeAnalyzer().analyze_code(code)
+    return issues, get_ai_fixes_local(code, issues) if fixes else [None] * len(issues)
+
+def handle_request(request: dict) -> dict:
+    op = request.get("op")
+    if op == "ping":
+        return {"ok": True, "pid": os.getpid()}
+    if op == "analyze":
+        issues, fixes = review(request["code"], request.get("fixes", True), request.get("use_cache", True))
+        return {"ok": True, "issues": [list(issue) for issue in issues], "fixes": fixes}
+    return {"ok": False, "error": f"Unknown op {op!r}"}
+
+class DaemonHandler(socketserver.BaseRequestHandler):
+    """Serves framed requests on one connection until the client hangs up."""
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_frame(self.request)
+            except (ProtocolError, OSError) as e:
+                logging.warning(f"[daemon] Dropping connection: {e}")
+                return
+            if request is None:
+                return
+            if request.get("op") == "shutdown":
+                send_frame(self.request, {"ok": True})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            try:
+                response = handle_request(request)
+            except Exception as e:
+                logging.exception("[daemon] Request failed")
+                response = {"ok": False, "error": str(e)}
+            send_frame(self.request, response)
+
+class ReviewDaemon(socketserver.ThreadingUnixStreamServer):
+    """Unix-socket server that keeps the model, caches and analyzers loaded.
+
+    Each connection gets a thread; their model calls meet in the shared
+    micro-batching scheduler, so concurrent clients share batches.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.socket_path = socket_path
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        if os.path.exists(socket_path):
+            if ping(socket_path):
+                raise RuntimeError(f"A daemon is already listening on {socket_path}")
+            os.unlink(socket_path)  # Left behind by a daemon that didn't exit cleanly
+        # Create the socket owner-only from the start rather than chmod it after bind
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, DaemonHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH, load_model: bool = True):
+    """Runs the daemon in the foreground until it is stopped."""
+    if load_model:
+        warm_up()
+    with ReviewDaemon(socket_path) as server:
+        logging.info(f"[daemon] Listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+class DaemonClient:
+    """Connection to a running daemon; use as a context manager."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.settimeout(CONNECT_TIMEOUT)
+            self.sock.connect(socket_path)
+            self.sock.settimeout(None)  # Generation can take a while
+        except OSError:
+            self.sock.close()
+            raise
+
+    def request(self, message: dict) -> dict:
+        send_frame(self.sock, message)
+        response = recv_frame(self.sock)
+        if response is None:
+            raise ProtocolError("Daemon closed the connection")
+        return response
+
+    def analyze(self, code: str, fixes: bool = True, use_cache: bool = True):
+        """Returns ``(issues, fixes)`` like ``review``, computed by the daemon."""
+        response = self.request({"op": "analyze", "code": code, "fixes": fixes, "use_cache": use_cache})
+        if not response.get("ok"):
+            raise DaemonError(response.get("error", "Daemon request failed"))
+        return [tuple(issue) for issue in response["issues"]], response["fixes"]
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def ping(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+    try:
+        with DaemonClient(socket_path) as client:
+            return client.request({"op": "ping"}).get("ok", False)
+    except (OSError, ProtocolError):
+        return False
+
+def stop(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+    """Asks a running daemon to exit. Returns False if none was running."""
+    try:
+        with DaemonClient(socket_path) as client:
+            return client.request({"op": "shutdown"}).get("ok", False)
+    except (OSError, ProtocolError):
+        return False
+
+def review_via_daemon(code: str, fixes: bool = True, use_cache: bool = True, socket_path: str = DEFAULT_SOCKET_PATH):
+    """Reviews through the daemon if one is running, otherwise in this process."""
+    if hasattr(socket, "AF_UNIX") and os.path.exists(socket_path):
+        try:
+            with DaemonClient(socket_path) as client:
+                return client.analyze(code, fixes, use_cache)
+        except (OSError, ProtocolError, DaemonError) as e:
+            logging.info(f"[daemon] Falling back to in-process review: {e}")
+    return review(code, fixes, use_cache)
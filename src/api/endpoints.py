@@ -1,12 +1,32 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from src.analysis.ast_analyzer import CodeAnalyzer
-from src.llm.llm_fixer import get_ai_fix_local
-from src.analysis.report_generator import save_report
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from src.analysis.batch import analyze_sources
+from src.analysis.cache import analyze_code_cached
+from src.analysis.diff import changed_lines_for, issues_in_diff, parse_unified_diff
+from src.api.inference import InferenceOverloaded, inference_gate
+from src.api.uploads import UploadRejected, collect_sources
+from src.llm.llm_fixer import get_ai_fixes_local, rule_based_fix
+from src.analysis.report_generator import ReportWriter
+from src.metrics import span
+import os
+import asyncio
+import logging
+import json
 import time
 import re
 
 router = APIRouter()
 
+# Reports rendered into each response; nothing is kept on disk. JSON and
+# SARIF ("md,json,sarif") repeat the issues already in the response, so
+# only Markdown is embedded unless asked for.
+REPORT_FORMATS = tuple(f for f in os.environ.get("AI_REVIEWER_REPORT_FORMATS", "md").split(",") if f)
+# Most model-generated fixes one /analyze/files request may ask for
+MAX_FIXES_PER_REQUEST = int(os.environ.get("AI_REVIEWER_MAX_FIXES_PER_REQUEST", "200"))
+
 # ✅ Normalize description by removing tags like [unused_variable]
 def normalize_description(desc: str):
     return re.sub(r"\[.*?\]$", "", desc.strip())
@@ -21,20 +41,8 @@ async def health_check():
     return {"status": "ok"}
 
 
-@router.post("/analyze/file")
-async def analyze_file(file: UploadFile = File(...)):
-    """Upload a Python file & analyze it."""
-    if not file.filename.endswith(".py"):
-        raise HTTPException(status_code=400, detail="Only Python (.py) files are allowed.")
-
-    content = await file.read()
-    code = content.decode("utf-8")
-    lines = code.splitlines()
-
-    analyzer = CodeAnalyzer()
-    raw_issues = analyzer.analyze_code(code)
-
-    # ✅ Final deduplication using (line, normalized desc or tag)
+def dedupe_issues(raw_issues):
+    """Final deduplication using (line, normalized desc or tag)."""
     seen = set()
     issues = []
     for issue in raw_issues:
@@ -48,37 +56,266 @@ async def analyze_file(file: UploadFile = File(...)):
         if key not in seen:
             seen.add(key)
             issues.append((line, desc, tag) if tag else (line, desc))
+    return issues
 
-    results = []
 
-    for issue in issues:
-        if len(issue) == 3:
-            line, desc, issue_type = issue
-        elif len(issue) == 2:
-            line, desc = issue
-            issue_type = None
-        else:
-            continue  # skip malformed
+def issue_result(issue, lines, fix=None):
+    """JSON shape of one issue, with a short code preview around its line."""
+    line, desc = issue[0], issue[1]
+    issue_type = issue[2] if len(issue) == 3 else None
+
+    preview_start = max(line - 2, 0)
+    preview_end = min(line + 1, len(lines))
+    code_preview = "\n".join(lines[preview_start:preview_end])
+
+    return {
+        "line": line,
+        "issue": desc,
+        "fix": fix,
+        "preview": code_preview,
+        "issue_type": issue_type
+    }
+
+
+def render_reports(results):
+    """Renders ``[{"filename", "issues"}, ...]`` in memory; returns format -> report text."""
+    with span("report_write"), ReportWriter(None, REPORT_FORMATS) as report:
+        for result in results:
+            report.write_file(result["filename"], result["issues"])
+    return report.contents
+
+
+def restrict_to_diff(code: str, filename: str, issues, diff: str = None):
+    """With a unified diff, keeps only issues in the definitions it touches."""
+    if not diff:
+        return issues
+    changed_lines = changed_lines_for(parse_unified_diff(diff), filename)
+    if changed_lines is None:
+        return []  # File isn't part of the change
+    return issues_in_diff(code, issues, changed_lines)
+
+
+async def read_python_upload(file: UploadFile):
+    if not file.filename.endswith(".py"):
+        raise HTTPException(status_code=400, detail="Only Python (.py) files are allowed.")
+
+    content = await file.read()
+    return content.decode("utf-8")
+
+
+@router.post("/analyze/file")
+async def analyze_file(file: UploadFile = File(...), diff: str = Form(None)):
+    """Upload a Python file & analyze it.
+
+    Pass a unified ``diff`` to review (and generate fixes for) only the
+    functions and classes it changes.
+    """
+    code = await read_python_upload(file)
+    lines = code.splitlines()
+
+    raw_issues = await run_in_threadpool(analyze_code_cached, code)
+    issues = restrict_to_diff(code, file.filename, dedupe_issues(raw_issues), diff)
+
+    # ✅ Generate on the inference pool so the event loop stays responsive;
+    # rule-based fixes alone never queue behind model work
+    try:
+        with span("fixes"):
+            fixes = await fixer_for(issues)(get_ai_fixes_local, code, issues)
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    results = [issue_result(issue, lines, fix) for issue, fix in zip(issues, fixes)]
 
-        print(f"⏱️ Starting fix for line {line} - {desc}")
+    reports = await run_in_threadpool(render_reports, [{"filename": file.filename, "issues": results}])
+    return {"filename": file.filename, "issues": results, "reports": reports}
+
+
+def format_event(event: str, data: dict, fmt: str) -> str:
+    payload = json.dumps({"event": event, **data}, ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+
+@router.post("/analyze/file/stream")
+async def analyze_file_stream(
+    file: UploadFile = File(...),
+    diff: str = Form(None),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+):
+    """Upload a Python file and stream results as they become available.
+
+    Emits an ``issues`` event with the static analysis straight away, then one
+    ``fix`` event per issue as its fix is generated, then ``done``. Events are
+    NDJSON lines by default, or server-sent events with ``?format=sse``.
+    Accepts the same optional ``diff`` as /analyze/file.
+    """
+    code = await read_python_upload(file)
+    lines = code.splitlines()
+    filename = file.filename
+
+    raw_issues = await run_in_threadpool(analyze_code_cached, code)
+    issues = restrict_to_diff(code, filename, dedupe_issues(raw_issues), diff)
+
+    async def events():
         start_time = time.time()
+        results = [issue_result(issue, lines) for issue in issues]
+        yield format_event("issues", {"filename": filename, "issues": results}, format)
+
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Queue()
+
+        def on_fix(index, fix):
+            loop.call_soon_threadsafe(ready.put_nowait, (index, fix))
+
+        generation = asyncio.ensure_future(fixer_for(issues)(get_ai_fixes_local, code, issues, on_fix=on_fix))
+        try:
+            remaining = len(issues)
+            while remaining:
+                get_next = asyncio.ensure_future(ready.get())
+                await asyncio.wait({get_next, generation}, return_when=asyncio.FIRST_COMPLETED)
+                if not get_next.done():
+                    # Generation finished (or failed) without another fix queued
+                    get_next.cancel()
+                    generation.result()
+                    break
+                index, fix = get_next.result()
+                results[index]["fix"] = fix
+                remaining -= 1
+                yield format_event("fix", {"index": index, "line": results[index]["line"], "fix": fix}, format)
+            await generation
+        except InferenceOverloaded as e:
+            yield format_event("error", {"status": 503, "detail": str(e)}, format)
+            return
+        except Exception as e:
+            # The 200 is already sent: report the failure in-band instead of cutting the stream
+            logging.exception(f"[API] Fix generation failed for {filename}")
+            yield format_event("error", {"status": 500, "detail": str(e)}, format)
+            return
+        finally:
+            generation.cancel()
+
+        reports = await run_in_threadpool(render_reports, [{"filename": filename, "issues": results}])
+        yield format_event("done", {"filename": filename, "elapsed": round(time.time() - start_time, 3),
+                                    "reports": reports}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+
+def needs_model(issue) -> bool:
+    """Whether an issue's fix has to be generated rather than taken from the rules."""
+    issue_type = issue[2] if len(issue) >= 3 else None
+    return rule_based_fix(issue[1], issue_type) is None
 
-        fix = get_ai_fix_local(code, desc, issue_line=line, issue_type=issue_type)
 
-        elapsed = time.time() - start_time
-        print(f"✅ Fix for line {line} took {elapsed:.2f} seconds")
+def fixer_for(issues):
+    """The inference gate if any issue needs the model, else a plain worker thread."""
+    return inference_gate.run if any(needs_model(issue) for issue in issues) else run_in_threadpool
 
-        preview_start = max(line - 2, 0)
-        preview_end = min(line + 1, len(lines))
-        code_preview = "\n".join(lines[preview_start:preview_end])
 
+def plan_fixes(files_issues, budget: int):
+    """Chooses which issues get a fix when several files share one model budget.
+
+    Rule-based fixes are free and always included. Issues that need the
+    model are picked round-robin across files (in line order within each
+    file), so one large file can't use up the whole budget. Returns, per
+    file, the indices of the issues to fix.
+    """
+    selected = [[] for _ in files_issues]
+    queues = []
+    for file_index, issues in enumerate(files_issues):
+        model_queue = []
+        for index, issue in enumerate(issues):
+            if needs_model(issue):
+                model_queue.append(index)
+            else:
+                selected[file_index].append(index)
+        queues.append(model_queue)
+
+    position = 0
+    while budget > 0 and any(position < len(queue) for queue in queues):
+        for file_index, queue in enumerate(queues):
+            if position < len(queue) and budget > 0:
+                selected[file_index].append(queue[position])
+                budget -= 1
+        position += 1
+    return [sorted(indices) for indices in selected]
+
+
+def fix_files(files, plan, workers: int = 4):
+    """Generates the planned fixes for several files at once.
+
+    Files run on a few threads so their prompts reach the model scheduler
+    together and share batches. Returns, per file, one fix (or None) per issue.
+    """
+    def fix_one(args):
+        (code, issues), indices = args
+        fixes = [None] * len(issues)
+        if indices:
+            for index, fix in zip(indices, get_ai_fixes_local(code, [issues[i] for i in indices])):
+                fixes[index] = fix
+        return fixes
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fix-files") as pool:
+        return list(pool.map(fix_one, zip(files, plan)))
+
+
+@router.post("/analyze/files")
+async def analyze_files(
+    files: List[UploadFile] = File(...),
+    diff: str = Form(None),
+    fixes: bool = Form(True),
+):
+    """Upload several Python files and/or zip/tar archives and analyze them together.
+
+    Archives are extracted in a streaming fashion within size and entry-count
+    limits; static analysis is spread over a process pool and model fixes are
+    scheduled across all files under one per-request budget. Results are
+    grouped per file, and the whole upload is written as one report run.
+    """
+    try:
+        collector = await run_in_threadpool(collect_sources, [(f.filename, f.file) for f in files])
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    sources = collector.sources
+    with span("analyze_files"):
+        raw = await run_in_threadpool(analyze_sources, sources)
+    file_issues = [restrict_to_diff(code, name, dedupe_issues(raw[name]), diff) for name, code in sources]
+
+    plan = plan_fixes(file_issues, MAX_FIXES_PER_REQUEST if fixes else 0)
+    if fixes and any(plan):
+        # One admission for the whole upload keeps it to one share of the model
+        try:
+            with span("fixes"):
+                planned = [issues[i] for issues, indices in zip(file_issues, plan) for i in indices]
+                file_fixes = await fixer_for(planned)(fix_files, [(code, issues) for (_, code), issues
+                                                                  in zip(sources, file_issues)], plan)
+        except InferenceOverloaded as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    else:
+        file_fixes = [[None] * len(issues) for issues in file_issues]
+
+    results = []
+    for (name, code), issues, fixes_for_file in zip(sources, file_issues, file_fixes):
+        lines = code.splitlines()
         results.append({
-            "line": line,
-            "issue": desc,
-            "fix": fix,
-            "preview": code_preview,
-            "issue_type": issue_type
+            "filename": name,
+            "issues": [issue_result(issue, lines, fix) for issue, fix in zip(issues, fixes_for_file)],
         })
+    results.extend({"filename": name, "issues": [], "error": error} for name, error in collector.errors.items())
+
+    reports = await run_in_threadpool(render_reports, results)
 
-    save_report(file.filename, results)
-    return {"filename": file.filename, "issues": results}
+    issue_count = sum(len(result["issues"]) for result in results)
+    return {
+        "files": results,
+        "summary": {
+            "files": len(results),
+            "issues": issue_count,
+            "fixes": sum(fix is not None for fixes_for_file in file_fixes for fix in fixes_for_file),
+            "unfixed": issue_count - sum(len(indices) for indices in plan),
+        },
+        "reports": reports,
+    }
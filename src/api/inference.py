@@ -0,0 +1,97 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Model calls are serialized (and batched across requests) by the LLM
+# scheduler, so several requests may be in flight at once.
+MAX_CONCURRENT_GENERATIONS = int(os.environ.get("AI_REVIEWER_MAX_GENERATIONS", "4"))
+MAX_QUEUED_GENERATIONS = int(os.environ.get("AI_REVIEWER_MAX_QUEUED", "8"))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("AI_REVIEWER_QUEUE_TIMEOUT", "60"))
+
+class InferenceOverloaded(Exception):
+    """Raised when a generation can't be admitted or waited too long in the queue."""
+
+class InferenceGate:
+    """Runs blocking model calls off the event loop with bounded concurrency.
+
+    At most ``max_concurrent`` generations run at once on a dedicated thread
+    pool; up to ``max_queued`` more wait their turn. Work that would exceed
+    the queue is rejected straight away, and queued work that hasn't started
+    within ``queue_timeout`` seconds is dropped, both with InferenceOverloaded.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_GENERATIONS, max_queued=MAX_QUEUED_GENERATIONS,
+                 queue_timeout=QUEUE_TIMEOUT_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent + max_queued)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="llm-inference")
+        self._lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+
+    def _run(self, on_start, fn, args, kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            on_start()
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs ``fn(*args, **kwargs)`` on the inference pool and awaits the result."""
+        if not self._slots.acquire(blocking=False):
+            raise InferenceOverloaded("Too many generations in progress")
+
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def on_start():
+            try:
+                loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+            except RuntimeError:
+                pass  # The caller's loop is gone; nobody is waiting for the signal
+
+        with self._lock:
+            self.queued += 1
+        try:
+            future = self._executor.submit(self._run, on_start, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        result = asyncio.wrap_future(future)
+
+        try:
+            # ⏱️ The timeout covers the wait for a worker, not the generation itself
+            await asyncio.wait((started, result), timeout=self.queue_timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not started.done() and not result.done() and future.cancel():
+                with self._lock:
+                    self.queued -= 1
+                raise InferenceOverloaded(f"Waited more than {self.queue_timeout:.1f}s for a free model slot")
+            return await result
+        except asyncio.CancelledError:
+            # Client went away: don't generate for it if we haven't started yet
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+            raise
+        finally:
+            started.cancel()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"running": self.running, "queued": self.queued,
+                    "max_concurrent": self.max_concurrent, "max_queued": self.max_queued}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+inference_gate = InferenceGate()
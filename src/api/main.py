@@ -2,12 +2,35 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
+import time
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from src.analysis.batch import shutdown_analysis_pool
 from src.api.endpoints import router
+from src.api.inference import inference_gate
+from src.llm.llm_fixer import warm_up
+from src.metrics import REGISTRY
 
-app = FastAPI()
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "ai_reviewer_http_request_seconds", "HTTP request latency.", ("method", "path", "status")
+)
+REGISTRY.gauge("ai_reviewer_inference_running", "Generations currently running.",
+               lambda: inference_gate.stats()["running"])
+REGISTRY.gauge("ai_reviewer_inference_queued", "Requests waiting for a generation slot.",
+               lambda: inference_gate.stats()["queued"])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Load the model once at startup instead of on the first upload
+    if os.environ.get("AI_REVIEWER_WARMUP", "1") != "0":
+        warm_up()
+    yield
+    shutdown_analysis_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 # ✅ Add CORS middleware
 app.add_middleware(
@@ -18,6 +41,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # ✅ Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                     method=request.method, path=path, status=str(status))
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(router)
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+import os
+import posixpath
+import tarfile
+import tempfile
+import zipfile
+from src.analysis.batch import DEFAULT_IGNORE, is_ignored
+
+# Limits for one multi-file request. Compressed size bounds all uploads
+# together, extracted size and entry count bound what archives may expand to.
+MAX_UPLOAD_BYTES = int(os.environ.get("AI_REVIEWER_MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+MAX_EXTRACTED_BYTES = int(os.environ.get("AI_REVIEWER_MAX_EXTRACTED_BYTES", str(100 * 1024 * 1024)))
+MAX_FILE_BYTES = int(os.environ.get("AI_REVIEWER_MAX_FILE_BYTES", str(1024 * 1024)))
+MAX_ENTRIES = int(os.environ.get("AI_REVIEWER_MAX_ENTRIES", "5000"))
+MAX_SOURCES = int(os.environ.get("AI_REVIEWER_MAX_SOURCES", "1000"))
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+READ_CHUNK = 64 * 1024
+
+class UploadRejected(Exception):
+    """An upload is malformed (400) or exceeds a limit (413)."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+class SourceCollector:
+    """Accumulates extracted sources while enforcing the per-request limits."""
+
+    def __init__(self, max_extracted=MAX_EXTRACTED_BYTES, max_file=MAX_FILE_BYTES,
+                 max_entries=MAX_ENTRIES, max_sources=MAX_SOURCES, max_upload=MAX_UPLOAD_BYTES):
+        self.max_upload = max_upload
+        self.max_extracted = max_extracted
+        self.max_file = max_file
+        self.max_entries = max_entries
+        self.max_sources = max_sources
+        self.sources = []  # (name, code)
+        self.errors = {}   # name -> message
+        self.names = set()  # Every name seen, kept or not
+        self.entries = 0
+        self.extracted = 0
+        self.uploaded = 0
+
+    def count_upload(self, size: int):
+        self.uploaded += size
+        if self.uploaded > self.max_upload:
+            raise UploadRejected(f"Uploads total more than {self.max_upload} bytes", 413)
+
+    def count_entry(self):
+        self.entries += 1
+        if self.entries > self.max_entries:
+            raise UploadRejected(f"Archive has more than {self.max_entries} entries", 413)
+
+    def wants(self, name: str) -> bool:
+        return name.endswith(".py") and not is_ignored(name, DEFAULT_IGNORE)
+
+    def read(self, name: str, stream):
+        """Reads one member in chunks, stopping as soon as a limit is crossed."""
+        self.claim(name)
+        data = bytearray()
+        while True:
+            chunk = stream.read(READ_CHUNK)
+            if not chunk:
+                break
+            data += chunk
+            self.extracted += len(chunk)
+            if self.extracted > self.max_extracted:
+                raise UploadRejected(f"Archive expands to more than {self.max_extracted} bytes", 413)
+            if len(data) > self.max_file:
+                self.errors[name] = f"File is larger than {self.max_file} bytes"
+                return
+        self.add(name, bytes(data))
+
+    def claim(self, name: str):
+        """Rejects a name seen before, so each file has exactly one outcome."""
+        if name in self.names:
+            raise UploadRejected(f"Duplicate file name: {name}")
+        self.names.add(name)
+
+    def add(self, name: str, content: bytes):
+        if len(self.sources) >= self.max_sources:
+            raise UploadRejected(f"More than {self.max_sources} Python files in one request", 413)
+        try:
+            self.sources.append((name, content.decode("utf-8")))
+        except UnicodeDecodeError:
+            self.errors[name] = "File is not valid UTF-8"
+
+def member_name(name: str, prefix: str = "") -> str:
+    """Archive member path, normalized and kept relative (no '..' or leading '/')."""
+    parts = [part for part in posixpath.normpath(name.replace("\\", "/")).split("/") if part not in ("", ".", "..")]
+    return posixpath.join(prefix, *parts) if prefix else "/".join(parts)
+
+def extract_zip(fileobj, collector: SourceCollector, prefix: str = ""):
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as e:
+        raise UploadRejected(f"Invalid zip archive: {e}")
+    with archive:
+        for info in archive.infolist():
+            collector.count_entry()
+            name = member_name(info.filename, prefix)
+            if info.is_dir() or not collector.wants(name):
+                continue
+            # Declared sizes can lie; read() enforces the limits on real bytes
+            with archive.open(info) as member:
+                collector.read(name, member)
+
+def extract_tar(fileobj, collector: SourceCollector, prefix: str = ""):
+    try:
+        # Stream mode: members are decompressed and read one after another
+        with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+            for member in archive:
+                collector.count_entry()
+                name = member_name(member.name, prefix)
+                if not member.isfile() or not collector.wants(name):
+                    continue
+                collector.read(name, archive.extractfile(member))
+    except tarfile.TarError as e:
+        raise UploadRejected(f"Invalid tar archive: {e}")
+
+def spool_upload(source, collector: SourceCollector):
+    """Copies an upload into a temporary file, counting it against the request's upload limit."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    try:
+        while True:
+            chunk = source.read(READ_CHUNK)
+            if not chunk:
+                break
+            collector.count_upload(len(chunk))
+            spooled.write(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+def collect_sources(uploads, collector: SourceCollector = None):
+    """Extracts Python sources from ``(filename, fileobj)`` uploads.
+
+    ``.py`` uploads are taken as they are; zip and tar archives are read
+    member by member, keeping the ``.py`` files they contain (prefixed with
+    the archive name when there are several uploads).
+    """
+    collector = collector or SourceCollector()
+    uploads = list(uploads)
+    for filename, fileobj in uploads:
+        with spool_upload(fileobj, collector) as spooled:
+            if filename.lower().endswith(".py"):
+                collector.count_entry()
+                collector.read(member_name(filename), spooled)
+            elif is_archive(filename):
+                prefix = member_name(filename) if len(uploads) > 1 else ""
+                if filename.lower().endswith(".zip"):
+                    extract_zip(spooled, collector, prefix)
+                else:
+                    extract_tar(spooled, collector, prefix)
+            else:
+                raise UploadRejected(f"{filename}: only .py files and zip/tar archives are allowed")
+    return collector
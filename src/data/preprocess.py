@@ -0,0 +1,170 @@
+import hashlib
+import os
+import re
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from src.data.records import batched, iter_records, write_shard
+
+# The four section headers stripped from instructions, in one pass
+HEADER_RE = re.compile(r"### (?:Buggy Code|Traceback|Bug Description|Fix):\n?")
+ERROR_TYPE_RE = re.compile(r"(\w+Error):")
+
+# Output columns and their Arrow types
+COLUMNS = (
+    ("instruction", "string"),
+    ("response", "string"),
+    ("clean_instruction", "string"),
+    ("error_type", "string"),
+    ("response_length", "int64"),
+)
+DEFAULT_CHUNK_SIZE = 5000
+
+def clean_instruction(text):
+    """Removes headers and extracts relevant traceback/error messages."""
+    return HEADER_RE.sub("", text or "").strip()
+
+def extract_error_type(text):
+    match = ERROR_TYPE_RE.search(text or "")
+    return match.group(1) if match else "UnknownError"
+
+def preprocess_record(record: dict) -> dict:
+    instruction = record.get("instruction")
+    response = record.get("response")
+    return {
+        "instruction": instruction,
+        "response": response,
+        "clean_instruction": clean_instruction(instruction),
+        "error_type": extract_error_type(instruction),
+        "response_length": len(str(response)),
+    }
+
+class SplitStats:
+    """Summary statistics that are built chunk by chunk and merged across workers.
+
+    Response lengths are kept as a histogram, so percentiles are exact and
+    memory grows with the number of distinct lengths, not records. Duplicate
+    responses are found from 8-byte digests.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.missing = Counter()
+        self.error_types = Counter()
+        self.lengths = Counter()
+        self.response_digests = set()
+        self.duplicate_responses = 0
+        self.shards = []
+
+    def _add_digest(self, digest):
+        if digest in self.response_digests:
+            self.duplicate_responses += 1
+        else:
+            self.response_digests.add(digest)
+
+    def add(self, record: dict, row: dict):
+        self.count += 1
+        for column in ("instruction", "response"):
+            if record.get(column) is None:
+                self.missing[column] += 1
+        self.error_types[row["error_type"]] += 1
+        self.lengths[row["response_length"]] += 1
+        digest = hashlib.blake2b(str(row["response"]).encode("utf-8", "surrogatepass"), digest_size=8).digest()
+        self._add_digest(int.from_bytes(digest, "little"))
+
+    def merge(self, other: "SplitStats"):
+        self.count += other.count
+        self.missing.update(other.missing)
+        self.error_types.update(other.error_types)
+        self.lengths.update(other.lengths)
+        self.duplicate_responses += other.duplicate_responses
+        for digest in other.response_digests:
+            self._add_digest(digest)
+        self.shards.extend(other.shards)
+
+    def percentile(self, q: float) -> float:
+        """Linearly interpolated percentile (as pandas ``describe``) of response lengths."""
+        position = q * (self.count - 1)
+        lower, upper = int(position), min(int(position) + 1, self.count - 1)
+        seen = 0
+        lower_value = upper_value = None
+        for length in sorted(self.lengths):
+            seen += self.lengths[length]
+            if lower_value is None and seen > lower:
+                lower_value = length
+            if seen > upper:
+                upper_value = length
+                break
+        return lower_value + (upper_value - lower_value) * (position - lower)
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        total = sum(length * n for length, n in self.lengths.items())
+        mean = total / self.count
+        variance = sum(n * (length - mean) ** 2 for length, n in self.lengths.items()) / max(self.count - 1, 1)
+        return {
+            "count": self.count,
+            "missing": {column: self.missing[column] for column in ("instruction", "response")},
+            "error_types": dict(self.error_types.most_common(10)),
+            "response_length": {
+                "mean": mean,
+                "std": variance ** 0.5,
+                "min": min(self.lengths),
+                "25%": self.percentile(0.25),
+                "50%": self.percentile(0.5),
+                "75%": self.percentile(0.75),
+                "max": max(self.lengths),
+            },
+            "duplicate_responses": self.duplicate_responses,
+            "shards": sorted(self.shards),
+        }
+
+def shard_path(out_dir: str, index: int, fmt: str) -> str:
+    return os.path.join(out_dir, f"part-{index:05d}.{fmt}")
+
+def process_chunk(index: int, records, out_dir: str, fmt: str = "parquet") -> SplitStats:
+    """Worker entry point: cleans one chunk, writes it as a shard, returns its stats."""
+    stats = SplitStats()
+    rows = []
+    for record in records:
+        row = preprocess_record(record)
+        stats.add(record, row)
+        rows.append(row)
+    stats.shards.append(write_shard(rows, shard_path(out_dir, index, fmt), COLUMNS, fmt))
+    return stats
+
+def preprocess_file(input_path: str, out_dir: str, jobs: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    fmt: str = "parquet") -> SplitStats:
+    """Streams ``input_path`` through the cleaning pipeline into columnar shards.
+
+    Records are read incrementally and cleaned ``chunk_size`` at a time on
+    ``jobs`` worker processes; each worker writes its chunk as one shard in
+    ``out_dir`` and returns mergeable statistics. At most two chunks per
+    worker are in flight, so apart from an 8-byte digest per distinct
+    response, memory doesn't grow with the dataset.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok=True)
+    for name in os.listdir(out_dir):
+        # Clear shards from a previous, possibly larger, run
+        if name.startswith("part-"):
+            os.remove(os.path.join(out_dir, name))
+
+    stats = SplitStats()
+    chunks = enumerate(batched(iter_records(input_path), chunk_size))
+    if jobs == 1:
+        for index, records in chunks:
+            stats.merge(process_chunk(index, records, out_dir, fmt))
+        return stats
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        in_flight = set()
+        for index, records in chunks:
+            if len(in_flight) >= jobs * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats.merge(future.result())
+            in_flight.add(pool.submit(process_chunk, index, records, out_dir, fmt))
+        for future in in_flight:
+            stats.merge(future.result())
+    return stats
@@ -0,0 +1,127 @@
+import gzip
+import json
+import os
+from itertools import islice
+
+READ_SIZE = 1 << 20  # characters read at a time when streaming a JSON array
+
+def open_text(path: str):
+    """Opens a (possibly gzipped) text file for reading."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+def iter_json_array(f, read_size: int = READ_SIZE):
+    """Yields the elements of a top-level JSON array without loading it all.
+
+    Reads ``read_size`` characters at a time and decodes one element at a
+    time, so memory stays proportional to the largest element.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            buf, pos = buf[pos:] + f.read(read_size), 0
+            eof = pos >= len(buf)
+            continue
+
+        if not started:
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == "]":
+            return
+
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            value, end = None, None
+        # A scalar cut at the end of the buffer may decode as a shorter value
+        if end is None or (end == len(buf) and not isinstance(value, (dict, list)) and not eof):
+            if eof:
+                raise ValueError(f"Malformed JSON array element at offset {pos}")
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        yield value
+        pos = end
+        if pos > read_size:
+            buf, pos = buf[pos:], 0
+
+def iter_jsonl(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def iter_records(path: str):
+    """Streams the records of a .json (array) or .jsonl file, gzipped or not."""
+    name = path[:-3] if path.endswith(".gz") else path
+    with open_text(path) as f:
+        if name.endswith((".jsonl", ".ndjson")):
+            yield from iter_jsonl(f)
+        else:
+            yield from iter_json_array(f)
+
+DATASET_SUFFIXES = (".jsonl.gz", ".jsonl", ".json.gz", ".json")
+
+def find_dataset(base_path: str) -> str:
+    """Resolves a dataset path given without extension to the export that exists.
+
+    Prefers JSONL (as written by convert_pickle_to_json.py) over a JSON array.
+    """
+    for suffix in DATASET_SUFFIXES:
+        if os.path.exists(base_path + suffix):
+            return base_path + suffix
+    return base_path + DATASET_SUFFIXES[-1]
+
+def batched(iterable, size: int):
+    """Yields lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+SHARD_FORMATS = ("parquet", "arrow")
+
+def write_shard(rows, path: str, columns, fmt: str = "parquet"):
+    """Writes ``rows`` (a list of dicts) as one columnar Parquet or Arrow IPC file.
+
+    ``columns`` is a sequence of (name, Arrow type alias) pairs, so every
+    shard has the same schema even when a chunk has only nulls in a column.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise RuntimeError("Writing shards needs `pip install pyarrow`") from e
+
+    schema = pa.schema([(name, pa.type_for_alias(type_name)) for name, type_name in columns])
+    table = pa.Table.from_pylist(rows, schema=schema)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, tmp_path, compression="zstd")
+    elif fmt == "arrow":
+        import pyarrow.feather as feather
+        feather.write_feather(table, tmp_path, compression="zstd")
+    else:
+        raise ValueError(f"Unknown shard format {fmt!r}; expected one of {', '.join(SHARD_FORMATS)}")
+    # Readers never see a half-written shard
+    os.replace(tmp_path, path)
+    return path
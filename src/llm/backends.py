@@ -0,0 +1,103 @@
+import logging
+import os
+
+# Which implementation serves generations: "fp32" (the PyTorch pipeline),
+# "int8" (dynamically quantized PyTorch) or "onnx" (ONNX Runtime export made
+# by export_codet5.py).
+BACKENDS = ("fp32", "int8", "onnx")
+BACKEND = os.environ.get("AI_REVIEWER_BACKEND", "fp32")
+ONNX_MODEL_PATH = os.environ.get("AI_REVIEWER_ONNX_PATH", "./codet5_onnx")
+
+class Seq2SeqBackend:
+    """Generates with an encoder-decoder model behind a pipeline-style call.
+
+    Instances are called like a ``transformers`` text-generation pipeline
+    (``backend(prompts, batch_size=..., **generation_kwargs)`` returning
+    ``[[{"generated_text": ...}], ...]``), so they drop into the same slot as
+    the fp32 pipeline and the stubs used in tests.
+    """
+
+    name = None
+
+    def __init__(self, model, tokenizer, max_input_tokens=512):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_input_tokens = max_input_tokens
+
+    def __call__(self, prompts, batch_size=None, **generation_kwargs):
+        single = isinstance(prompts, str)
+        if single:
+            prompts = [prompts]
+
+        # Encoder-decoder output never echoes the prompt
+        generation_kwargs.pop("return_full_text", None)
+        if not generation_kwargs.get("do_sample"):
+            generation_kwargs.pop("temperature", None)
+
+        batch_size = batch_size or len(prompts)
+        texts = []
+        for start in range(0, len(prompts), batch_size):
+            inputs = self.tokenizer(prompts[start:start + batch_size], return_tensors="pt", padding=True,
+                                    truncation=True, max_length=self.max_input_tokens)
+            output_ids = self.model.generate(**inputs, **generation_kwargs)
+            texts.extend(self.tokenizer.batch_decode(output_ids, skip_special_tokens=True))
+
+        outputs = [[{"generated_text": text}] for text in texts]
+        return outputs[0] if single else outputs
+
+def load_fp32(model_path):
+    """The original PyTorch text-generation pipeline."""
+    from transformers import pipeline
+
+    llm = pipeline(
+        "text-generation",
+        model=model_path,
+        device="cpu",
+        framework="pt"
+    )
+    # Batched generation needs a pad token to pad prompts with
+    if llm.tokenizer.pad_token is None:
+        llm.tokenizer.pad_token = llm.tokenizer.eos_token
+    return llm
+
+def load_int8(model_path):
+    """The fine-tuned model with its Linear layers dynamically quantized to int8."""
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+    model.eval()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    backend = Seq2SeqBackend(model, AutoTokenizer.from_pretrained(model_path))
+    backend.name = "int8"
+    return backend
+
+def load_onnx(model_path=None):
+    """The ONNX Runtime export (needs ``optimum[onnxruntime]``)."""
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise RuntimeError("The onnx backend needs `pip install optimum[onnxruntime]`") from e
+    from transformers import AutoTokenizer
+
+    model_path = model_path or ONNX_MODEL_PATH
+    if not os.path.isdir(model_path):
+        raise RuntimeError(f"No ONNX export at {model_path}; run export_codet5.py first")
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_path)
+    backend = Seq2SeqBackend(model, AutoTokenizer.from_pretrained(model_path))
+    backend.name = "onnx"
+    return backend
+
+_LOADERS = {"fp32": load_fp32, "int8": load_int8, "onnx": load_onnx}
+
+def backend_model_path(backend, model_path):
+    """Directory the backend loads its weights from."""
+    return ONNX_MODEL_PATH if backend == "onnx" else model_path
+
+def load_backend(backend, model_path):
+    """Loads the named backend. ``model_path`` is the save_codet5.py output."""
+    if backend not in _LOADERS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    path = backend_model_path(backend, model_path)
+    logging.info(f"[LLM] Loading {backend} backend from {path}")
+    return _LOADERS[backend](path)
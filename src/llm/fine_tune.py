@@ -1 +1,213 @@
-# Fine-tuning script for TinyLlama
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from transformers import DataCollatorForSeq2Seq, TrainerCallback
+from src.data.records import SHARD_FORMATS
+
+PROMPT_PREFIX = "Fix the following code:\n"
+PADDING_MODES = ("dynamic", "max_length")
+# Bump when make_tokenize_function changes what it produces
+TOKENIZED_FORMAT_VERSION = 1
+DEFAULT_TOKENIZED_CACHE_DIR = "./tokenized_cache"
+SOURCE_COLUMNS = ["instruction", "response", "clean_instruction", "error_type", "response_length"]
+
+def make_tokenize_function(tokenizer, max_length=512, padding="dynamic"):
+    """Tokenizer for ``dataset.map(batched=True)``.
+
+    ``dynamic`` only truncates and leaves padding to the collator, adding a
+    ``length`` column for length-grouped batching. ``max_length`` is the
+    original behaviour: everything padded to ``max_length``.
+    """
+    if padding not in PADDING_MODES:
+        raise ValueError(f"Unknown padding mode {padding!r}; expected one of {', '.join(PADDING_MODES)}")
+
+    def tokenize_function(examples):
+        inputs = [PROMPT_PREFIX + code for code in examples["clean_instruction"]]
+        targets = [fix for fix in examples["response"]]
+
+        if padding == "max_length":
+            model_inputs = tokenizer(inputs, max_length=max_length, truncation=True, padding="max_length")
+            labels = tokenizer(targets, max_length=max_length, truncation=True, padding="max_length")
+            model_inputs["labels"] = labels["input_ids"]
+            return model_inputs
+
+        model_inputs = tokenizer(inputs, max_length=max_length, truncation=True)
+        model_inputs["labels"] = tokenizer(text_target=targets, max_length=max_length, truncation=True)["input_ids"]
+        model_inputs["length"] = [len(ids) for ids in model_inputs["input_ids"]]
+        return model_inputs
+
+    return tokenize_function
+
+def find_shards(directory: str) -> str:
+    """Glob pattern for the shards process_data.py wrote to ``directory`` (Parquet or Arrow)."""
+    for fmt in SHARD_FORMATS:
+        pattern = os.path.join(directory, f"*.{fmt}")
+        if glob.glob(pattern):
+            return pattern
+    raise FileNotFoundError(f"No .parquet or .arrow shards in {directory}; run process_data.py first")
+
+def load_shards(data_files: dict):
+    """Opens each split's shards as a DatasetDict, whichever format they were written in."""
+    from datasets import Dataset, DatasetDict, load_dataset
+
+    formats = {os.path.splitext(pattern)[1].lstrip(".") for pattern in data_files.values()}
+    if formats == {"parquet"}:
+        return load_dataset("parquet", data_files=data_files)
+    if formats == {"arrow"}:
+        # Shards are Arrow IPC files (Feather v2), which the "arrow" builder can't always read
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        return DatasetDict({
+            split: Dataset(pa.concat_tables([feather.read_table(path) for path in sorted(glob.glob(pattern))]))
+            for split, pattern in data_files.items()
+        })
+    raise ValueError(f"Expected all splits as *.parquet or all as *.arrow, got {sorted(data_files.values())}")
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Hash of the tokenizer's vocabulary and settings."""
+    digest = hashlib.sha256()
+    digest.update(type(tokenizer).__name__.encode())
+    digest.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode())
+    digest.update(json.dumps(tokenizer.special_tokens_map, sort_keys=True, default=str).encode())
+    digest.update(str(getattr(tokenizer, "model_max_length", None)).encode())
+    return digest.hexdigest()
+
+def files_fingerprint(data_files: dict) -> list:
+    """Identity of the source shards: path, size and modification time of each."""
+    entries = []
+    for split, pattern in sorted(data_files.items()):
+        for path in sorted(glob.glob(pattern)):
+            stat = os.stat(path)
+            entries.append([split, os.path.abspath(path), stat.st_size, int(stat.st_mtime)])
+    return entries
+
+def dataset_fingerprint(tokenizer, data_files: dict, max_length: int, padding: str,
+                        sample_fraction: float, seed: int) -> str:
+    """Key of a tokenized dataset: everything that changes its contents."""
+    payload = json.dumps({
+        "version": TOKENIZED_FORMAT_VERSION,
+        "tokenizer": tokenizer_fingerprint(tokenizer),
+        "prompt": PROMPT_PREFIX,
+        "max_length": max_length,
+        "padding": padding,
+        "sample_fraction": sample_fraction,
+        "seed": seed,
+        "files": files_fingerprint(data_files),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def load_tokenized_dataset(data_files: dict, tokenizer, max_length=512, padding="dynamic", sample_fraction=0.2,
+                           seed=42, cache_dir=DEFAULT_TOKENIZED_CACHE_DIR, num_proc=None, rebuild=False):
+    """Returns the tokenized, sampled dataset, building it only on a cache miss.
+
+    Datasets are saved under ``cache_dir/<fingerprint>`` with ``save_to_disk``
+    and opened with ``load_from_disk``, which memory-maps the Arrow files: a
+    repeat run (or every run of a hyperparameter sweep) starts instantly and
+    the data lives in the page cache instead of each process's heap.
+    """
+    from datasets import load_from_disk
+
+    path = os.path.join(cache_dir, dataset_fingerprint(tokenizer, data_files, max_length, padding,
+                                                       sample_fraction, seed))
+    if os.path.isdir(path) and not rebuild:
+        logging.info(f"📦 Loading tokenized dataset from {path}")
+        return load_from_disk(path)
+
+    logging.info(f"🔄 Tokenizing dataset into {path}")
+    dataset = load_shards(data_files)
+    for split in dataset:
+        size = int(sample_fraction * len(dataset[split]))
+        dataset[split] = dataset[split].shuffle(seed=seed).select(range(size))
+
+    tokenize_function = make_tokenize_function(tokenizer, max_length, padding)
+    tokenized = dataset.map(tokenize_function, batched=True, num_proc=num_proc,
+                            remove_columns=[c for c in SOURCE_COLUMNS if c in dataset["train"].column_names])
+
+    # Write next to the final path and rename, so an interrupted run never
+    # leaves a half-written dataset behind under a valid fingerprint
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tokenized.save_to_disk(tmp_path)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return load_from_disk(path)
+
+class PaddingStatsCollator(DataCollatorForSeq2Seq):
+    """Seq2seq collator that pads per batch and counts real vs. padded tokens.
+
+    Label padding uses -100 so it's ignored by the loss. Counts accumulate in
+    ``real_tokens``/``total_tokens`` until ``take_stats`` is called; they are
+    only seen by the main process, so keep ``dataloader_num_workers=0``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("label_pad_token_id", -100)
+        super().__init__(*args, **kwargs)
+        self.real_tokens = 0
+        self.total_tokens = 0
+
+    def __call__(self, features, return_tensors=None):
+        for feature in features:
+            feature.pop("length", None)
+        batch = super().__call__(features, return_tensors=return_tensors)
+
+        pad_id = self.tokenizer.pad_token_id
+        labels = batch["labels"]
+        self.real_tokens += int(batch["attention_mask"].sum()) + int(((labels != -100) & (labels != pad_id)).sum())
+        self.total_tokens += batch["input_ids"].numel() + labels.numel()
+        return batch
+
+    def take_stats(self):
+        """Returns (real tokens, total tokens) since the last call and resets them."""
+        stats = (self.real_tokens, self.total_tokens)
+        self.real_tokens = self.total_tokens = 0
+        return stats
+
+class ThroughputCallback(TrainerCallback):
+    """Adds ``tokens_per_sec`` (real tokens) and ``padding_ratio`` to each training log.
+
+    Training and evaluation share the collator, so its counts are split by
+    phase: they are credited to training at the end of each training step
+    and discarded after each evaluation step.
+    """
+
+    def __init__(self, collator: PaddingStatsCollator):
+        self.collator = collator
+        self.last_time = None
+        self.real_tokens = 0
+        self.total_tokens = 0
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self.collator.take_stats()
+        self.real_tokens = self.total_tokens = 0
+        self.last_time = time.perf_counter()
+
+    def on_step_end(self, args, state, control, **kwargs):
+        real, total = self.collator.take_stats()
+        self.real_tokens += real
+        self.total_tokens += total
+
+    def on_prediction_step(self, args, state, control, **kwargs):
+        self.collator.take_stats()
+
+    def on_evaluate(self, args, state, control, **kwargs):
+        self.collator.take_stats()
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        if self.last_time is None or not state.log_history or "loss" not in state.log_history[-1]:
+            return
+        now = time.perf_counter()
+        real, total = self.real_tokens, self.total_tokens
+        self.real_tokens = self.total_tokens = 0
+        stats = {
+            "tokens_per_sec": round(real / max(now - self.last_time, 1e-9), 1),
+            "padding_ratio": round(1 - real / total, 4) if total else 0.0,
+        }
+        self.last_time = now
+        state.log_history[-1].update(stats)
+        logging.info(f"⏱️ step {state.global_step}: {stats['tokens_per_sec']} tokens/s, "
+                     f"{stats['padding_ratio']:.1%} padding")
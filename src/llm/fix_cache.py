@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import sqlite3
+import textwrap
+import threading
+import time
+from collections import OrderedDict
+from src.analysis.cache import DEFAULT_CACHE_DIR
+
+DEFAULT_MEMORY_ENTRIES = 512
+DEFAULT_MAX_DISK_BYTES = 128 * 1024 * 1024
+DEFAULT_TTL_SECONDS = float(os.environ.get("AI_REVIEWER_FIX_CACHE_TTL", str(30 * 24 * 3600)))
+
+def normalize_snippet(snippet: str) -> str:
+    """Drops indentation and trailing whitespace so cosmetic edits still hit."""
+    lines = [line.rstrip() for line in snippet.strip("\n").splitlines()]
+    return textwrap.dedent("\n".join(lines))
+
+def make_fix_key(issue_kind: str, snippet: str, model_id: str, generation_params: dict) -> str:
+    """Cache key for one fix: (issue kind, context hash, model id, generation params)."""
+    snippet_hash = hashlib.sha256(normalize_snippet(snippet).encode("utf-8", "surrogatepass")).hexdigest()
+    payload = json.dumps(
+        [issue_kind.strip().lower(), snippet_hash, model_id, generation_params],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class MemoryFixStore:
+    """In-process LRU tier with a per-entry TTL."""
+
+    def __init__(self, max_entries=DEFAULT_MEMORY_ENTRIES, ttl=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (fix, stored_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            fix, stored_at = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return fix
+
+    def put(self, key, fix, stored_at=None):
+        with self._lock:
+            self._entries[key] = (fix, stored_at or time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class DiskFixStore:
+    """SQLite tier shared by every process using the same cache directory.
+
+    Expired entries are never returned, and least-recently-used entries are
+    dropped once the stored fixes exceed ``max_bytes``.
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_DISK_BYTES, ttl=DEFAULT_TTL_SECONDS):
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, "fixes.sqlite3")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fixes ("
+            " key TEXT PRIMARY KEY, fix TEXT NOT NULL, size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS fixes_last_used ON fixes (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Returns (fix, stored_at) or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT fix, stored_at FROM fixes WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM fixes WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE fixes SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return row
+
+    def put(self, key, fix):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fixes (key, fix, size, stored_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, fix, len(fix.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM fixes WHERE stored_at < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM fixes").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        for key, size in self._conn.execute("SELECT key, size FROM fixes ORDER BY last_used").fetchall():
+            if excess <= 0:
+                break
+            self._conn.execute("DELETE FROM fixes WHERE key = ?", (key,))
+            excess -= size
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM fixes")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM fixes").fetchone()[0]
+
+class FixCache:
+    """Two-tier fix cache: an in-memory LRU in front of an optional disk store."""
+
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory or MemoryFixStore()
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def get(self, key):
+        fix = self.memory.get(key)
+        if fix is not None:
+            self.memory_hits += 1
+            return fix
+
+        if self.disk is not None:
+            row = self.disk.get(key)
+            if row is not None:
+                fix, stored_at = row
+                self.memory.put(key, fix, stored_at)
+                self.disk_hits += 1
+                return fix
+
+        self.misses += 1
+        return None
+
+    def put(self, key, fix):
+        self.stores += 1
+        self.memory.put(key, fix)
+        if self.disk is not None:
+            self.disk.put(key, fix)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+        }
+
+def default_fix_cache() -> FixCache:
+    """Memory + disk cache, or memory only when AI_REVIEWER_FIX_CACHE=memory."""
+    mode = os.environ.get("AI_REVIEWER_FIX_CACHE", "disk")
+    disk = None
+    if mode == "disk":
+        try:
+            disk = DiskFixStore()
+        except (OSError, sqlite3.Error):
+            disk = None  # Read-only home dir etc. — keep the memory tier
+    return FixCache(disk=disk)
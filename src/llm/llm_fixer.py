@@ -1,18 +1,107 @@
 import os
 import logging
 import re
-from functools import lru_cache
-from transformers import pipeline
+import threading
+import uuid
+from concurrent.futures import as_completed
+from src.analysis.autofix import fix_snippets
+from src.llm.backends import BACKEND, backend_model_path, load_backend
+from src.llm.fix_cache import default_fix_cache, make_fix_key
+from src.llm.prompt_engine import build_context, token_counter
+from src.llm.stopping import adaptive_max_new_tokens, make_stopping_criteria, truncate_at_stop
+from src.llm.scheduler import MicroBatchScheduler
+from src.metrics import (LLM_BATCH_SIZE, LLM_CALLS_TOTAL, LLM_GENERATED_TOKENS, LLM_PROMPTS_TOTAL, LLM_STOPS_TOTAL,
+                         count_fix, span)
 
-# Load fine-tuned local model
-local_llm = pipeline(
-    "text-generation",
-    model="./codet5_finetuned_final",  # Update path if needed
-    device="cpu",
-    framework="pt"
-)
+MODEL_PATH = os.environ.get("AI_REVIEWER_MODEL_PATH", "./codet5_finetuned_final")
+
+# The model is loaded on first use (or by warm_up) so that static-only runs
+# never pay for importing torch/transformers.
+_local_llm = None
+_local_llm_lock = threading.Lock()
+_model_id = None
+
+def get_local_llm():
+    """Returns the fine-tuned model on the configured backend, loading it on first call (thread-safe)."""
+    global _local_llm
+    if _local_llm is None:
+        with _local_llm_lock:
+            if _local_llm is None:
+                _local_llm = load_backend(BACKEND, MODEL_PATH)
+    return _local_llm
+
+def set_local_llm(llm, model_id=None):
+    """Replaces the local model, e.g. with a stub in tests and benchmarks.
+
+    ``model_id`` keys the fix cache; without one the model gets a fresh id so
+    it never sees fixes cached for another model.
+    """
+    global _local_llm, _model_id, _prompt_tokenizer
+    with _local_llm_lock:
+        _local_llm = llm
+        _model_id = model_id or (f"custom-{uuid.uuid4().hex}" if llm is not None else None)
+        _prompt_tokenizer = _UNSET
+
+def get_model_id() -> str:
+    """Identifies the loaded weights: model path, checkpoint modification time and backend."""
+    global _model_id
+    if _model_id is None:
+        model_path = backend_model_path(BACKEND, MODEL_PATH)
+        config_path = os.path.join(model_path, "config.json")
+        mtime = os.path.getmtime(config_path) if os.path.exists(config_path) else 0
+        _model_id = f"{os.path.realpath(model_path)}@{mtime:.0f}"
+        # Quantized backends can decode differently, so they get their own cache entries
+        if BACKEND != "fp32":
+            _model_id += f"#{BACKEND}"
+    return _model_id
+
+def is_model_loaded() -> bool:
+    return _local_llm is not None
+
+def warm_up() -> bool:
+    """Loads the model ahead of the first request. Returns False if it can't be loaded."""
+    try:
+        get_local_llm()
+        return True
+    except Exception as e:
+        logging.error(f"[LLM] Warm-up failed: {e}")
+        return False
+
+def __getattr__(name):
+    # Backwards compatibility for code that used the old module-level pipeline
+    if name == "local_llm":
+        return get_local_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Token budget for the code part of a prompt; CodeT5 reads at most 512
+# tokens and the prompt template takes about 60 of them.
+CONTEXT_TOKENS = int(os.environ.get("AI_REVIEWER_CONTEXT_TOKENS", "384"))
+DEFAULT_BATCH_SIZE = int(os.environ.get("AI_REVIEWER_BATCH_SIZE", "8"))
+
+
+_UNSET = object()
+_prompt_tokenizer = _UNSET
+
+def get_prompt_tokenizer():
+    """Tokenizer that prompt budgets are counted with, or None to estimate.
+
+    Uses the loaded model's tokenizer, else loads just the tokenizer so that
+    cache hits don't need the model.
+    """
+    global _prompt_tokenizer
+    if _prompt_tokenizer is _UNSET:
+        with _local_llm_lock:
+            if _prompt_tokenizer is _UNSET:
+                tokenizer = getattr(_local_llm, "tokenizer", None)
+                if tokenizer is None and _local_llm is None:
+                    try:
+                        from transformers import AutoTokenizer
+                        tokenizer = AutoTokenizer.from_pretrained(backend_model_path(BACKEND, MODEL_PATH))
+                    except Exception as e:
+                        logging.info(f"[LLM] No tokenizer for prompt budgets, estimating tokens: {e}")
+                _prompt_tokenizer = tokenizer
+    return _prompt_tokenizer
 
-MAX_CODE_CHARS = 1000
 
 def clean_ai_fix(text):
     """Extract and clean code block from LLM output."""
@@ -21,29 +110,52 @@ def clean_ai_fix(text):
         return f"```python\n{match.group(1).strip()}\n```"
     return f"```python\n{text.strip()}\n```"
 
-def extract_code_context(code: str, line: int, window: int = 10):
-    """Get a snippet around the issue line (±10 lines)."""
-    lines = code.splitlines()
-    start = max(0, line - window)
-    end = min(len(lines), line + window)
-    snippet = "\n".join(lines[start:end])
-    return snippet[:MAX_CODE_CHARS]  # truncate to safe input size
-
-@lru_cache(maxsize=128)
-def get_cached_fix(prompt: str):
-    return local_llm(
-        prompt,
-        max_new_tokens=128,
-        do_sample=True,
-        temperature=0.7,
-        return_full_text=False
-    )
+# Greedy decoding is deterministic, so its fixes can be cached and reproduced.
+# Set AI_REVIEWER_GENERATION=sample for the old sampled (uncached) behaviour.
+GENERATION_MODE = os.environ.get("AI_REVIEWER_GENERATION", "greedy")
+GREEDY_GENERATION_KWARGS = {
+    "max_new_tokens": 128,
+    "do_sample": False,
+    "return_full_text": False,
+}
+SAMPLING_GENERATION_KWARGS = {
+    "max_new_tokens": 128,
+    "do_sample": True,
+    "temperature": 0.7,
+    "return_full_text": False,
+}
+GENERATION_KWARGS = SAMPLING_GENERATION_KWARGS if GENERATION_MODE == "sample" else GREEDY_GENERATION_KWARGS
+# Scale max_new_tokens (up to GENERATION_KWARGS' cap) with the size of the
+# snippet being fixed, and stop each sequence at its closing fence.
+ADAPTIVE_MAX_NEW_TOKENS = os.environ.get("AI_REVIEWER_ADAPTIVE_TOKENS", "1") != "0"
 
-def get_ai_fix_local(code_snippet, issue_description, issue_line=None, issue_type=None):
+_fix_cache = None
+_fix_cache_lock = threading.Lock()
+
+def get_fix_cache():
+    global _fix_cache
+    with _fix_cache_lock:
+        if _fix_cache is None:
+            _fix_cache = default_fix_cache()
+        return _fix_cache
+
+def set_fix_cache(cache):
+    global _fix_cache
+    with _fix_cache_lock:
+        _fix_cache = cache
+
+def fix_cache_key(code_snippet, issue_description, issue_type=None):
+    """Fix cache key, or None when generation isn't deterministic."""
+    if GENERATION_KWARGS.get("do_sample"):
+        return None
+    params = {**GENERATION_KWARGS, "adaptive_max_new_tokens": ADAPTIVE_MAX_NEW_TOKENS, "stopping": 1}
+    return make_fix_key(issue_type or issue_description, code_snippet, get_model_id(), params)
+
+def rule_based_fix(issue_description, issue_type=None):
+    """Returns a canned fix for issues that don't need the model, else None."""
     desc = issue_description.lower()
     tag = (issue_type or "").lower()
 
-    # ✅ Rule-based quick fixes
     if "unused_import" in tag or "unused import" in desc:
         return "```python\n# Removed unused import\n```"
     if "unused_variable" in tag or "never used" in desc:
@@ -54,15 +166,45 @@ def get_ai_fix_local(code_snippet, issue_description, issue_line=None, issue_typ
         return "```python\n# Removed unreachable code (after return/break/continue)\n```"
     if "inefficient_loop" in tag or "inefficient loop" in desc or "nested loop" in desc:
         return "```python\n# Consider optimizing the loop with a list comprehension or flattening\n```"
+    return None
 
-    # ✅ Truncate or extract context
-    if issue_line is not None:
-        code_snippet = extract_code_context(code_snippet, issue_line)
-    else:
-        code_snippet = code_snippet[:MAX_CODE_CHARS]
+def prompt_context(code, issue_line=None):
+    """Cuts the code down to the part the model needs to see.
 
-    # ✅ Construct LLM prompt
-    prompt = f"""You are an expert Python developer performing code reviews.
+    That is the innermost function or class around the issue plus the imports
+    and module-level names it uses, within CONTEXT_TOKENS tokens.
+    """
+    return build_context(code, issue_line, CONTEXT_TOKENS, get_prompt_tokenizer())
+
+def issue_context_keys(code, issues):
+    """Identity of each issue for fix reuse: its kind plus the context the model would see.
+
+    Equal keys mean a previously generated fix still applies, even if edits
+    elsewhere in the file moved the issue to another line. Rule-based fixes
+    are keyed on the edited line they show, so ``import os, sys`` and
+    ``import os, json`` don't share a fix.
+    """
+    keys = []
+    snippets = None
+    for index, issue in enumerate(issues):
+        line, desc = issue[0], issue[1]
+        issue_type = issue[2] if len(issue) >= 3 else None
+        fix = rule_based_fix(desc, issue_type)
+        if fix is not None:
+            if snippets is None:
+                snippets = fix_snippets(code, issues) if code else {}
+            keys.append(make_fix_key(issue_type or desc, snippets.get(index, fix), "rule_based", {}))
+        else:
+            keys.append(make_fix_key(issue_type or desc, prompt_context(code, line), "", {}))
+    return keys
+
+def issue_context_key(code, issue):
+    """``issue_context_keys`` for a single issue."""
+    return issue_context_keys(code, [issue])[0]
+
+def build_prompt(code_snippet, issue_description):
+    """Builds the LLM prompt for one issue from its context snippet."""
+    return f"""You are an expert Python developer performing code reviews.
 
 ## Task
 Fix the following issue in the Python code below. DO NOT explain — just return the corrected code.
@@ -75,19 +217,187 @@ Fix the following issue in the Python code below. DO NOT explain — just return
 {code_snippet}
 ```"""
 
-    try:
-        logging.info(f"[LLM] Prompting for: {issue_description}")
-        result = get_cached_fix(prompt)
-        ai_fix = result[0]["generated_text"].strip()
+def format_llm_output(generated_text):
+    """Turns raw generated text into a fenced code block."""
+    ai_fix = generated_text.strip()
+
+    logging.debug(f"🧠 Raw LLM output:\n{ai_fix}")
 
-        print("🧠 Raw LLM output:\n", ai_fix)
+    if "```" not in ai_fix:
+        logging.warning("⚠️ LLM response incomplete — returning fallback format")
+        return f"```python\n# AI-generated (incomplete)\n{ai_fix}\n```"
 
-        if "```" not in ai_fix:
-            logging.warning("⚠️ LLM response incomplete — returning fallback format")
-            return f"```python\n# AI-generated (incomplete)\n{ai_fix}\n```"
+    return clean_ai_fix(ai_fix)
 
-        return clean_ai_fix(ai_fix)
+def generation_kwargs_for(llm, prompts, count_tokens):
+    """Generation kwargs for one batch: adaptive token cap plus stopping criteria."""
+    kwargs = dict(GENERATION_KWARGS)
+    if ADAPTIVE_MAX_NEW_TOKENS:
+        template_tokens = count_tokens(build_prompt("", ""))
+        snippet_tokens = max(count_tokens(prompt) for prompt in prompts) - template_tokens
+        kwargs["max_new_tokens"] = adaptive_max_new_tokens(snippet_tokens, cap=GENERATION_KWARGS["max_new_tokens"])
+
+    tokenizer = getattr(llm, "tokenizer", None)
+    if tokenizer is not None:
+        kwargs["stopping_criteria"] = make_stopping_criteria(tokenizer)
+    return kwargs
+
+def generate_batch(prompts):
+    """Runs one batched generation and returns the text for each prompt, cut at its stop point."""
+    llm = get_local_llm()
+    count_tokens = token_counter(get_prompt_tokenizer())
+    kwargs = generation_kwargs_for(llm, prompts, count_tokens)
+
+    LLM_CALLS_TOTAL.inc()
+    LLM_PROMPTS_TOTAL.inc(len(prompts))
+    LLM_BATCH_SIZE.observe(len(prompts))
+    with span("generate"):
+        outputs = llm(prompts, batch_size=len(prompts), **kwargs)
+
+    texts = []
+    generated = 0
+    for output in outputs:
+        raw = output[0]["generated_text"]
+        tokens = count_tokens(raw)
+        text, reason = truncate_at_stop(raw)
+        if reason is None:
+            reason = "max_tokens" if tokens >= kwargs["max_new_tokens"] else "eos"
+        LLM_STOPS_TOTAL.inc(reason=reason)
+        generated += tokens
+        texts.append(text)
+
+    LLM_GENERATED_TOKENS.inc(generated)
+    logging.info(f"[LLM] Generated {generated} tokens for {len(prompts)} fixes "
+                 f"(max_new_tokens={kwargs['max_new_tokens']})")
+    return texts
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Returns the process-wide micro-batching scheduler that fronts the model."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = MicroBatchScheduler(generate_batch)
+        return _scheduler
+
+def set_scheduler(scheduler):
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
+
+def fix_unavailable(issue_description, error):
+    return f"```python\n# AI Fix not available for: {issue_description}\n# Error: {str(error)}\n```"
+
+def get_ai_fix_local(code_snippet, issue_description, issue_line=None, issue_type=None):
+    # ✅ Rule-based quick fixes
+    fix = rule_based_fix(issue_description, issue_type)
+    if fix is not None:
+        count_fix("rule_based")
+        return fix
+
+    with span("prompt_build"):
+        context = prompt_context(code_snippet, issue_line)
+        prompt = build_prompt(context, issue_description)
+
+    cache_key = fix_cache_key(context, issue_description, issue_type)
+    if cache_key is not None:
+        fix = get_fix_cache().get(cache_key)
+        if fix is not None:
+            count_fix("cache")
+            return fix
+
+    try:
+        logging.info(f"[LLM] Prompting for: {issue_description}")
+        # ✅ Shares a model call with prompts from concurrent requests
+        fix = format_llm_output(get_scheduler().submit(prompt).result())
+        if cache_key is not None:
+            get_fix_cache().put(cache_key, fix)
+        count_fix("llm")
+        return fix
 
     except Exception as e:
         logging.error(f"[LLM Error] {e}")
-        return f"```python\n# AI Fix not available for: {issue_description}\n# Error: {str(e)}\n```"
+        count_fix("error")
+        return fix_unavailable(issue_description, e)
+
+def get_ai_fixes_local(code, issues, batch_size=None, on_fix=None):
+    """Suggests fixes for all issues of one file, batching the model calls.
+
+    ``issues`` are the ``(line, description[, issue_type])`` tuples returned by
+    CodeAnalyzer. Rule-based issues take the fast path; the remaining prompts
+    are sorted by length (so each padded batch wastes little compute on pad
+    tokens) and submitted to the scheduler ``batch_size`` at a time, where
+    they may share model calls with other requests. Returns one fix per
+    issue, in the same order as ``issues``.
+
+    If given, ``on_fix(index, fix)`` is called as soon as each fix is ready,
+    which lets callers stream results before the slowest batch finishes.
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    fixes = [None] * len(issues)
+
+    # prompt -> [(index, description), ...]; identical prompts are generated once
+    pending = {}
+    cache_keys = {}
+    snippets = None
+    for index, issue in enumerate(issues):
+        line, desc = issue[0], issue[1]
+        issue_type = issue[2] if len(issue) >= 3 else None
+
+        fix = rule_based_fix(desc, issue_type)
+        if fix is not None:
+            # ✅ Show the exact edited line where the deterministic fix has one
+            if snippets is None:
+                snippets = fix_snippets(code, issues) if code else {}
+            fix = snippets.get(index, fix)
+            count_fix("rule_based")
+            fixes[index] = fix
+            if on_fix:
+                on_fix(index, fix)
+            continue
+
+        with span("prompt_build"):
+            context = prompt_context(code, line)
+            prompt = build_prompt(context, desc)
+        pending.setdefault(prompt, []).append((index, desc))
+        cache_keys.setdefault(prompt, fix_cache_key(context, desc, issue_type))
+
+    # ✅ Serve previously generated fixes from the cache
+    cache = get_fix_cache() if pending else None
+    for prompt in list(pending):
+        key = cache_keys[prompt]
+        fix = cache.get(key) if key is not None else None
+        if fix is None:
+            continue
+        for index, _ in pending.pop(prompt):
+            count_fix("cache")
+            fixes[index] = fix
+            if on_fix:
+                on_fix(index, fix)
+
+    prompts = sorted(pending, key=len)
+    for start in range(0, len(prompts), batch_size):
+        batch = prompts[start:start + batch_size]
+        futures = dict(zip(get_scheduler().submit_many(batch), batch))
+
+        for future in as_completed(futures):
+            prompt = futures[future]
+            try:
+                fix = format_llm_output(future.result())
+                if cache_keys[prompt] is not None:
+                    cache.put(cache_keys[prompt], fix)
+                source = "llm"
+            except Exception as e:
+                logging.error(f"[LLM Error] {e}")
+                fix, source = None, "error"
+                error = e
+
+            for index, desc in pending[prompt]:
+                count_fix(source)
+                fixes[index] = fix if fix is not None else fix_unavailable(desc, error)
+                if on_fix:
+                    on_fix(index, fixes[index])
+
+    return fixes
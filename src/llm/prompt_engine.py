@@ -1 +1,168 @@
-# Implements Chain-of-Thought prompting
+import ast
+import re
+import textwrap
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# Rough stand-in for a subword tokenizer: identifiers, numbers and each
+# punctuation character count as one token.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+SCOPE_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+def token_counter(tokenizer=None):
+    """Returns a ``text -> token count`` function for ``tokenizer`` (or the estimate)."""
+    if tokenizer is None:
+        return estimate_tokens
+
+    def count(text):
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return count
+
+@lru_cache(maxsize=16)
+def parse_module(code: str) -> Optional[ast.Module]:
+    """Parses ``code`` once for all the issues of a file; None if it doesn't parse."""
+    try:
+        return ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+def node_span(node):
+    """First and last line of ``node``, counting decorators."""
+    if not hasattr(node, "lineno"):  # match_case
+        return node.pattern.lineno, node.body[-1].end_lineno
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    return start, node.end_lineno
+
+def _child_statements(node):
+    for field in ("body", "orelse", "finalbody", "handlers", "cases"):
+        children = getattr(node, field, None)
+        if isinstance(children, list):
+            yield from children
+
+def enclosing_node(tree: ast.Module, line: int):
+    """Smallest function or class containing ``line``, else the top-level statement at it."""
+    best = None
+    candidates = tree.body
+    while candidates:
+        for node in candidates:
+            start, end = node_span(node)
+            if start <= line <= end:
+                if best is None or isinstance(node, SCOPE_TYPES):
+                    best = node
+                candidates = list(_child_statements(node))
+                break
+        else:
+            break
+    return best
+
+def referenced_names(node) -> set:
+    """Names read inside ``node`` that it doesn't bind itself."""
+    loaded, bound = set(), set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            (loaded if isinstance(child.ctx, ast.Load) else bound).add(child.id)
+        elif isinstance(child, ast.arg):
+            bound.add(child.arg)
+    return loaded - bound
+
+def _import_line(node, alias) -> str:
+    name = f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+    if isinstance(node, ast.Import):
+        return f"import {name}"
+    return f"from {'.' * node.level}{node.module or ''} import {name}"
+
+def _signature_stub(node) -> str:
+    """``def f(a, b): ...`` / ``class C(Base): ...`` for a module-level definition."""
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(base) for base in node.bases + node.keywords)
+        return f"class {node.name}({bases}): ..." if bases else f"class {node.name}: ..."
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}: ..."
+
+def module_symbols(tree: ast.Module, lines: List[str]) -> Dict[str, str]:
+    """Maps each module-level name to the line(s) that define it, for context headers."""
+    symbols = {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                bound = alias.asname or alias.name.split(".")[0]
+                symbols.setdefault(bound, _import_line(node, alias))
+        elif isinstance(node, SCOPE_TYPES):
+            symbols.setdefault(node.name, _signature_stub(node))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)) and node.end_lineno == node.lineno:
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    symbols.setdefault(target.id, lines[node.lineno - 1].strip())
+    return symbols
+
+def _fit_lines(lines, counts, budget, focus):
+    """Widest run of whole lines around index ``focus`` whose token count fits ``budget``."""
+    lo = hi = focus
+    used = counts[focus]
+    if used > budget:
+        # Even the issue line is too long: keep its first whole tokens
+        cut = [m.end() for m in _TOKEN_RE.finditer(lines[focus])][:max(budget, 1)]
+        return [lines[focus][:cut[-1]]] if cut else []
+    while True:
+        grew = False
+        for candidate in (hi + 1, lo - 1):
+            if 0 <= candidate < len(lines) and not lo <= candidate <= hi and used + counts[candidate] <= budget:
+                used += counts[candidate]
+                lo, hi = min(lo, candidate), max(hi, candidate)
+                grew = True
+        if not grew:
+            return lines[lo:hi + 1]
+
+def build_context(code: str, issue_line: Optional[int], max_tokens: int, tokenizer=None,
+                  tree: Optional[ast.Module] = None) -> str:
+    """Builds the smallest useful code context for an issue within ``max_tokens``.
+
+    The context is the innermost function or class around ``issue_line``,
+    preceded by the imports and module-level names it references (imports
+    first, then constants and definition stubs). Header lines are dropped
+    when they don't fit; a body that is still too large is cut down to whole
+    lines around the issue. Token counts come from ``tokenizer`` when given.
+    """
+    count = token_counter(tokenizer)
+    lines = code.splitlines()
+    if not lines:
+        return ""
+    tree = tree if tree is not None else parse_module(code)
+
+    node = enclosing_node(tree, issue_line) if tree is not None and issue_line else None
+    if node is None:
+        # Unparseable code or no line: keep whole lines around the issue
+        counts = [count(line) + 1 for line in lines]
+        focus = min(max((issue_line or 1) - 1, 0), len(lines) - 1)
+        return textwrap.dedent("\n".join(_fit_lines(lines, counts, max_tokens, focus)))
+
+    start, end = node_span(node)
+    body = lines[start - 1:end]
+    counts = [count(line) + 1 for line in body]
+    if sum(counts) > max_tokens:
+        return textwrap.dedent("\n".join(_fit_lines(body, counts, max_tokens, issue_line - start)))
+    body = textwrap.dedent("\n".join(body))
+
+    budget = max_tokens - sum(counts) - 1
+    symbols = module_symbols(tree, lines)
+    references = referenced_names(node) - {getattr(node, "name", None)}
+    wanted = [symbols[name] for name in symbols if name in references]
+    imports = [line for line in wanted if line.startswith(("import ", "from "))]
+    others = [line for line in wanted if not line.startswith(("import ", "from "))]
+
+    header = []
+    for line in dict.fromkeys(imports + others):
+        cost = count(line) + 1
+        if cost <= budget:
+            header.append(line)
+            budget -= cost
+
+    if not header:
+        return body
+    return "\n".join(header) + "\n\n" + body
@@ -0,0 +1,101 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+# Longest time a prompt waits for others to join its batch. Higher values
+# trade per-request latency for throughput under load; 0 only batches
+# prompts that are already queued when the model becomes free.
+MICROBATCH_WAIT_MS = float(os.environ.get("AI_REVIEWER_MICROBATCH_WAIT_MS", "10"))
+MICROBATCH_MAX_SIZE = int(os.environ.get("AI_REVIEWER_MICROBATCH_SIZE", "16"))
+
+class MicroBatchScheduler:
+    """Gathers prompts from concurrent callers into shared model calls.
+
+    ``submit`` queues a prompt and returns a Future. A single worker thread
+    takes the oldest prompt, waits up to ``max_wait_ms`` for more to arrive
+    (or until ``max_batch_size`` are queued), runs them as one
+    ``generate_batch(prompts)`` call and resolves every caller's Future with
+    its own output. Identical prompts in a batch are generated once.
+
+    Because only the worker calls the model, it is never used by two threads
+    at once.
+    """
+
+    def __init__(self, generate_batch: Callable[[List[str]], List[str]],
+                 max_batch_size=MICROBATCH_MAX_SIZE, max_wait_ms=MICROBATCH_WAIT_MS):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self.batches = 0
+        self.prompts = 0
+
+    def submit(self, prompt: str) -> Future:
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((prompt, future))
+        return future
+
+    def submit_many(self, prompts) -> List[Future]:
+        return [self.submit(prompt) for prompt in prompts]
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name="llm-microbatch", daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        """Blocks for the first prompt, then gathers a batch behind it."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+
+            # prompt -> futures still waiting for it (callers may have given up)
+            waiting = {}
+            for prompt, future in batch:
+                if future.set_running_or_notify_cancel():
+                    waiting.setdefault(prompt, []).append(future)
+            if not waiting:
+                continue
+
+            prompts = sorted(waiting, key=len)
+            try:
+                outputs = list(self.generate_batch(prompts))
+                if len(outputs) != len(prompts):
+                    raise ValueError(f"Expected {len(prompts)} outputs, got {len(outputs)}")
+            except Exception as e:
+                logging.error(f"[LLM] Batch of {len(prompts)} failed: {e}")
+                for futures in waiting.values():
+                    for future in futures:
+                        future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batches += 1
+                self.prompts += len(prompts)
+            for prompt, output in zip(prompts, outputs):
+                for future in waiting[prompt]:
+                    future.set_result(output)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queued": self._queue.qsize(), "batches": self.batches, "prompts": self.prompts,
+                    "max_batch_size": self.max_batch_size, "max_wait_ms": self.max_wait * 1000}
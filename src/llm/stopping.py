@@ -0,0 +1,77 @@
+from typing import Optional, Tuple
+
+FENCE = "```"
+# Text the model emits when it has finished the fix and moves on: literal
+# end-of-sequence markers or a new prompt-style markdown section.
+EOS_PATTERNS = ("</s>", "<|endoftext|>", "<|end|>", "<eos>", "\n## ")
+# A block of 1..MAX_REPEAT_LINES whole lines repeated REPEATS times at the
+# end of the output means decoding is stuck in a loop. Blocks without a
+# letter (blank lines, "----", "0, 0, 0") are ordinary code, not loops.
+MAX_REPEAT_LINES = 8
+REPEATS = 3
+
+def is_meaningful(lines) -> bool:
+    return any(char.isalpha() or char == "_" for line in lines for char in line)
+
+def repeated_tail(text: str) -> int:
+    """Length of the looping tail to drop, or 0.
+
+    The first copy of the repeated block is kept; the other ``REPEATS - 1``
+    copies are dropped, along with any unfinished line after them.
+    """
+    complete = text[:text.rfind("\n") + 1]
+    lines = complete.splitlines(keepends=True)
+    for period in range(1, min(MAX_REPEAT_LINES, len(lines) // REPEATS) + 1):
+        block = lines[-period:]
+        if not is_meaningful(block):
+            continue
+        if all(lines[len(lines) - (i + 1) * period:len(lines) - i * period] == block for i in range(1, REPEATS)):
+            return (REPEATS - 1) * len("".join(block)) + len(text) - len(complete)
+    return 0
+
+def truncate_at_stop(text: str) -> Tuple[str, Optional[str]]:
+    """Cuts ``text`` at the first stop point; returns (text, reason or None).
+
+    Stops after a closing code fence, before an EOS-like pattern, or where
+    the output starts repeating itself.
+    """
+    first = text.find(FENCE)
+    if first != -1:
+        closing = text.find(FENCE, first + len(FENCE))
+        if closing != -1:
+            return text[:closing + len(FENCE)], "fence"
+
+    eos = [index for index in (text.find(pattern) for pattern in EOS_PATTERNS) if index != -1]
+    if eos:
+        return text[:min(eos)], "eos_pattern"
+
+    repeat = repeated_tail(text)
+    if repeat:
+        return text[:len(text) - repeat], "repetition"
+    return text, None
+
+def adaptive_max_new_tokens(snippet_tokens: int, floor: int = 32, cap: int = 128) -> int:
+    """Token cap for a fix of a snippet this size: a little more than the snippet itself."""
+    return max(floor, min(cap, int(snippet_tokens * 1.2) + 16))
+
+def make_stopping_criteria(tokenizer):
+    """``StoppingCriteriaList`` that ends each sequence at its first stop point.
+
+    One list serves one ``generate`` call: it remembers where the generated
+    tokens start on its first step.
+    """
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class TextStop(StoppingCriteria):
+        def __init__(self):
+            self.start = None
+
+        def __call__(self, input_ids, scores, **kwargs):
+            if self.start is None:
+                self.start = input_ids.shape[1] - 1
+            texts = tokenizer.batch_decode(input_ids[:, self.start:], skip_special_tokens=True)
+            done = [truncate_at_stop(text)[1] is not None for text in texts]
+            return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+    return StoppingCriteriaList([TextStop()])
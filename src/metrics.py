@@ -0,0 +1,189 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets (seconds) covering sub-millisecond analysis up to slow generations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Per-analyzer spans wrap every rule callback, which costs a little on each
+# node, so they are opt-in.
+PROFILE_ANALYZERS = os.environ.get("AI_REVIEWER_PROFILE_ANALYZERS", "0") == "1"
+
+logger = logging.getLogger("ai_code_reviewer.metrics")
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items
+        ]
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = self.header()
+        for key, series in items:
+            labels = _format_labels(self.labelnames, key)
+            for bound, bucket_count in zip(self.buckets, series):
+                bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+            inf_labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+class Gauge(_Metric):
+    """Gauge whose value is read from a callback at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, callback):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def render(self):
+        return self.header() + [f"{self.name} {self.callback()}"]
+
+class Registry:
+    """Holds the process's metrics and renders the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback):
+        return self._register(Gauge(name, documentation, callback))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+SPAN_SECONDS = REGISTRY.histogram(
+    "ai_reviewer_span_seconds", "Time spent in each stage of the review pipeline.", ("span",)
+)
+FIXES_TOTAL = REGISTRY.counter(
+    "ai_reviewer_fixes_total", "Fixes produced, by source (rule_based, cache, llm, error).", ("source",)
+)
+LLM_CALLS_TOTAL = REGISTRY.counter(
+    "ai_reviewer_llm_calls_total", "Model invocations (one per generated batch)."
+)
+LLM_PROMPTS_TOTAL = REGISTRY.counter(
+    "ai_reviewer_llm_prompts_total", "Prompts sent to the model."
+)
+LLM_GENERATED_TOKENS = REGISTRY.counter(
+    "ai_reviewer_llm_generated_tokens_total", "Tokens generated by the model."
+)
+LLM_STOPS_TOTAL = REGISTRY.counter(
+    "ai_reviewer_llm_stops_total", "Why generations ended (fence, eos_pattern, repetition, eos, max_tokens).", ("reason",)
+)
+LLM_BATCH_SIZE = REGISTRY.histogram(
+    "ai_reviewer_llm_batch_size", "Prompts per model invocation.", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+ANALYSIS_CACHE_TOTAL = REGISTRY.counter(
+    "ai_reviewer_analysis_cache_total", "Analysis cache lookups, by result (hit, miss).", ("result",)
+)
+
+def observe_span(name: str, seconds: float):
+    SPAN_SECONDS.observe(seconds, span=name)
+
+@contextmanager
+def span(name: str):
+    """Times the enclosed block and records it under ``name``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_SECONDS.observe(elapsed, span=name)
+        logger.debug(f"⏱️ {name} took {elapsed * 1000:.2f} ms")
+
+def count_fix(source: str, amount: int = 1):
+    FIXES_TOTAL.inc(amount, source=source)
@@ -0,0 +1,60 @@
+from src.analysis.ast_analyzer import CodeAnalyzer
+from src.analysis.autofix import apply_edits, autofix, comment_edits, edits_for_issues, resolve_overlaps
+
+def test_drops_one_name_from_multi_name_imports():
+    code = "import os, sys\nfrom m import (a,\n    b, c)\nprint(os, a, c)\n"
+    issues = [(1, "Unused import detected: 'sys'.", "unused_import"),
+              (2, "Unused import detected: 'b'.", "unused_import")]
+
+    fixed_code, fixed = autofix(code, issues)
+    assert fixed_code == "import os\nfrom m import (a,\n    c)\nprint(os, a, c)\n"
+    assert fixed == {0, 1}
+
+def test_removes_dead_statements_and_keeps_blocks_valid():
+    code = "def f():\n    try:\n        import re\n    except ImportError:\n        return 1\n    x = g()\n" \
+           "    y = 2; z = 3\n    return z\n    print('dead')\n"
+    issues = [(3, "Unused import detected: 're'.", "unused_import"),
+              (6, "Variable 'x' is assigned but never used.", "unused_variable"),
+              (7, "Variable 'y' is assigned but never used.", "unused_variable"),
+              (9, "⚠️ Unreachable code detected after return/break/continue.")]
+
+    fixed_code, fixed = autofix(code, issues)
+    assert fixed_code == "def f():\n    try:\n        pass\n    except ImportError:\n        return 1\n    _ = g()\n" \
+                         "    z = 3\n    return z\n"
+    assert fixed == {0, 1, 2, 3}
+
+def test_overlapping_edits_are_resolved_in_one_pass():
+    code = "def f():\n    a = 1; b = 2\n    print('x')\n"
+    issues = [(2, "Variable 'a' is assigned but never used.", "unused_variable"),
+              (2, "Variable 'b' is assigned but never used.", "unused_variable")]
+    edits = edits_for_issues(code, issues) + comment_edits(code, [(3, "note", 2)])
+
+    accepted, rejected = resolve_overlaps(edits)
+    assert [edit[3] for edit in rejected] == [1]
+    assert apply_edits(code, accepted) == "def f():\n    b = 2\n    # note\n    print('x')\n"
+
+def test_analyzer_issues_on_sample_code_fix_cleanly():
+    code = "import os\nimport math\n\ndef area(r):\n    unused = 42\n    return math.pi * r ** 2\n    print(r)\n"
+    fixed_code, fixed = autofix(code, CodeAnalyzer().analyze_code(code))
+
+    assert fixed_code == "import math\n\ndef area(r):\n    return math.pi * r ** 2\n"
+    assert CodeAnalyzer().analyze_code(fixed_code) == []
+
+def test_code_that_may_still_be_used_is_never_deleted():
+    samples = [
+        "import os.path\nprint(os.path.join('a', 'b'))\n",
+        "class A:\n    limit = 10\n\n    def f(self):\n        return self.limit\n",
+        "from .core import helper\n",
+        "def f():\n    x = 1\n    del x\n",
+        "from m import a\n__all__ = ['a']\n",
+        "def f():\n    x = 0\n    x += 1\n    return 1\n",
+        "def f(items):\n    item = None\n    for item in items:\n        pass\n",
+        "DEBUG = True\nALLOWED_HOSTS = []\n",
+    ]
+    for code in samples:
+        issues = CodeAnalyzer().analyze_code(code)
+        assert issues
+        assert autofix(code, issues) == (code, set())
+
+    package_init = "import os\n"
+    assert autofix(package_init, CodeAnalyzer().analyze_code(package_init), filename="pkg/__init__.py")[1] == set()
@@ -0,0 +1,23 @@
+from src.analysis.batch import analyze_paths, discover_python_files
+
+def test_discover_honors_ignore_globs(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "build").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("import os\n")
+    (tmp_path / "pkg" / "notes.txt").write_text("")
+    (tmp_path / "build" / "b.py").write_text("import os\n")
+    (tmp_path / "pkg" / "test_a.py").write_text("import os\n")
+
+    paths = discover_python_files(str(tmp_path), ignore=["build", "test_*.py"])
+    assert paths == [str(tmp_path / "pkg" / "a.py")]
+
+def test_analyze_paths_merges_results_across_workers(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"m{i}.py"
+        path.write_text("import os\n")
+        paths.append(str(path))
+
+    results = analyze_paths(paths, jobs=2, chunk_size=1, use_cache=False)
+    assert list(results) == paths
+    assert all(any("Unused import" in issue[1] for issue in issues) for issues in results.values())
@@ -0,0 +1,22 @@
+from src.analysis.ast_analyzer import CodeAnalyzer
+from src.analysis.cache import AnalysisCache, analyze_code_cached
+
+CODE = "import os\n\ndef foo():\n    return 1\n    print('dead')\n"
+
+def test_cache_hit_returns_same_issues(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite3"))
+    first = analyze_code_cached(CODE, cache)
+    second = analyze_code_cached(CODE, cache)
+
+    assert first == second == CodeAnalyzer().analyze_code(CODE)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite3"), max_bytes=300)
+    for i in range(5):
+        cache.put(f"x = {i}\n", [(1, "⚠️ Variable 'x' is assigned but never used.", "unused_variable")])
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 300
+    assert cache.get("x = 4\n") is not None
+    assert cache.get("x = 0\n") is None
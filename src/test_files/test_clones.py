@@ -0,0 +1,72 @@
+import ast
+from src.analysis.ast_analyzer import CodeAnalyzer
+from src.analysis.clones import CloneIndex, structural_hash
+
+ORIGINAL = '''
+def total(items):
+    """Sum of positive prices."""
+    result = 0
+    for item in items:
+        if item.price > 0:
+            result += item.price * 2
+    return result
+'''
+RENAMED = '''
+def add_up(values):
+    acc = 0
+    for v in values:
+        if v.price > 10:
+            acc += v.price * 3
+    return acc
+'''
+DIFFERENT = '''
+def total(items):
+    result = 0
+    for item in items:
+        if item.price > 0:
+            result -= item.price * 2
+    return result
+'''
+
+def function_hash(code):
+    return structural_hash(ast.parse(code).body[0])[0]
+
+def test_renamed_identifiers_and_constants_hash_the_same():
+    assert function_hash(ORIGINAL) == function_hash(RENAMED)
+    assert function_hash(ORIGINAL) != function_hash(DIFFERENT)
+
+def test_analyzer_reports_clones_within_a_file():
+    issues = CodeAnalyzer().analyze_code(ORIGINAL + RENAMED)
+    clones = [issue for issue in issues if issue[2] == "repeated_function"]
+    assert [issue[0] for issue in clones] == [10]
+    assert "'add_up' duplicates 'total'" in clones[0][1]
+
+def test_index_finds_cross_file_clones_and_updates_incrementally(tmp_path):
+    index = CloneIndex()
+    index.update("a.py", ORIGINAL)
+    index.update("b.py", RENAMED + DIFFERENT)
+    groups = index.clone_groups()
+    assert [[(path, name) for path, name, *_ in members] for members in groups] == [[("a.py", "total"), ("b.py", "add_up")]]
+
+    path = str(tmp_path / "clones.json")
+    index.save(path)
+    reloaded = CloneIndex.load(path)
+    assert reloaded.update("a.py", ORIGINAL) is False
+    assert reloaded.update("b.py", DIFFERENT) is True
+    assert reloaded.parsed == 1
+    assert reloaded.clone_groups() == []
+
+    reloaded.retain(["a.py"])
+    assert list(reloaded.files) == ["a.py"]
+
+def test_deep_expressions_do_not_break_analysis():
+    code = "import os\n\ndef f(a):\n    return " + " + ".join(["a"] * 1500) + "\n"
+    issues = CodeAnalyzer().analyze_code(code)
+    assert [issue[2] for issue in issues] == ["unused_import"]
+
+def test_nested_copies_are_found_and_enclosing_functions_compared():
+    outer = "def outer{n}(data):\n" + "\n".join("    " + line for line in RENAMED.strip().splitlines()) + \
+            "\n    return add_up(data)\n"
+    code = outer.format(n=1) + "\n" + outer.format(n=2)
+    clones = [issue for issue in CodeAnalyzer().analyze_code(code) if issue[2] == "repeated_function"]
+    assert sorted(issue[0] for issue in clones) == [10, 11]  # outer2 and its nested add_up
@@ -0,0 +1,48 @@
+import socket
+import tempfile
+import threading
+import os
+import pytest
+from src.api import daemon
+
+@pytest.fixture
+def server():
+    socket_path = os.path.join(tempfile.mkdtemp(), "d.sock")
+    server = daemon.ReviewDaemon(socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_client_reuses_one_connection_for_several_requests(server):
+    assert os.stat(server.socket_path).st_mode & 0o777 == 0o600
+    with daemon.DaemonClient(server.socket_path) as client:
+        assert client.request({"op": "ping"}) == {"ok": True, "pid": os.getpid()}
+        issues, fixes = client.analyze("import os\n", fixes=False)
+        assert issues[0][0] == 1 and "Unused import" in issues[0][1]
+        assert fixes == [None]
+        assert client.request({"op": "nope"})["ok"] is False
+
+def test_oversized_frames_are_rejected(server):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(server.socket_path)
+        sock.sendall(daemon.FRAME_HEADER.pack(daemon.MAX_FRAME_BYTES + 1))
+        assert sock.recv(1) == b""  # Server hung up
+
+def test_stop_shuts_the_daemon_down_and_falls_back_in_process(server):
+    assert daemon.stop(server.socket_path)
+    server.server_close()
+    assert not daemon.ping(server.socket_path)
+
+    issues, fixes = daemon.review_via_daemon("import os\n", fixes=False, socket_path=server.socket_path)
+    assert "Unused import" in issues[0][1] and fixes == [None]
+
+def test_daemon_errors_fall_back_in_process(server, monkeypatch):
+    monkeypatch.setattr(daemon, "handle_request", lambda request: {"ok": False, "error": "model failed"})
+    with pytest.raises(daemon.DaemonError):
+        with daemon.DaemonClient(server.socket_path) as client:
+            client.analyze("import os\n", fixes=False)
+
+    issues, fixes = daemon.review_via_daemon("import os\n", fixes=False, socket_path=server.socket_path)
+    assert "Unused import" in issues[0][1] and fixes == [None]
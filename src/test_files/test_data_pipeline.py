@@ -0,0 +1,59 @@
+import io
+import json
+import pytest
+from src.data.preprocess import SplitStats, clean_instruction, extract_error_type, preprocess_file, preprocess_record
+from src.data.records import iter_json_array, iter_records
+
+RECORDS = [
+    {"instruction": "### Buggy Code:\nx = d['a']\n### Traceback:\nKeyError: 'a'", "response": "x = d.get('a')"},
+    {"instruction": "### Bug Description:\nwrong type\n### Fix:\n", "response": "y"},
+    {"instruction": None, "response": "x = d.get('a')"},
+]
+
+def test_json_array_is_streamed_element_by_element():
+    text = json.dumps(RECORDS, indent=2)
+    assert list(iter_json_array(io.StringIO(text), read_size=5)) == RECORDS
+    assert list(iter_json_array(io.StringIO("[1, 22, 333]"), read_size=2)) == [1, 22, 333]
+
+def test_cleaning_matches_header_removal():
+    assert clean_instruction(RECORDS[0]["instruction"]) == "x = d['a']\nKeyError: 'a'"
+    assert extract_error_type(RECORDS[0]["instruction"]) == "KeyError"
+    assert preprocess_record(RECORDS[2])["error_type"] == "UnknownError"
+
+def test_stats_merge_like_a_single_pass():
+    single, left, right = SplitStats(), SplitStats(), SplitStats()
+    for i, record in enumerate(RECORDS):
+        row = preprocess_record(record)
+        single.add(record, row)
+        (left if i < 2 else right).add(record, row)
+    left.merge(right)
+
+    assert left.summary() == single.summary()
+    summary = single.summary()
+    assert summary["duplicate_responses"] == 1
+    assert summary["missing"] == {"instruction": 1, "response": 0}
+    assert summary["response_length"]["50%"] == 14
+
+def test_preprocess_file_writes_shards(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    source = tmp_path / "train.jsonl"
+    source.write_text("\n".join(json.dumps(record) for record in RECORDS * 3))
+
+    stats = preprocess_file(str(source), str(tmp_path / "out"), jobs=2, chunk_size=4)
+
+    assert len(stats.shards) == 3
+    assert sum(pq.read_table(shard).num_rows for shard in stats.shards) == 9
+    assert stats.summary()["count"] == len(list(iter_records(str(source))))
+
+def test_pickle_converts_to_compact_gzipped_jsonl(tmp_path):
+    import pickle
+    from convert_pickle_to_json import convert
+
+    source = tmp_path / "bugfixes.pickle"
+    source.write_bytes(pickle.dumps(RECORDS + [{"instruction": "x", "response": float("nan")}]))
+    out = tmp_path / "bugfixes.jsonl.gz"
+
+    assert convert(str(source), str(out), chunk_size=2, compress="gzip") == 4
+    records = list(iter_records(str(out)))
+    assert records[:3] == RECORDS
+    assert records[3]["response"] is None
@@ -0,0 +1,36 @@
+from src.analysis.ast_analyzer import CodeAnalyzer
+from src.analysis.diff import changed_regions, issues_in_diff, parse_unified_diff
+
+CODE = """import os
+
+def untouched():
+    return 1
+    print("dead")
+
+@decorator
+def touched(items):
+    for i in range(len(items)):
+        print(items[i])
+"""
+
+DIFF = """diff --git a/pkg/mod.py b/pkg/mod.py
+--- a/pkg/mod.py
++++ b/pkg/mod.py
+@@ -9,2 +9,2 @@ def touched(items):
+     for i in range(len(items)):
+-        print(i)
++        print(items[i])
+"""
+
+def test_parse_unified_diff_reports_new_side_lines():
+    assert parse_unified_diff(DIFF) == {"pkg/mod.py": {10}}
+
+def test_changed_lines_widen_to_enclosing_definition():
+    assert changed_regions(CODE, {10}) == [(7, 10)]
+
+def test_issues_are_limited_to_changed_definitions():
+    issues = CodeAnalyzer().analyze_code(CODE)
+    kept = issues_in_diff(CODE, issues, parse_unified_diff(DIFF)["pkg/mod.py"])
+
+    assert [issue[0] for issue in kept] == [9]
+    assert "range(len(x))" in kept[0][1]
@@ -0,0 +1,56 @@
+import ast
+from src.analysis.complexity import CyclomaticComplexityAnalyzer, analyze_cyclomatic_complexity
+from src.analysis.dead_code import DeadCodeAnalyzer, detect_dead_code
+from src.analysis.engine import Rule, run_rules
+from src.analysis.loop_optimizer import LoopOptimizer, analyze_loops
+
+SAMPLE = """
+def outer(items):
+    for x in items:
+        for y in items:
+            items.append(y)
+            items.pop()
+        while x:
+            break
+    for i in range(len(items)):
+        if i and items or not i:
+            pass
+    def inner():
+        return 1
+        print("dead")
+    return items
+    print("dead")
+
+class Box:
+    def method(self, values):
+        for v in values:
+            values.remove(v)
+"""
+
+def test_engine_visits_in_node_visitor_order():
+    class Recorder(Rule):
+        def __init__(self):
+            super().__init__()
+            self.events = []
+
+        def enter_FunctionDef(self, node):
+            self.events.append(("enter", node.name))
+
+        def leave_FunctionDef(self, node):
+            self.events.append(("leave", node.name))
+
+    recorder = Recorder()
+    run_rules(ast.parse(SAMPLE), [recorder])
+    assert recorder.events == [
+        ("enter", "outer"), ("enter", "inner"), ("leave", "inner"), ("leave", "outer"),
+        ("enter", "method"), ("leave", "method"),
+    ]
+
+def test_fused_rules_match_visitors():
+    tree = ast.parse(SAMPLE)
+
+    loops = LoopOptimizer()
+    loops.visit(tree)
+    assert analyze_loops(tree) == loops.issues
+    assert detect_dead_code(tree) == DeadCodeAnalyzer().analyze(tree)
+    assert analyze_cyclomatic_complexity(tree, threshold=1) == CyclomaticComplexityAnalyzer(threshold=1).analyze(tree)
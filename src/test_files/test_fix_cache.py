@@ -0,0 +1,30 @@
+import time
+from src.llm.fix_cache import DiskFixStore, FixCache, MemoryFixStore, make_fix_key
+
+PARAMS = {"max_new_tokens": 128, "do_sample": False}
+
+def test_fix_key_ignores_indentation_but_not_model_or_params():
+    key = make_fix_key("complexity", "    if x:\n        return 1\n", "model-a", PARAMS)
+    assert key == make_fix_key("complexity", "if x:\n    return 1", "model-a", PARAMS)
+    assert key != make_fix_key("complexity", "if x:\n    return 1", "model-b", PARAMS)
+    assert key != make_fix_key("complexity", "if x:\n    return 1", "model-a", {**PARAMS, "max_new_tokens": 64})
+
+def test_disk_tier_survives_a_new_memory_tier(tmp_path):
+    path = str(tmp_path / "fixes.sqlite3")
+    FixCache(disk=DiskFixStore(path)).put("k", "```python\npass\n```")
+
+    cache = FixCache(disk=DiskFixStore(path))
+    assert cache.get("k") == "```python\npass\n```"
+    assert cache.get("k") == "```python\npass\n```"
+    assert (cache.disk_hits, cache.memory_hits, cache.misses) == (1, 1, 0)
+
+def test_expired_and_evicted_entries_are_dropped():
+    memory = MemoryFixStore(max_entries=2, ttl=60)
+    memory.put("a", "1")
+    memory.put("b", "2")
+    memory.put("c", "3")
+    assert memory.get("a") is None
+    assert memory.get("c") == "3"
+
+    memory.put("old", "4", stored_at=time.time() - 120)
+    assert memory.get("old") is None
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.api.inference import InferenceGate, InferenceOverloaded
+
+def test_gate_runs_off_the_event_loop():
+    gate = InferenceGate(max_concurrent=1, max_queued=0)
+    loop_thread = threading.get_ident()
+
+    result = asyncio.run(gate.run(threading.get_ident))
+    assert result != loop_thread
+    gate.shutdown()
+
+def test_gate_rejects_when_full():
+    gate = InferenceGate(max_concurrent=1, max_queued=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(gate.run(release.wait))
+        second = asyncio.ensure_future(gate.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(InferenceOverloaded):
+            await gate.run(release.wait)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(scenario()) == [True, True]
+    gate.shutdown()
+
+def test_gate_drops_work_that_queued_too_long():
+    gate = InferenceGate(max_concurrent=1, max_queued=1, queue_timeout=0.01)
+
+    async def scenario():
+        first = asyncio.ensure_future(gate.run(time.sleep, 0.1))
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceOverloaded):
+            await gate.run(lambda: "never runs")
+        await first
+
+    asyncio.run(scenario())
+    gate.shutdown()
+
+def test_gate_times_out_while_waiting_for_a_slot():
+    gate = InferenceGate(max_concurrent=1, max_queued=1, queue_timeout=0.2)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(gate.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        with pytest.raises(InferenceOverloaded, match="0.2s"):
+            await gate.run(lambda: "never runs")
+        waited = time.monotonic() - started
+        assert gate.stats()["queued"] == 0
+        release.set()
+        await first
+        return waited
+
+    assert asyncio.run(scenario()) < 1
+    gate.shutdown()
@@ -13,3 +13,89 @@ def test_detect_unused_variable():
     analyzer = CodeAnalyzer()
     issues = analyzer.analyze_code(code)
     assert any("defined but never used" in issue[1] for issue in issues)
+
+
+def test_rule_based_fix_does_not_load_model():
+    from src.llm.llm_fixer import is_model_loaded, set_local_llm
+
+    set_local_llm(None)
+    get_ai_fix_local("import math", "Unused import detected: 'math'")
+    assert not is_model_loaded()
+
+
+def test_batched_fixes_skip_rule_based_issues_and_keep_order():
+    from src.llm.fix_cache import FixCache
+    from src.llm.llm_fixer import get_ai_fixes_local, set_fix_cache, set_local_llm
+
+    calls = []
+
+    def stub_llm(prompts, batch_size=None, **kwargs):
+        calls.append(list(prompts))
+        return [[{"generated_text": f"```python\nfix_{len(p)}\n```"}] for p in prompts]
+
+    code = "def f(x):\n    return x\n" * 5
+    issues = [
+        (1, "⚠️ Function 'f' has high cyclomatic complexity (12). Consider refactoring."),
+        (3, "⚠️ Unused import detected: 'os'. Consider removing it.", "unused_import"),
+        (5, "Some long issue description that needs the model to produce a fix"),
+        (7, "Short issue"),
+    ]
+
+    set_local_llm(stub_llm)
+    set_fix_cache(FixCache())
+    try:
+        fixes = get_ai_fixes_local(code, issues, batch_size=2)
+        assert get_ai_fixes_local(code, issues, batch_size=2) == fixes
+    finally:
+        set_local_llm(None)
+        set_fix_cache(None)
+
+    # The second run is served entirely from the fix cache
+    assert [len(batch) for batch in calls] == [2, 1]
+    flat = [p for batch in calls for p in batch]
+    assert flat == sorted(flat, key=len)
+    assert "Removed unused import" in fixes[1]
+    assert all(fix.startswith("```python\nfix_") for i, fix in enumerate(fixes) if i != 1)
+
+
+def test_seq2seq_backend_matches_pipeline_output_shape():
+    from src.llm.backends import Seq2SeqBackend
+
+    class Tokenizer:
+        def __call__(self, prompts, **kwargs):
+            return {"input_ids": prompts}
+
+        def batch_decode(self, ids, skip_special_tokens=True):
+            return [f"fixed {prompt}" for prompt in ids]
+
+    class Model:
+        def generate(self, input_ids, **kwargs):
+            assert "return_full_text" not in kwargs
+            return input_ids
+
+    backend = Seq2SeqBackend(Model(), Tokenizer())
+    outputs = backend(["a", "b", "c"], batch_size=2, max_new_tokens=8, do_sample=False, return_full_text=False)
+    assert outputs == [[{"generated_text": "fixed a"}], [{"generated_text": "fixed b"}], [{"generated_text": "fixed c"}]]
+    assert backend("a") == [{"generated_text": "fixed a"}]
+
+
+def test_generate_batch_cuts_output_and_caps_tokens_by_snippet():
+    from src.llm.llm_fixer import build_prompt, generate_batch, set_local_llm
+    from src.metrics import LLM_STOPS_TOTAL
+
+    seen = {}
+
+    def stub_llm(prompts, batch_size=None, **kwargs):
+        seen.update(kwargs)
+        return [[{"generated_text": "```python\nx = 2\n```\nExplanation: the fix"}] for _ in prompts]
+
+    before = LLM_STOPS_TOTAL.value(reason="fence")
+    set_local_llm(stub_llm)
+    try:
+        texts = generate_batch([build_prompt("x = 1", "Short issue")])
+    finally:
+        set_local_llm(None)
+
+    assert texts == ["```python\nx = 2\n```"]
+    assert seen["max_new_tokens"] < 128
+    assert LLM_STOPS_TOTAL.value(reason="fence") == before + 1
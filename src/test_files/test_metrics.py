@@ -0,0 +1,24 @@
+from src.metrics import Registry, span, SPAN_SECONDS
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("test_latency_seconds", "Test latency.", ("stage",), buckets=(0.1, 1.0))
+    latency.observe(0.05, stage="parse")
+    latency.observe(0.5, stage="parse")
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="parse",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="parse",le="+Inf"} 2' in text
+    assert 'test_latency_seconds_count{stage="parse"} 2' in text
+
+
+def test_span_records_even_on_error():
+    before = SPAN_SECONDS.count(span="test_span")
+    try:
+        with span("test_span"):
+            raise ValueError
+    except ValueError:
+        pass
+    assert SPAN_SECONDS.count(span="test_span") == before + 1
@@ -0,0 +1,45 @@
+from src.llm.prompt_engine import build_context, estimate_tokens
+
+CODE = '''import os
+import json
+from typing import List
+
+LIMIT = 10
+
+def helper(a, b=2) -> int:
+    return a + b
+
+def unrelated():
+    return os.getcwd()
+
+class Box:
+    def pack(self, items: List[int]):
+        total = 0
+        for i in items:
+            if i > LIMIT:
+                total = helper(total, i)
+        return json.dumps(total)
+'''
+
+def test_context_is_enclosing_function_with_referenced_names():
+    context = build_context(CODE, 17, max_tokens=200)
+
+    assert context.startswith("import json\nfrom typing import List\nLIMIT = 10\ndef helper(a, b=2) -> int: ...\n\n")
+    assert context.endswith("def pack(self, items: List[int]):\n    total = 0\n    for i in items:\n"
+                            "        if i > LIMIT:\n            total = helper(total, i)\n    return json.dumps(total)")
+    assert "import os" not in context
+    assert "unrelated" not in context
+
+def test_context_respects_token_budget_with_whole_lines():
+    context = build_context(CODE, 18, max_tokens=25)
+
+    assert estimate_tokens(context) <= 25
+    assert "total = helper(total, i)" in context
+    assert all(line in CODE for line in context.splitlines())
+
+def test_unparseable_code_falls_back_to_lines_around_issue():
+    code = "\n".join(f"x{i} = {i}" for i in range(50)) + "\ndef broken(:\n"
+    context = build_context(code, 25, max_tokens=20)
+
+    assert "x24 = 24" in context
+    assert "x0 = 0" not in context
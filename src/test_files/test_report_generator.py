@@ -10,3 +10,43 @@ def test_save_report_creates_file(tmp_path):
     os.makedirs("reports", exist_ok=True)
     save_report(filename, results)
     assert os.path.exists("reports/code_review_report.md")
+
+def test_report_writer_creates_per_run_json_and_sarif(tmp_path):
+    import json
+    from src.analysis.report_generator import ReportWriter
+
+    issues = [
+        (3, "⚠️ Unused import detected: 'os'. Consider removing it.", "unused_import"),
+        {"line": 9, "issue": "⚠️ Nested loop detected: Consider optimizing.", "fix": "```python\npass\n```"},
+    ]
+    with ReportWriter(str(tmp_path), formats=("md", "json", "sarif")) as first:
+        first.write_file("a.py", issues)
+        first.write_file("b.py", [])
+    with ReportWriter(str(tmp_path), formats=("json",)) as second:
+        second.write_file("c.py", issues)
+
+    assert first.run_dir != second.run_dir
+
+    report = json.load(open(first.paths["json"]))
+    assert [f["file"] for f in report["files"]] == ["a.py", "b.py"]
+    assert report["files"][0]["issues"][0]["issue_type"] == "unused_import"
+
+    sarif = json.load(open(first.paths["sarif"]))
+    results = sarif["runs"][0]["results"]
+    assert [r["ruleId"] for r in results] == ["unused_import", "nested_loop"]
+    assert results[1]["locations"][0]["physicalLocation"]["region"]["startLine"] == 9
+    assert "No issues found" in open(first.paths["md"]).read()
+
+def test_report_writer_renders_in_memory(tmp_path, monkeypatch):
+    import json
+    from src.analysis.report_generator import ReportWriter
+
+    workdir = tmp_path / "workdir"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+    with ReportWriter(None, formats=("md", "json")) as report:
+        report.write_file("a.py", [(3, "⚠️ Unused import detected: 'os'. Consider removing it.", "unused_import")])
+
+    assert report.paths == {} and list(workdir.iterdir()) == []
+    assert json.loads(report.contents["json"])["files"][0]["file"] == "a.py"
+    assert "Unused import" in report.contents["md"]
@@ -0,0 +1,49 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from src.llm.scheduler import MicroBatchScheduler
+
+def test_concurrent_prompts_share_a_batch():
+    calls = []
+
+    def generate(prompts):
+        calls.append(list(prompts))
+        return [p.upper() for p in prompts]
+
+    scheduler = MicroBatchScheduler(generate, max_batch_size=8, max_wait_ms=200)
+    start = threading.Barrier(4)
+
+    def caller(prompt):
+        start.wait()
+        return scheduler.submit(prompt).result(timeout=5)
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(caller, ["a", "bb", "a", "ccc"]))
+
+    assert results == ["A", "BB", "A", "CCC"]
+    # One model call; the duplicate prompt is generated once
+    assert calls == [["a", "bb", "ccc"]]
+
+def test_batches_are_capped_at_max_size():
+    calls = []
+
+    def generate(prompts):
+        calls.append(len(prompts))
+        return prompts
+
+    scheduler = MicroBatchScheduler(generate, max_batch_size=2, max_wait_ms=50)
+    futures = scheduler.submit_many(["a", "b", "c"])
+    assert [f.result(timeout=5) for f in futures] == ["a", "b", "c"]
+    assert max(calls) <= 2 and sum(calls) == 3
+
+def test_batch_errors_reach_every_caller():
+    def generate(prompts):
+        raise RuntimeError("model crashed")
+
+    scheduler = MicroBatchScheduler(generate, max_wait_ms=0)
+    future = scheduler.submit("a")
+    with pytest.raises(RuntimeError):
+        future.result(timeout=5)
+    # The worker survives a failed batch
+    scheduler.generate_batch = lambda prompts: prompts
+    assert scheduler.submit("b").result(timeout=5) == "b"
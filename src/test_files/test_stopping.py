@@ -0,0 +1,33 @@
+from src.llm.stopping import adaptive_max_new_tokens, truncate_at_stop
+
+def test_stops_after_closing_fence():
+    text, reason = truncate_at_stop("```python\nx = 1\n```\nThis fix removes the bug because")
+    assert (text, reason) == ("```python\nx = 1\n```", "fence")
+
+def test_stops_before_eos_pattern():
+    text, reason = truncate_at_stop("x = 1\n## Issue\nmore")
+    assert (text, reason) == ("x = 1", "eos_pattern")
+
+def test_stops_when_output_repeats():
+    text, reason = truncate_at_stop("x = 1\n" + "print(value)\n" * 4)
+    assert reason == "repetition"
+    assert text.count("print(value)") == 2
+
+def test_repetition_needs_whole_meaningful_lines():
+    for text in ("```python\n# ------------------------------",
+                 "def f():\n" + " " * 24,
+                 "x = [\n    " + "0, " * 12,
+                 "grid = [\n    [0, 0],\n    [0, 0],\n    [0, 0],\n    [0, 0],\n",
+                 "x = 1\n\n\n\n\n"):
+        assert truncate_at_stop(text) == (text, None)
+
+    text, reason = truncate_at_stop("x = 1\n" + "y += 1\nz += 1\n" * 3 + "y +")
+    assert (text, reason) == ("x = 1\ny += 1\nz += 1\n", "repetition")
+
+def test_unfinished_output_is_kept():
+    assert truncate_at_stop("```python\nx = 1\n") == ("```python\nx = 1\n", None)
+
+def test_adaptive_cap_follows_snippet_size():
+    assert adaptive_max_new_tokens(5) == 32
+    assert adaptive_max_new_tokens(50) == 76
+    assert adaptive_max_new_tokens(400) == 128
@@ -0,0 +1,65 @@
+import io
+import tarfile
+import zipfile
+import pytest
+from src.api.endpoints import plan_fixes
+from src.api.uploads import SourceCollector, UploadRejected, collect_sources, member_name
+
+def zip_bytes(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+def test_member_names_stay_inside_the_upload():
+    assert member_name("../../etc/x.py") == "etc/x.py"
+    assert member_name("/abs/./y.py", "bundle.zip") == "bundle.zip/abs/y.py"
+
+def test_collects_python_files_from_tar_and_plain_uploads():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, content in {"src/a.py": b"x = 1\n", "src/data.json": b"{}"}.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    buffer.seek(0)
+
+    collector = collect_sources([("code.tar.gz", buffer), ("b.py", io.BytesIO(b"y = 2\n"))])
+    assert collector.sources == [("code.tar.gz/src/a.py", "x = 1\n"), ("b.py", "y = 2\n")]
+
+def test_limits_reject_oversized_archives():
+    archive = zip_bytes({f"m{i}.py": "x = 1\n" for i in range(5)})
+    with pytest.raises(UploadRejected) as e:
+        collect_sources([("many.zip", archive)], SourceCollector(max_entries=3))
+    assert e.value.status_code == 413
+
+    collector = collect_sources([("big.zip", zip_bytes({"big.py": "x" * 100, "ok.py": "y = 1\n"}))],
+                                SourceCollector(max_file=50))
+    assert [name for name, _ in collector.sources] == ["ok.py"]
+    assert "big.py" in collector.errors
+
+def test_upload_limit_covers_the_whole_request():
+    uploads = [(f"m{i}.py", io.BytesIO(b"x = 1\n" * 10)) for i in range(3)]  # 60 bytes each
+    with pytest.raises(UploadRejected, match="Uploads total more than 150 bytes") as e:
+        collect_sources(uploads, SourceCollector(max_upload=150))
+    assert e.value.status_code == 413
+
+def test_duplicate_names_reject_the_upload():
+    uploads = [("a.py", io.BytesIO(b"x = 1\n")), ("a.py", io.BytesIO(b"x = 2\n"))]
+    with pytest.raises(UploadRejected, match="Duplicate file name: a.py") as e:
+        collect_sources(uploads)
+    assert e.value.status_code == 400
+
+    # A file that was skipped still counts as seen
+    with pytest.raises(UploadRejected, match="Duplicate file name: big.py"):
+        collect_sources([("big.py", io.BytesIO(b"x" * 100)), ("big.py", io.BytesIO(b"y = 1\n"))],
+                        SourceCollector(max_file=50))
+
+def test_plan_fixes_shares_the_model_budget_across_files():
+    needs_model = [(line, "Possible bug") for line in range(1, 6)]
+    free = [(1, "Unused import 'os'", "unused_import")]
+
+    plan = plan_fixes([needs_model, free + needs_model[:1]], budget=3)
+    assert plan == [[0, 1], [0, 1]]
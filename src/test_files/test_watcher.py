@@ -0,0 +1,48 @@
+import sys
+import pytest
+from src.analysis.watcher import InotifyWatcher, PollingWatcher, wait_for_changes
+from src.llm.llm_fixer import issue_context_key
+
+def test_polling_watcher_reports_created_modified_and_deleted_files(tmp_path):
+    (tmp_path / "a.py").write_text("x = 1\n")
+    (tmp_path / "b.py").write_text("y = 1\n")
+    watcher = PollingWatcher(str(tmp_path), interval=0.01)
+
+    (tmp_path / "a.py").write_text("x = 2  # longer\n")
+    (tmp_path / "b.py").unlink()
+    (tmp_path / "c.py").write_text("z = 1\n")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    assert {p.rsplit("/", 1)[-1] for p in watcher.poll(timeout=1)} == {"a.py", "b.py", "c.py"}
+    assert watcher.poll(timeout=0.05) == set()
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_watcher_debounces_a_burst_of_saves(tmp_path):
+    watcher = InotifyWatcher(str(tmp_path), ignore=["build"])
+    try:
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "build").mkdir()
+        for i in range(5):
+            (tmp_path / "a.py").write_text(f"x = {i}\n")
+        (tmp_path / "pkg" / "b.py").write_text("y = 1\n")
+        (tmp_path / "build" / "c.py").write_text("z = 1\n")
+
+        changed = wait_for_changes(watcher, debounce=0.1, timeout=2)
+        assert changed == {str(tmp_path / "a.py"), str(tmp_path / "pkg" / "b.py")}
+        assert wait_for_changes(watcher, debounce=0.05, timeout=0.1) == set()
+    finally:
+        watcher.close()
+
+def test_issue_context_key_survives_unrelated_edits():
+    code = "def f(x):\n    return x / 0\n\ndef g():\n    return 1\n"
+    moved = "import os\n\n" + code.replace("return 1", "return 2")
+    issue = (2, "Division by zero", "bug")
+
+    assert issue_context_key(code, issue) == issue_context_key(moved, (4, "Division by zero", "bug"))
+    assert issue_context_key(code, issue) != issue_context_key(code.replace("x / 0", "x // 0"), issue)
+
+def test_rule_based_keys_follow_the_edited_line():
+    issue = (1, "⚠️ Unused import detected: 'os'. Consider removing it.", "unused_import")
+
+    assert issue_context_key("import os, sys\n", issue) != issue_context_key("import os, json\n", issue)
+    assert issue_context_key("import os, sys\n", issue) == issue_context_key("\nimport os, sys\n", (2, *issue[1:]))
@@ -1,3 +1,4 @@
+import json
 from fastapi.testclient import TestClient
 from src.api.main import app
 
@@ -30,3 +31,95 @@ def test_analyze_file():
     assert "filename" in data
     assert "issues" in data
     assert isinstance(data["issues"], list)
+
+def test_rule_based_fixes_skip_the_inference_gate(monkeypatch):
+    from src.api.inference import InferenceOverloaded, inference_gate
+
+    async def overloaded(*args, **kwargs):
+        raise InferenceOverloaded("Too many generations in progress")
+
+    monkeypatch.setattr(inference_gate, "run", overloaded)
+    response = client.post(
+        "/analyze/file",
+        files={"file": ("test_file.py", "import os\n", "text/x-python")}
+    )
+
+    assert response.status_code == 200
+    issues = response.json()["issues"]
+    assert issues and all(issue["fix"] for issue in issues)
+
+def test_analyze_file_stream():
+    file_content = "import os\n\ndef example():\n    return 1\n    print('unreachable')\n"
+
+    response = client.post(
+        "/analyze/file/stream",
+        files={"file": ("test_file.py", file_content, "text/x-python")}
+    )
+
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert events[0]["event"] == "issues"
+    assert events[-1]["event"] == "done"
+
+    fixes = [event for event in events if event["event"] == "fix"]
+    assert len(fixes) == len(events[0]["issues"])
+
+def test_analyze_file_stream_reports_generation_errors(monkeypatch):
+    from src.api import endpoints
+
+    def broken(*args, **kwargs):
+        raise ValueError("model exploded")
+
+    monkeypatch.setattr(endpoints, "get_ai_fixes_local", broken)
+    response = client.post(
+        "/analyze/file/stream",
+        files={"file": ("test_file.py", "import os\n", "text/x-python")}
+    )
+
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [event["event"] for event in events] == ["issues", "error"]
+    assert events[-1]["status"] == 500 and "model exploded" in events[-1]["detail"]
+
+def test_analyze_file_with_diff_only_reports_changed_code():
+    file_content = "import os\n\ndef changed():\n    return 1\n    print('unreachable')\n"
+    diff = "--- a/test_file.py\n+++ b/test_file.py\n@@ -4,1 +4,1 @@\n-    return 0\n+    return 1\n"
+
+    response = client.post(
+        "/analyze/file",
+        files={"file": ("test_file.py", file_content, "text/x-python")},
+        data={"diff": diff},
+    )
+
+    assert response.status_code == 200
+    assert [issue["line"] for issue in response.json()["issues"]] == [5]
+
+def test_metrics():
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'ai_reviewer_http_request_seconds_count{method="GET",path="/health",status="200"}' in response.text
+    assert "ai_reviewer_inference_queued 0" in response.text
+
+def test_analyze_files_with_archive():
+    import io, zipfile
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("pkg/a.py", "import os\n")
+        archive.writestr("pkg/b.py", "def f():\n    return 1\n    print('unreachable')\n")
+        archive.writestr("README.md", "not python")
+
+    response = client.post(
+        "/analyze/files",
+        files=[("files", ("project.zip", buffer.getvalue(), "application/zip"))],
+        data={"fixes": "false"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["filename"] for result in data["files"]] == ["pkg/a.py", "pkg/b.py"]
+    assert all(result["issues"] for result in data["files"])
+    assert data["summary"]["files"] == 2
+    assert list(data["reports"]) == ["md"]
+    assert "pkg/a.py" in data["reports"]["md"] and "pkg/b.py" in data["reports"]["md"]